@@ -0,0 +1,115 @@
+"""Benchmark CLI startup with `python -X importtime` and enforce an import-time budget.
+
+Each target is imported in a fresh interpreter several times; the best cumulative
+import time is compared with its budget, and the slowest modules are listed.
+The reviewer must also import without loading any LLM SDK or tokenizer: those are
+loaded on first use, behind the backend selected by YX_CC_LLM_BACKEND.
+
+Usage:
+    uv run python benchmarks/bench_startup.py [--repeat 5] [--scale 1.0]
+
+Exits non-zero when a budget is exceeded, so it can run as a CI check.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Module -> budget for its cumulative import time, in milliseconds
+IMPORT_BUDGETS_MS = {
+    "yx_cc.main": 250,
+    "yx_cc.core.pr_reviewer": 500,
+}
+
+# Budget for `python -m yx_cc --help`, wall time including interpreter startup
+HELP_BUDGET_MS = 600
+
+# Heavy libraries that importing the reviewer must not load
+LAZY_MODULES = ("openai", "claude_code_sdk", "tiktoken", "requests")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    return env
+
+
+def import_time(module: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """Import module in a fresh interpreter; return its cumulative ms and per-module self times."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_env(), check=True
+    )
+    total = 0.0
+    self_times = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.strip() == module:
+            total = int(cumulative_us) / 1000
+        self_times.append((int(self_us) / 1000, name.strip()))
+    return total, sorted(self_times, reverse=True)
+
+
+def loaded_lazy_modules(module: str) -> List[str]:
+    """Return the LAZY_MODULES that importing module pulls in."""
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=_env(), check=True)
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def help_time() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "yx_cc", "--help"], capture_output=True, env=_env(), check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply all budgets, e.g. 2.0 on slow CI runners")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules listed per target")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        runs = [import_time(module) for _ in range(args.repeat)]
+        best, self_times = min(runs, key=lambda run: run[0])
+        limit = budget * args.scale
+        status = "ok" if best <= limit else "OVER BUDGET"
+        print(f"{module:<28} {best:>8.1f}ms  (budget {limit:.0f}ms)  {status}")
+        for ms, name in self_times[:args.top]:
+            print(f"    {ms:>8.1f}ms  {name}")
+        if best > limit:
+            failures.append(f"{module} took {best:.1f}ms > {limit:.0f}ms")
+
+    loaded = loaded_lazy_modules("yx_cc.core.pr_reviewer")
+    print(f"\nHeavy modules loaded by importing the reviewer: {', '.join(loaded) or 'none'}")
+    if loaded:
+        failures.append(f"importing yx_cc.core.pr_reviewer loads {', '.join(loaded)}")
+
+    best_help = min(help_time() for _ in range(args.repeat))
+    help_limit = HELP_BUDGET_MS * args.scale
+    print(f"python -m yx_cc --help       {best_help:>8.1f}ms  (budget {help_limit:.0f}ms)  "
+          f"{'ok' if best_help <= help_limit else 'OVER BUDGET'}")
+    if best_help > help_limit:
+        failures.append(f"--help took {best_help:.1f}ms > {help_limit:.0f}ms")
+
+    if failures:
+        print("\nStartup budget exceeded:\n  " + "\n  ".join(failures))
+        return 1
+    print("\nStartup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Benchmark token counting on large diffs.
+
+Compares the previous per-call `tiktoken.encoding_for_model` + full encode with
+the cached encoder and the O(n) estimator used for budget decisions, and reports
+how far the estimate is from the exact count (the data behind the calibration
+constants in yx_cc.core.utils).
+
+Usage:
+    uv run python benchmarks/bench_token_counting.py [--sizes-kb 64 1024 4096] > bench_output.txt
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import tiktoken
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from yx_cc.core import utils  # noqa: E402
+
+# Each phase used to count the system and user prompt separately, in three phases
+COUNTS_PER_REVIEW = 6
+
+
+def build_diff_corpus(size_bytes: int) -> str:
+    """Build a unified-diff-like text of about size_bytes from the repo's own sources."""
+    sources = sorted(ROOT.glob("src/**/*.py")) + sorted(ROOT.glob("config/**/*.toml"))
+    files = []
+    for path in sources:
+        lines = path.read_text(encoding="utf-8").splitlines()
+        rel = path.relative_to(ROOT)
+        files.append(
+            f"--- a/{rel}\n+++ b/{rel}\n@@ -1,{len(lines)} +1,{len(lines)} @@\n"
+            + "\n".join("+" + line for line in lines)
+        )
+    corpus = "\n".join(files)
+    repeats = max(1, size_bytes // max(1, len(corpus.encode("utf-8"))) + 1)
+    return (corpus + "\n") * repeats
+
+
+def time_it(fn: Callable[[], object], repeat: int) -> float:
+    """Return the best wall time of fn over repeat runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def legacy_count(text: str) -> int:
+    encoding = tiktoken.encoding_for_model("gpt-4o")
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[64, 1024, 4096])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    try:
+        utils.get_encoding()
+        exact_available = True
+    except Exception as e:
+        print(f"tiktoken encoding unavailable ({type(e).__name__}); timing the estimator only")
+        exact_available = False
+
+    print(f"{'size':>8} {'legacy x6':>12} {'cached x6':>12} {'budget x6':>12} {'estimate':>10} {'exact':>9} {'est/exact':>9}")
+    for size_kb in args.sizes_kb:
+        text = build_diff_corpus(size_kb * 1024)[: size_kb * 1024]
+        budget = 50000
+        estimate_ms = time_it(lambda: utils.estimate_tokens(text), args.repeat)
+        budget_ms = time_it(
+            lambda: [utils.count_tokens_for_budget(text, budget) for _ in range(COUNTS_PER_REVIEW)], args.repeat
+        ) if exact_available else estimate_ms * COUNTS_PER_REVIEW
+
+        if exact_available:
+            legacy_ms = time_it(lambda: [legacy_count(text) for _ in range(COUNTS_PER_REVIEW)], args.repeat)
+            cached_ms = time_it(
+                lambda: [utils.num_tokens_from_string(text) for _ in range(COUNTS_PER_REVIEW)], args.repeat
+            )
+            exact = utils.num_tokens_from_string(text)
+            ratio = f"{utils.estimate_tokens(text) / exact:.3f}"
+            print(f"{size_kb:>6}KB {legacy_ms:>10.1f}ms {cached_ms:>10.1f}ms {budget_ms:>10.1f}ms "
+                  f"{estimate_ms:>8.2f}ms {exact:>9} {ratio:>9}")
+        else:
+            print(f"{size_kb:>6}KB {'-':>12} {'-':>12} {budget_ms:>10.1f}ms {estimate_ms:>8.2f}ms {'-':>9} {'-':>9}")
+
+    if exact_available:
+        # Calibration data: ASCII code and CJK prose measured separately
+        code = build_diff_corpus(256 * 1024).encode("ascii", "ignore").decode("ascii")
+        cjk = "代码审查需要关注边界条件、并发安全和错误处理。" * 2000
+        print(f"\nASCII chars/token: {len(code) / utils.num_tokens_from_string(code):.2f} "
+              f"(ASCII_CHARS_PER_TOKEN={utils.ASCII_CHARS_PER_TOKEN})")
+        print(f"Non-ASCII tokens/char: {utils.num_tokens_from_string(cjk) / len(cjk):.2f} "
+              f"(NON_ASCII_TOKENS_PER_CHAR={utils.NON_ASCII_TOKENS_PER_CHAR})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
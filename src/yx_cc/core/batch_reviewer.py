@@ -0,0 +1,117 @@
+"""Concurrent review of many PRs through a bounded worker pool."""
+
+import asyncio
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+from loguru import logger
+
+from .pr_reviewer import PRReviewer
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one PR in a batch."""
+    pr_id: int
+    status: str  # review status ('completed', 'no_changes', ...) or 'failed'
+    duration: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchSummary:
+    """Outcome of a whole batch, in the order the PRs were requested."""
+    items: List[BatchItemResult] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def failed(self) -> List[BatchItemResult]:
+        return [item for item in self.items if item.status == 'failed']
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': len(self.items),
+            'failed': len(self.failed),
+            'duration': round(self.duration, 3),
+            'items': [{'pr_id': item.pr_id, 'status': item.status, 'duration': round(item.duration, 3),
+                       'error': item.error} for item in self.items],
+        }
+
+
+class BatchReviewer:
+    """Reviews a list of PRs concurrently, each with its own PRReviewer state.
+
+    Every PR gets a reviewer spawned from one base reviewer, so the YunXiao client
+    (and its connection pool and response cache), the LLM runner, the LLM cache
+    and the tokenizer are shared while phase comment tracking stays per PR. A
+    failing PR is recorded and does not stop the rest of the batch.
+    """
+
+    def __init__(self, reviewer: PRReviewer, concurrency: int = 4):
+        """Initialize the batch reviewer.
+
+        Args:
+            reviewer: Base reviewer whose clients and configuration are shared
+            concurrency: Maximum number of PRs reviewed at the same time
+        """
+        self.reviewer = reviewer
+        self.concurrency = max(1, concurrency)
+
+    async def find_open_prs(self, target_branch: str) -> List[int]:
+        """Return the local IDs of all open PRs targeting target_branch."""
+        pr_ids = []
+        async with aclosing(self.reviewer.yunxiao_client.iter_pull_requests_async(state='opened')) as prs:
+            async for pr in prs:
+                if pr.get('targetBranch') == target_branch and pr.get('localId'):
+                    pr_ids.append(int(pr['localId']))
+        logger.info(f"Found {len(pr_ids)} open PRs targeting {target_branch}")
+        return pr_ids
+
+    async def run(self, pr_ids: Iterable[int], force_regenerate: bool = False) -> BatchSummary:
+        """Review the given PRs with at most `concurrency` reviews in flight.
+
+        Args:
+            pr_ids: PR local IDs to review (duplicates are reviewed once)
+            force_regenerate: Passed through to each review
+
+        Returns:
+            BatchSummary with one item per PR, in request order
+        """
+        pr_ids = list(dict.fromkeys(pr_ids))
+        start = time.monotonic()
+        results: Dict[int, BatchItemResult] = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        for pr_id in pr_ids:
+            queue.put_nowait(pr_id)
+
+        async def worker(worker_id: int):
+            while True:
+                try:
+                    pr_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[pr_id] = await self.review_one(pr_id, force_regenerate)
+                done = len(results)
+                logger.info(f"Batch progress: {done}/{len(pr_ids)} PRs reviewed (worker {worker_id})")
+
+        workers = min(self.concurrency, len(pr_ids))
+        logger.info(f"Reviewing {len(pr_ids)} PRs with {workers} workers")
+        await asyncio.gather(*(worker(i) for i in range(workers)))
+
+        summary = BatchSummary(items=[results[pr_id] for pr_id in pr_ids], duration=time.monotonic() - start)
+        logger.info(f"Batch finished in {summary.duration:.1f}s: "
+                    f"{len(summary.items) - len(summary.failed)} succeeded, {len(summary.failed)} failed")
+        return summary
+
+    async def review_one(self, pr_id: int, force_regenerate: bool = False) -> BatchItemResult:
+        """Review one PR with a freshly spawned reviewer, recording failures instead of raising."""
+        start = time.monotonic()
+        try:
+            result = await self.reviewer.spawn().review_specific_pr(pr_id, force_regenerate)
+            return BatchItemResult(pr_id=pr_id, status=result.get('status', 'completed'),
+                                   duration=time.monotonic() - start, result=result)
+        except Exception as e:
+            logger.error(f"Batch review of PR #{pr_id} failed: {e}")
+            return BatchItemResult(pr_id=pr_id, status='failed', duration=time.monotonic() - start, error=str(e))
@@ -0,0 +1,249 @@
+"""Per-run snapshot of a PR's comments, indexed for review lookups."""
+
+import difflib
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+# Matches the "**<Phase Name> Complete**" marker written by the phase result comments
+_PHASE_MARKER_RE = re.compile(r"\*\*([^*\n]+?) Complete\*\*")
+# Inline comments posted by the reviewer start with "**<label>**: "
+_BOT_INLINE_RE = re.compile(r"^\*\*[^*\n]+\*\*: ")
+# Phase progress comments only the reviewer writes; their author identifies the bot account
+_BOT_PHASE_RE = re.compile(r"^(?:🔄 \*\*Review Phase Started\*\*|✅ \*\*[^*\n]+ Complete\*\*)")
+_MARKDOWN_NOISE_RE = re.compile(r"[*_`>#]+")
+
+# Existing comments this many lines away still count as the same location
+NEAR_LINE_DISTANCE = 3
+
+
+def normalize_comment_content(content: str) -> str:
+    """Reduce an inline comment to the text that identifies it: no label prefix, markdown or case."""
+    text = _BOT_INLINE_RE.sub('', (content or '').strip(), count=1)
+    return ' '.join(_MARKDOWN_NOISE_RE.sub('', text).lower().split())
+
+
+def comment_author_id(comment: Dict[str, Any]) -> Optional[str]:
+    """Return the YunXiao user ID of a comment's author, if the comment carries one."""
+    author = comment.get('author')
+    user_id = author.get('userId') if isinstance(author, dict) else None
+    return str(user_id) if user_id else None
+
+
+def comment_fingerprint(file_path: str, line: Any, content: str) -> str:
+    """Fingerprint of an inline comment: file, line and a hash of its normalised content."""
+    key = f"{(file_path or '').lstrip('/')}\n{line}\n{normalize_comment_content(content)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+
+
+@dataclass
+class InlineCommentRecord:
+    """An inline comment the reviewer posted earlier, as found on the PR."""
+    comment_biz_id: Optional[str]
+    file: str
+    line: Optional[int]
+    normalized: str
+    fingerprint: str
+
+
+class PRCommentIndex:
+    """Snapshot of all comments on a PR, built from a single ListMergeRequestComments call.
+
+    Comments are indexed by comment type, phase marker, patchset version and file
+    path so the review phases can share one download instead of each listing the
+    comments again.
+    """
+
+    def __init__(self, pr_local_id: int, comments: List[Dict[str, Any]]):
+        """Build the indexes from a raw comment list."""
+        self.pr_local_id = pr_local_id
+        self.comments = [c for c in (comments or []) if isinstance(c, dict) and not c.get('is_deleted')]
+        self.by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_phase: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_patchset_version: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_file: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+        for comment in self.comments:
+            self.by_type[comment.get('comment_type', '')].append(comment)
+
+            content = comment.get('content') or ''
+            for phase_name in _PHASE_MARKER_RE.findall(content):
+                self.by_phase[phase_name].append(comment)
+
+            patch_set = comment.get('related_patchset') or {}
+            version_no = patch_set.get('versionNo')
+            if version_no is not None:
+                self.by_patchset_version[version_no].append(comment)
+
+            file_path = comment.get('filePath') or comment.get('file_path')
+            if file_path:
+                self.by_file[file_path.lstrip('/')].append(comment)
+
+        # Set when we create or delete a comment; the next lookup refetches the snapshot.
+        # Edits of our own comments are applied in place with update_content()
+        self.stale = False
+        self._bot_inline: Dict[str, Dict[str, List[InlineCommentRecord]]] = {}
+
+    @classmethod
+    async def fetch(cls, yunxiao_client, pr_local_id: int) -> "PRCommentIndex":
+        """Download all comments for a PR once and index them."""
+        comments = await yunxiao_client.list_merge_request_comments_async(pr_local_id)
+        index = cls(pr_local_id, comments if isinstance(comments, list) else [])
+        logger.debug(
+            f"Indexed {len(index.comments)} comments for PR #{pr_local_id} "
+            f"({len(index.by_phase)} phase markers, {len(index.by_file)} files)"
+        )
+        return index
+
+    def update_content(self, comment_biz_id: str, content: str) -> bool:
+        """Apply an edit we made to a comment to the snapshot instead of refetching it.
+
+        Only the content and the phase markers derived from it can change; the
+        comment's type, patchset and file stay put. Returns False if the comment
+        is not in the snapshot.
+        """
+        for comment in self.comments:
+            if comment.get('comment_biz_id') == comment_biz_id:
+                break
+        else:
+            return False
+
+        for phase_name in _PHASE_MARKER_RE.findall(comment.get('content') or ''):
+            phase_comments = self.by_phase[phase_name]
+            if comment in phase_comments:
+                phase_comments.remove(comment)
+        comment['content'] = content
+        for phase_name in _PHASE_MARKER_RE.findall(content):
+            self.by_phase[phase_name].append(comment)
+        self._bot_inline.clear()
+        return True
+
+    def phase_result(self, phase_name: str) -> Optional[str]:
+        """Return the content after the first '**<phase_name> Complete**' global comment marker."""
+        phase_marker = f"**{phase_name} Complete**"
+        for comment in self.by_phase.get(phase_name, []):
+            if comment.get('comment_type') != 'GLOBAL_COMMENT':
+                continue
+
+            # Extract the content after the phase marker
+            result_lines = []
+            found_marker = False
+            for line in (comment.get('content') or '').split('\n'):
+                if phase_marker in line:
+                    found_marker = True
+                    continue
+                if found_marker and line.strip():
+                    result_lines.append(line)
+
+            if result_lines:
+                return '\n'.join(result_lines).strip()
+        return None
+
+    def last_reviewed_commit(self) -> Tuple[Optional[str], int]:
+        """Return (commit_id, version_no) of the newest patchset any comment refers to."""
+        for version_no in sorted(self.by_patchset_version, reverse=True):
+            for comment in self.by_patchset_version[version_no]:
+                commit_id = comment['related_patchset'].get('commitId')
+                if commit_id:
+                    return commit_id, version_no
+        return None, -1
+
+    def comments_for_file(self, file_path: str, comment_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return comments on a file, optionally filtered by comment type."""
+        comments = self.by_file.get(file_path.lstrip('/'), [])
+        if comment_type:
+            return [c for c in comments if c.get('comment_type') == comment_type]
+        return list(comments)
+
+    def bot_user_id(self) -> Optional[str]:
+        """Infer the reviewer's account from the author of its phase progress comments."""
+        for comment in self.by_type.get('GLOBAL_COMMENT', []):
+            if _BOT_PHASE_RE.match(comment.get('content') or ''):
+                user_id = comment_author_id(comment)
+                if user_id:
+                    return user_id
+        return None
+
+    def bot_inline_comments(self, bot_user_id: Optional[str] = None) -> Dict[str, List[InlineCommentRecord]]:
+        """Return the reviewer's own inline comments by file, with their fingerprints.
+
+        Only comments written by the bot account are included, so other users'
+        comments are never matched, skipped against or edited.
+
+        Args:
+            bot_user_id: The reviewer's YunXiao user ID (None infers it with bot_user_id();
+                when it can't be determined, no comment counts as the reviewer's)
+        """
+        bot_user_id = bot_user_id or self.bot_user_id()
+        if not bot_user_id:
+            return {}
+        if bot_user_id not in self._bot_inline:
+            records: Dict[str, List[InlineCommentRecord]] = defaultdict(list)
+            for comment in self.by_type.get('INLINE_COMMENT', []):
+                content = comment.get('content') or ''
+                file_path = (comment.get('filePath') or comment.get('file_path') or '').lstrip('/')
+                if (not file_path or comment_author_id(comment) != bot_user_id
+                        or not _BOT_INLINE_RE.match(content)):
+                    continue
+                try:
+                    line = int(comment.get('line_number'))
+                except (TypeError, ValueError):
+                    line = None
+                records[file_path].append(InlineCommentRecord(
+                    comment_biz_id=comment.get('comment_biz_id'),
+                    file=file_path,
+                    line=line,
+                    normalized=normalize_comment_content(content),
+                    fingerprint=comment_fingerprint(file_path, line, content),
+                ))
+            self._bot_inline[bot_user_id] = records
+        return self._bot_inline[bot_user_id]
+
+    def find_inline_comment(self, file_path: str, fingerprint: str,
+                            bot_user_id: Optional[str] = None) -> Optional[InlineCommentRecord]:
+        """Return the reviewer's inline comment with exactly this fingerprint, if it is on the PR."""
+        for record in self.bot_inline_comments(bot_user_id).get((file_path or '').lstrip('/'), []):
+            if record.fingerprint == fingerprint:
+                return record
+        return None
+
+    def match_inline_comment(self, file_path: str, line: int, content: str, similarity: float = 0.8,
+                             bot_user_id: Optional[str] = None) -> Tuple[Optional[str], Optional[InlineCommentRecord]]:
+        """Find an earlier reviewer comment matching a new inline comment.
+
+        Args:
+            file_path: File the new comment is on
+            line: Its line number
+            content: Its full body as it would be posted
+            similarity: Minimum difflib ratio of normalised contents for a near-duplicate
+                (> 1 disables near-duplicate matching)
+            bot_user_id: The reviewer's YunXiao user ID (see bot_inline_comments)
+
+        Returns:
+            ('duplicate', record) for the same normalised content on the same file
+            and line (or within NEAR_LINE_DISTANCE lines), ('similar', record) for
+            the closest near-duplicate within NEAR_LINE_DISTANCE lines, or (None, None)
+        """
+        records = self.bot_inline_comments(bot_user_id).get((file_path or '').lstrip('/'), [])
+        fingerprint = comment_fingerprint(file_path, line, content)
+        for record in records:
+            if record.fingerprint == fingerprint:
+                return 'duplicate', record
+
+        normalized = normalize_comment_content(content)
+        best, best_ratio = None, similarity
+        for record in records:
+            if record.line is None or abs(record.line - line) > NEAR_LINE_DISTANCE:
+                continue
+            if record.normalized == normalized:
+                return 'duplicate', record
+            matcher = difflib.SequenceMatcher(None, normalized, record.normalized)
+            if similarity > 1 or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = record, ratio
+        return ('similar', best) if best is not None else (None, None)
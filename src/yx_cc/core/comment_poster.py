@@ -0,0 +1,313 @@
+"""Concurrent, rate-limited posting of inline review comments."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .comment_index import PRCommentIndex, comment_author_id, comment_fingerprint
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    acquire() consumes one token and waits until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        """Initialize the bucket.
+
+        Args:
+            rate: Refill rate in tokens per second (<= 0 disables limiting)
+            capacity: Maximum burst size (defaults to max(1, rate))
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+@dataclass
+class CommentPostResult:
+    """Outcome of posting a single inline comment."""
+    index: int
+    file: str
+    line: Any
+    status: str  # 'posted', 'updated', 'duplicate', 'failed' or 'skipped'
+    error: Optional[str] = None
+    comment_biz_id: Optional[str] = None
+
+
+@dataclass
+class PostingSummary:
+    """Per-comment outcome of an inline comment posting run."""
+    results: List[CommentPostResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def posted(self) -> int:
+        return sum(1 for r in self.results if r.status == 'posted')
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if r.status == 'failed')
+
+    @property
+    def skipped(self) -> int:
+        return sum(1 for r in self.results if r.status == 'skipped')
+
+    @property
+    def updated(self) -> int:
+        return sum(1 for r in self.results if r.status == 'updated')
+
+    @property
+    def duplicates(self) -> int:
+        return sum(1 for r in self.results if r.status == 'duplicate')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the summary for the review result JSON."""
+        return {
+            'posted': self.posted,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'updated': self.updated,
+            'duplicates': self.duplicates,
+            'elapsed': round(self.elapsed, 3),
+            'results': [asdict(r) for r in self.results]
+        }
+
+    def format_markdown(self) -> str:
+        """Format a short markdown report, listing any comments that were not posted."""
+        lines = [f"Posted {self.posted} inline comments ({self.failed} failed, {self.skipped} skipped) in {self.elapsed:.1f}s."]
+        if self.updated or self.duplicates:
+            lines.append(f"{self.duplicates} already on the PR, {self.updated} updated in place.")
+        problems = [r for r in self.results if r.status in ('failed', 'skipped')]
+        if problems:
+            lines.append("")
+            lines.append("| # | Location | Status | Reason |")
+            lines.append("|---|----------|--------|--------|")
+            for r in problems:
+                reason = (r.error or '').replace('|', '\\|').replace('\n', ' ')[:200]
+                lines.append(f"| {r.index} | `{r.file}:{r.line}` | {r.status} | {reason} |")
+        return "\n".join(lines)
+
+
+def parse_line_number(line: Any) -> Optional[int]:
+    """Parse a suggestion's line field, taking the first line of ranges like '22-30'."""
+    line_str = str(line).strip()
+    if '-' in line_str:
+        line_str = line_str.split('-')[0]
+    try:
+        return int(line_str)
+    except ValueError:
+        return None
+
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+class InlineCommentPoster:
+    """Posts inline comments with bounded concurrency and a shared rate limit.
+
+    Given the PR's comment index, comments the reviewer already posted (same
+    file, line and normalised content) are skipped, and near-duplicates are
+    updated in place instead of posted again. Only the bot account's comments
+    are matched, so other users' comments are never skipped against or edited.
+
+    Comment-creating POSTs are not retried by the client: YunXiao does not
+    honour idempotency keys, so a request that failed after the server stored
+    the comment would post it twice. Instead, failed posts get one more round
+    after a fresh comment listing, and only those whose fingerprint is still
+    missing from the PR are sent again.
+    """
+
+    def __init__(self, yunxiao_client, max_concurrency: int = 4, rate_per_second: float = 5.0,
+                 burst: Optional[int] = None, progress_callback: Optional[ProgressCallback] = None,
+                 progress_interval: int = 5, existing: Optional[PRCommentIndex] = None,
+                 similarity: float = 0.8, bot_user_id: Optional[str] = None, retry_failed: bool = True):
+        """Initialize the poster.
+
+        Args:
+            yunxiao_client: AliYunXiaoClient used for create_inline_comment_async
+            max_concurrency: Maximum number of requests in flight
+            rate_per_second: Sustained request rate (<= 0 disables rate limiting)
+            burst: Token bucket capacity (defaults to max_concurrency)
+            progress_callback: Awaitable called with (completed, total) as comments finish
+            progress_interval: Report progress every N completions (and on the last one)
+            existing: Snapshot of the PR's comments to de-duplicate against
+            similarity: Minimum content similarity for updating a near-duplicate in place
+                (> 1 only skips exact duplicates)
+            bot_user_id: The reviewer's YunXiao user ID (None infers it from the PR's comments
+                and learns it from the first posted comment)
+            retry_failed: Re-post failed comments once, after checking the PR doesn't have them
+        """
+        self.yunxiao_client = yunxiao_client
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = TokenBucket(rate_per_second, burst if burst is not None else self.max_concurrency)
+        self.progress_callback = progress_callback
+        self.progress_interval = max(1, progress_interval)
+        self.existing = existing
+        self.similarity = similarity
+        self.bot_user_id = bot_user_id
+        self.retry_failed = retry_failed
+
+    async def post_all(self, pr_local_id: int, comments: List[Dict[str, Any]],
+                       from_patch_set_id: str, to_patch_set_id: str) -> PostingSummary:
+        """Post all comments concurrently and return the per-comment outcome.
+
+        Results are returned in the original comment order regardless of the
+        order in which requests complete.
+        """
+        start = time.monotonic()
+        total = len(comments)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        progress_lock = asyncio.Lock()
+        completed = 0
+        reported = 0
+        # Fingerprints and existing comments claimed by this run, so repeats within it dedupe too
+        seen_fingerprints = set()
+        claimed_ids = set()
+        # Failed creates by comment index: (file path, line number, body, fingerprint)
+        failed_posts: Dict[int, Tuple[str, int, str, str]] = {}
+
+        async def report_progress() -> None:
+            nonlocal completed, reported
+            async with progress_lock:
+                completed += 1
+                done = completed
+                if not self.progress_callback:
+                    return
+                if done % self.progress_interval != 0 and done != total:
+                    return
+                if done <= reported:
+                    return
+                reported = done
+                try:
+                    await self.progress_callback(done, total)
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {e}")
+
+        async def post_one(index: int, comment: Dict[str, Any]) -> CommentPostResult:
+            file_path = comment.get('file')
+            line = comment.get('line')
+            try:
+                if not file_path or not line:
+                    logger.warning(f"Skipping comment {index}/{total} - missing file or line information: {comment}")
+                    return CommentPostResult(index, file_path or '', line, 'skipped', 'missing file or line information')
+
+                line_number = parse_line_number(line)
+                if line_number is None:
+                    logger.warning(f"Invalid line number format '{line}', skipping comment {index}/{total}")
+                    return CommentPostResult(index, file_path, line, 'skipped', f"invalid line number '{line}'")
+
+                body = f"**{comment.get('type', 'COMMENT')}**: {comment.get('content', '')}"
+                fingerprint = comment_fingerprint(file_path, line_number, body)
+                if fingerprint in seen_fingerprints:
+                    return CommentPostResult(index, file_path, line, 'duplicate', 'repeated in this review')
+                seen_fingerprints.add(fingerprint)
+
+                match, record = (None, None)
+                if self.existing is not None:
+                    match, record = self.existing.match_inline_comment(
+                        file_path, line_number, body, self.similarity, self.bot_user_id)
+                    if record is not None and record.comment_biz_id in claimed_ids:
+                        match, record = None, None
+                    elif record is not None:
+                        claimed_ids.add(record.comment_biz_id)
+                if match == 'duplicate':
+                    logger.debug(f"Comment {index}/{total} already on the PR at {file_path}:{line_number}")
+                    return CommentPostResult(index, file_path, line, 'duplicate', comment_biz_id=record.comment_biz_id)
+
+                updating = match == 'similar' and bool(record.comment_biz_id)
+                async with semaphore:
+                    await self.rate_limiter.acquire()
+                    try:
+                        if updating:
+                            logger.debug(f"Updating near-duplicate comment {index}/{total} at {file_path}:{line_number}")
+                            await self.yunxiao_client.update_pr_comment_async(
+                                pr_local_id, record.comment_biz_id, content=body)
+                            return CommentPostResult(index, file_path, line, 'updated',
+                                                     comment_biz_id=record.comment_biz_id)
+
+                        logger.debug(f"Posting inline comment {index}/{total}: {file_path}:{line_number}")
+                        return await self._create(pr_local_id, index, line, file_path, line_number, body,
+                                                  from_patch_set_id, to_patch_set_id)
+                    except Exception as e:
+                        logger.error(f"Failed to post inline comment for {file_path}:{line}: {e}")
+                        if not updating:
+                            failed_posts[index] = (file_path, line_number, body, fingerprint)
+                        return CommentPostResult(index, file_path, line, 'failed', str(e))
+            finally:
+                await report_progress()
+
+        results = list(await asyncio.gather(*(post_one(i, c) for i, c in enumerate(comments, 1))))
+        if failed_posts and self.retry_failed:
+            await self._retry_failed_posts(pr_local_id, results, failed_posts, from_patch_set_id, to_patch_set_id)
+        summary = PostingSummary(results=results, elapsed=time.monotonic() - start)
+        logger.info(
+            f"Inline comment posting finished for PR #{pr_local_id}: {summary.posted} posted, "
+            f"{summary.updated} updated, {summary.duplicates} duplicates, "
+            f"{summary.failed} failed, {summary.skipped} skipped in {summary.elapsed:.1f}s"
+        )
+        return summary
+
+    async def _create(self, pr_local_id: int, index: int, line: Any, file_path: str, line_number: int, body: str,
+                      from_patch_set_id: str, to_patch_set_id: str) -> CommentPostResult:
+        response = await self.yunxiao_client.create_inline_comment_async(
+            pr_local_id,
+            body,
+            file_path,
+            line_number,
+            from_patch_set_id,
+            to_patch_set_id
+        )
+        if not isinstance(response, dict):
+            return CommentPostResult(index, file_path, line, 'posted')
+        if self.bot_user_id is None:
+            self.bot_user_id = comment_author_id(response)
+        return CommentPostResult(index, file_path, line, 'posted', comment_biz_id=response.get('comment_biz_id'))
+
+    async def _retry_failed_posts(self, pr_local_id: int, results: List[CommentPostResult],
+                                  failed_posts: Dict[int, Tuple[str, int, str, str]],
+                                  from_patch_set_id: str, to_patch_set_id: str) -> None:
+        """Re-post failed comments once, skipping those the server stored despite the error."""
+        try:
+            fresh = await PRCommentIndex.fetch(self.yunxiao_client, pr_local_id)
+        except Exception as e:
+            logger.warning(f"Could not list comments to check {len(failed_posts)} failed posts, not retrying: {e}")
+            return
+        for index, (file_path, line_number, body, fingerprint) in sorted(failed_posts.items()):
+            line = results[index - 1].line
+            record = fresh.find_inline_comment(file_path, fingerprint, self.bot_user_id)
+            if record is not None:
+                logger.info(f"Inline comment {index} at {file_path}:{line_number} was stored despite the error")
+                results[index - 1] = CommentPostResult(index, file_path, line, 'posted',
+                                                       comment_biz_id=record.comment_biz_id)
+                continue
+            await self.rate_limiter.acquire()
+            try:
+                logger.debug(f"Retrying inline comment {index} at {file_path}:{line_number}")
+                results[index - 1] = await self._create(pr_local_id, index, line, file_path, line_number, body,
+                                                        from_patch_set_id, to_patch_set_id)
+            except Exception as e:
+                logger.error(f"Retry of inline comment for {file_path}:{line_number} failed: {e}")
+                results[index - 1] = CommentPostResult(index, file_path, line, 'failed', str(e))
@@ -0,0 +1,217 @@
+"""Token-budgeted diff chunking and reduction of per-chunk review results."""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from loguru import logger
+
+from .diff_model import DiffLine, FileDiff, Hunk, ParsedDiff, parse_diff
+from .utils import estimate_tokens
+
+TokenCounter = Callable[[str], int]
+DiffInput = Union[str, ParsedDiff]
+
+
+def _as_parsed(diff: DiffInput) -> ParsedDiff:
+    return diff if isinstance(diff, ParsedDiff) else parse_diff(diff)
+
+
+def _split_hunk(hunk: Hunk, header_tokens: int, token_budget: int,
+                count_tokens: TokenCounter) -> List[List[str]]:
+    """Split one oversized hunk into line runs, each with a recomputed @@ header."""
+    # Each piece gets its own @@ line, roughly the size of the original one
+    header_tokens += count_tokens(hunk.header) + 1
+
+    pieces: List[List[str]] = []
+    body: List[DiffLine] = []
+    body_tokens = 0
+    next_old, next_new = hunk.old_start, hunk.new_start
+
+    def flush():
+        nonlocal next_old, next_new
+        if not body:
+            return
+        old_count = sum(1 for line in body if line.kind in ('-', ' '))
+        new_count = sum(1 for line in body if line.kind in ('+', ' '))
+        pieces.append([f"@@ -{next_old},{old_count} +{next_new},{new_count} @@{hunk.section}"]
+                      + [line.text for line in body])
+        next_old += old_count
+        next_new += new_count
+
+    for line in hunk.lines:
+        line_tokens = count_tokens(line.text) + 1
+        if body and header_tokens + body_tokens + line_tokens > token_budget:
+            flush()
+            body, body_tokens = [], 0
+        body.append(line)
+        body_tokens += line_tokens
+    flush()
+    return pieces
+
+
+def _is_blank(file_diff: FileDiff) -> bool:
+    return not file_diff.hunks and not any(line.strip() for line in file_diff.header)
+
+
+def chunk_diff(diff: DiffInput, token_budget: int,
+               count_tokens: Optional[TokenCounter] = None) -> List[str]:
+    """Pack a diff into chunks of at most token_budget tokens.
+
+    Whole files are packed greedily in diff order. A file larger than the budget
+    is split at hunk boundaries with its header repeated in every piece, and a
+    single hunk larger than the budget is split into line runs with recomputed
+    @@ headers so line numbers stay correct.
+
+    Args:
+        diff: Unified diff text, or a ParsedDiff to reuse its per-file token counts
+        token_budget: Maximum tokens per chunk
+        count_tokens: Token counting function (defaults to the estimates gathered while parsing)
+
+    Returns:
+        List of diff chunks in original order
+    """
+    file_tokens = (lambda f: count_tokens(f.text())) if count_tokens else (lambda f: f.tokens)
+    hunk_tokens_of = (lambda h: count_tokens('\n'.join(h.raw_lines()))) if count_tokens else (lambda h: h.tokens)
+    count_tokens = count_tokens or estimate_tokens
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append('\n'.join(current))
+        current, current_tokens = [], 0
+
+    for file_diff in _as_parsed(diff):
+        if _is_blank(file_diff):
+            continue
+        tokens = file_tokens(file_diff) + 1
+        if current_tokens + tokens <= token_budget:
+            current.append(file_diff.text())
+            current_tokens += tokens
+            continue
+        flush()
+        if tokens <= token_budget:
+            current.append(file_diff.text())
+            current_tokens = tokens
+            continue
+
+        # File alone exceeds the budget: split along hunks, repeating the header
+        header_text = file_diff.header_text()
+        header_tokens = count_tokens(header_text) + 1
+        logger.debug(f"Splitting {file_diff.path} ({tokens} tokens) across chunks at hunk boundaries")
+        for hunk in file_diff.hunks:
+            hunk_tokens = hunk_tokens_of(hunk) + 1
+            if header_tokens + hunk_tokens <= token_budget:
+                parts = [(hunk.raw_lines(), hunk_tokens)]
+            else:
+                parts = [(piece, count_tokens('\n'.join(piece)) + 1)
+                         for piece in _split_hunk(hunk, header_tokens, token_budget, count_tokens)]
+            for part, part_tokens in parts:
+                if current and current_tokens + part_tokens > token_budget:
+                    flush()
+                if not current:
+                    current.append(header_text)
+                    current_tokens = header_tokens
+                current.append('\n'.join(part))
+                current_tokens += part_tokens
+        flush()
+
+    flush()
+    return chunks
+
+
+def fit_diff_to_budget(diff: DiffInput, token_budget: int,
+                       count_tokens: Optional[TokenCounter] = None) -> str:
+    """Keep whole files in diff order until the budget is used, listing the files left out."""
+    kept: List[str] = []
+    omitted: List[str] = []
+    used = 0
+    for file_diff in _as_parsed(diff):
+        if _is_blank(file_diff):
+            continue
+        tokens = (count_tokens(file_diff.text()) if count_tokens else file_diff.tokens) + 1
+        if not omitted and used + tokens <= token_budget:
+            kept.append(file_diff.text())
+            used += tokens
+        else:
+            omitted.append(file_diff.path)
+    if omitted:
+        kept.append(f"# Diff truncated to fit the token budget; {len(omitted)} more files changed: {', '.join(omitted)}")
+    return '\n'.join(kept)
+
+
+def _load_json(result: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def merge_analysis_results(results: List[str], weights: Optional[List[int]] = None) -> str:
+    """Reduce per-chunk analysis results into one review JSON with the same schema.
+
+    Key issues and TODO sections are concatenated, the score is averaged weighted
+    by chunk tokens, and the review effort is the maximum across chunks.
+    """
+    weights = weights or [1] * len(results)
+    key_issues: List[Any] = []
+    todo_sections: List[Any] = []
+    weighted_scores: List[Tuple[float, int]] = []
+    effort = None
+
+    parsed = 0
+    for result, weight in zip(results, weights):
+        data = _load_json(result)
+        if data is None:
+            logger.warning("Skipping unparseable chunk analysis result")
+            continue
+        parsed += 1
+        review = data.get('review', data)
+        key_issues.extend(review.get('key_issues_to_review') or [])
+        todos = review.get('todo_sections')
+        if isinstance(todos, list):
+            todo_sections.extend(todos)
+        if isinstance(review.get('score'), (int, float)):
+            weighted_scores.append((review['score'], weight))
+        if isinstance(review.get('estimated_effort_to_review'), (int, float)):
+            effort = max(effort or 0, review['estimated_effort_to_review'])
+
+    if parsed == 0:
+        return '\n\n'.join(results)
+
+    merged: Dict[str, Any] = {'key_issues_to_review': key_issues}
+    if weighted_scores:
+        total_weight = sum(w for _, w in weighted_scores) or 1
+        merged['score'] = round(sum(s * w for s, w in weighted_scores) / total_weight)
+    if effort is not None:
+        merged['estimated_effort_to_review'] = effort
+    merged['todo_sections'] = todo_sections or 'No'
+    return json.dumps({'review': merged}, ensure_ascii=False, indent=2)
+
+
+def merge_comment_results(results: List[str]) -> str:
+    """Reduce per-chunk comment results into one code_suggestions JSON, dropping duplicates."""
+    suggestions: List[Dict[str, Any]] = []
+    seen = set()
+    parsed = 0
+    for result in results:
+        data = _load_json(result)
+        if data is None:
+            logger.warning("Skipping unparseable chunk comment result")
+            continue
+        parsed += 1
+        for suggestion in data.get('code_suggestions') or []:
+            if not isinstance(suggestion, dict):
+                continue
+            key = (suggestion.get('relevant_file'), str(suggestion.get('line_number')),
+                   suggestion.get('one_sentence_summary'))
+            if key in seen:
+                continue
+            seen.add(key)
+            suggestions.append(suggestion)
+
+    if parsed == 0:
+        return '\n\n'.join(results)
+    return json.dumps({'code_suggestions': suggestions}, ensure_ascii=False, indent=2)
@@ -0,0 +1,209 @@
+"""Diff filtering and risk ranking: decide which changed files go into the review prompts."""
+
+import math
+import posixpath
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .diff_model import DELETED, FileDiff, ParsedDiff
+
+# Dependency lockfiles, matched by file name
+LOCKFILE_NAMES = frozenset({
+    'uv.lock', 'poetry.lock', 'pdm.lock', 'Pipfile.lock', 'package-lock.json', 'npm-shrinkwrap.json',
+    'yarn.lock', 'pnpm-lock.yaml', 'bun.lockb', 'Cargo.lock', 'go.sum', 'composer.lock', 'Gemfile.lock',
+    'Podfile.lock', 'mix.lock', 'packages.lock.json', 'flake.lock', 'pubspec.lock',
+})
+
+# Always ignored: vendored dependencies, build output, minified and generated assets
+DEFAULT_IGNORE_GLOBS = (
+    'vendor/**', '**/vendor/**', 'node_modules/**', '**/node_modules/**', 'third_party/**',
+    'dist/**', 'build/**', '*.min.js', '*.min.css', '*.map', '*_pb2.py', '*_pb2_grpc.py', '*.pb.go',
+    '*.generated.*', '*.snap',
+)
+
+# Markers that code generators put near the top of a file
+GENERATED_MARKERS = ('@generated', 'DO NOT EDIT', 'Code generated by', 'auto-generated', 'autogenerated')
+GENERATED_SCAN_LINES = 10
+
+# Added lines longer than this on average mean minified or data content
+MINIFIED_AVG_LINE_CHARS = 300
+MINIFIED_MIN_CHARS = 2000
+
+TEST_DIRS = ('test', 'tests', '__tests__', 'spec', 'testing')
+# Test file naming conventions, matched case-sensitively against the file name
+TEST_FILE_GLOBS = (
+    'test_*.py', '*_test.py', '*_test.go', '*.test.[jt]s', '*.test.[jt]sx', '*.spec.[jt]s', '*.spec.[jt]sx',
+    '*Test.java', '*Tests.java', 'Test[A-Z]*.java',
+)
+DOC_EXTENSIONS = ('.md', '.rst', '.txt', '.adoc')
+CONFIG_EXTENSIONS = ('.toml', '.yaml', '.yml', '.json', '.ini', '.cfg', '.conf', '.xml', '.gradle')
+
+# Risk weight per file category: source changes matter most, docs least
+CATEGORY_WEIGHTS = {'source': 3.0, 'config': 2.0, 'test': 1.5, 'docs': 1.0}
+
+
+def _glob_matches(path: str, pattern: str) -> bool:
+    """Match a gitignore-style glob: patterns without '/' match the file name anywhere."""
+    if '/' not in pattern:
+        return fnmatchcase(posixpath.basename(path), pattern)
+    if pattern.startswith('**/'):
+        # '**/x' also matches 'x' at the top level
+        return fnmatchcase(path, pattern) or fnmatchcase(path, pattern[3:])
+    return fnmatchcase(path, pattern)
+
+
+def classify_file(path: str) -> str:
+    """Return the file's category: 'test', 'docs', 'config' or 'source'."""
+    name = posixpath.basename(path)
+    lower = name.lower()
+    parts = path.lower().split('/')[:-1]
+    if any(part in TEST_DIRS for part in parts) or any(fnmatchcase(name, glob) for glob in TEST_FILE_GLOBS):
+        return 'test'
+    if lower.endswith(DOC_EXTENSIONS) or 'docs' in parts or lower in ('license', 'changelog', 'authors'):
+        return 'docs'
+    if lower.endswith(CONFIG_EXTENSIONS) or lower in ('dockerfile', 'makefile') or lower.startswith('.'):
+        return 'config'
+    return 'source'
+
+
+def risk_score(file_diff: FileDiff, category: str) -> float:
+    """Heuristic review priority: the category weight scaled by log churn."""
+    churn = file_diff.additions + file_diff.deletions
+    score = CATEGORY_WEIGHTS.get(category, 1.0) * (1.0 + math.log1p(churn))
+    # Deletions carry less risk than new or changed code
+    return score * 0.5 if file_diff.status == DELETED else score
+
+
+@dataclass
+class ExcludedFile:
+    """A changed file left out of the review prompts."""
+    path: str
+    reason: str
+    tokens: int
+
+
+@dataclass
+class FilterResult:
+    """Outcome of filtering a diff: the admitted files in priority order and the rest."""
+    diff: ParsedDiff
+    excluded: List[ExcludedFile] = field(default_factory=list)
+    tokens: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'included': [f.path for f in self.diff],
+            'included_tokens': self.tokens,
+            'excluded': [{'path': e.path, 'reason': e.reason, 'tokens': e.tokens} for e in self.excluded],
+        }
+
+    def format_markdown(self, limit: int = 30) -> str:
+        """List the excluded files for a PR comment (empty when nothing was excluded)."""
+        if not self.excluded:
+            return ''
+        lines = [f"- `{e.path}` ({e.reason})" for e in self.excluded[:limit]]
+        if len(self.excluded) > limit:
+            lines.append(f"- ... and {len(self.excluded) - limit} more")
+        return '\n'.join(lines)
+
+
+class DiffFilter:
+    """Drops files that are not worth reviewing and ranks the rest by risk.
+
+    Files are excluded when they match an ignore glob, are lockfiles, binary,
+    minified or generated. The remaining files are ordered by risk_score and
+    admitted until the token budget is used; files that don't fit are skipped
+    so smaller, lower-ranked files can still get in.
+    """
+
+    def __init__(self, ignore_globs: Iterable[str] = (), token_budget: int = 0, detect_generated: bool = True):
+        """Initialize the filter.
+
+        Args:
+            ignore_globs: Extra globs to exclude, on top of DEFAULT_IGNORE_GLOBS
+            token_budget: Maximum diff tokens admitted across all files (0 means unlimited)
+            detect_generated: Apply the built-in lockfile, binary, minified and generated detectors
+        """
+        self.detect_generated = detect_generated
+        self.ignore_globs = tuple(ignore_globs) + (DEFAULT_IGNORE_GLOBS if detect_generated else ())
+        self.token_budget = token_budget
+
+    @classmethod
+    def parse_globs(cls, value: Optional[str]) -> List[str]:
+        """Split a comma- or newline-separated glob list (e.g. YX_CC_DIFF_IGNORE)."""
+        if not value:
+            return []
+        return [g.strip() for g in value.replace('\n', ',').split(',') if g.strip()]
+
+    def exclusion_reason(self, file_diff: FileDiff) -> Optional[str]:
+        """Return why the file should not be reviewed, or None to keep it."""
+        path = file_diff.path
+        for pattern in self.ignore_globs:
+            if _glob_matches(path, pattern):
+                return f"matches {pattern}"
+        if not self.detect_generated:
+            return None
+        if posixpath.basename(path) in LOCKFILE_NAMES:
+            return 'lockfile'
+        if file_diff.is_binary:
+            return 'binary'
+
+        added_chars = file_diff.added_chars
+        if added_chars > MINIFIED_MIN_CHARS and added_chars / file_diff.additions > MINIFIED_AVG_LINE_CHARS:
+            return 'minified'
+        # Generator banners sit at the top of the file, so only a hunk starting at line 1 can show one
+        if file_diff.hunks and file_diff.hunks[0].new_start <= 1:
+            head = [line.text for line in file_diff.hunks[0].lines[:GENERATED_SCAN_LINES] if line.kind != '-']
+            if any(marker in text for text in head for marker in GENERATED_MARKERS):
+                return 'generated'
+        return None
+
+    def apply(self, diff: ParsedDiff) -> FilterResult:
+        """Filter and rank a parsed diff.
+
+        Returns:
+            FilterResult whose diff holds the admitted files, highest risk first
+        """
+        admitted, excluded, used = self.select(diff.files)
+        positions = {id(f): index for index, f in enumerate(diff)}
+        order = [positions[id(f)] for f in admitted]
+        if not excluded and order == sorted(order):
+            # Already in priority order: keep the original text
+            return FilterResult(diff=diff, tokens=used)
+        filtered = ParsedDiff(admitted)
+        filtered.source = filtered.text()
+        return FilterResult(diff=filtered, excluded=excluded, tokens=used)
+
+    def select(self, files: Iterable[FileDiff]) -> Tuple[List[FileDiff], List[ExcludedFile], int]:
+        """Decide which files are reviewed: exclusions first, then risk order within the token budget.
+
+        Only counts, headers and the head of the first hunk are used, so the
+        files may come from a DiffParser(head_lines=GENERATED_SCAN_LINES) pass.
+
+        Returns:
+            (admitted files, highest risk first; excluded files; admitted tokens)
+        """
+        excluded: List[ExcludedFile] = []
+        candidates: List[Tuple[float, int, FileDiff]] = []
+        for index, file_diff in enumerate(files):
+            if not file_diff.hunks and not any(line.strip() for line in file_diff.header):
+                continue
+            reason = self.exclusion_reason(file_diff)
+            if reason:
+                excluded.append(ExcludedFile(file_diff.path, reason, file_diff.tokens))
+            else:
+                candidates.append((risk_score(file_diff, classify_file(file_diff.path)), index, file_diff))
+
+        # Highest risk first; equal scores keep diff order
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        admitted: List[FileDiff] = []
+        used = 0
+        for _, _, file_diff in candidates:
+            tokens = file_diff.tokens + 1
+            # The top-ranked file is always admitted; an oversized one is chunked later
+            if self.token_budget and admitted and used + tokens > self.token_budget:
+                excluded.append(ExcludedFile(file_diff.path, 'over token budget', file_diff.tokens))
+                continue
+            admitted.append(file_diff)
+            used += tokens
+        return admitted, excluded, used
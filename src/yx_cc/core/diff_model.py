@@ -0,0 +1,369 @@
+"""Structured unified diff: files, hunks and lines with line numbers, built in one streaming pass."""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .utils import estimate_tokens_from_counts
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+
+# File status values
+ADDED = 'added'
+DELETED = 'deleted'
+MODIFIED = 'modified'
+RENAMED = 'renamed'
+COPIED = 'copied'
+
+
+def _char_counts(line: str):
+    """Return (ascii, non-ASCII) character counts of a line, plus one for its newline."""
+    if line.isascii():
+        return len(line) + 1, 0
+    ascii_chars = len(line.encode('ascii', 'ignore'))
+    return ascii_chars + 1, len(line) - ascii_chars
+
+
+def _strip_path(path: str, prefix: str) -> Optional[str]:
+    path = path.split('\t', 1)[0].strip()
+    if path == '/dev/null':
+        return None
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1]
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+class DiffLine:
+    """One hunk line: kind is '+', '-', ' ', '\\' (no-newline marker) or '' (text after
+    the hunk body, such as a blank separator). A missing line number is None."""
+    __slots__ = ('kind', 'old_no', 'new_no', 'text')
+
+    def __init__(self, kind: str, old_no: Optional[int], new_no: Optional[int], text: str):
+        self.kind = kind
+        self.old_no = old_no
+        self.new_no = new_no
+        self.text = text  # Raw line including the prefix character
+
+    def __repr__(self) -> str:
+        return f"DiffLine({self.kind!r}, {self.old_no}, {self.new_no}, {self.text!r})"
+
+
+class Hunk:
+    """One @@ hunk with its lines."""
+    __slots__ = ('header', 'old_start', 'old_count', 'new_start', 'new_count', 'section',
+                 'lines', 'ascii_chars', 'non_ascii_chars')
+
+    def __init__(self, header: str, old_start: int, old_count: int, new_start: int, new_count: int, section: str):
+        self.header = header
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self.section = section  # Text after the closing @@ (e.g. the enclosing function)
+        self.lines: List[DiffLine] = []
+        self.ascii_chars, self.non_ascii_chars = _char_counts(header)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the hunk text, from character counts gathered while parsing."""
+        return estimate_tokens_from_counts(self.ascii_chars, self.non_ascii_chars)
+
+    def raw_lines(self) -> List[str]:
+        return [self.header] + [line.text for line in self.lines]
+
+
+class FileDiff:
+    """One file's part of the diff: header lines, status flags and hunks."""
+    __slots__ = ('header', 'hunks', 'old_path', 'new_path', 'status', 'is_binary', 'similarity',
+                 'additions', 'deletions', 'added_chars', 'ascii_chars', 'non_ascii_chars', 'offset', '_new_lines')
+
+    def __init__(self):
+        self.header: List[str] = []
+        self.hunks: List[Hunk] = []
+        self.old_path: Optional[str] = None
+        self.new_path: Optional[str] = None
+        self.status = MODIFIED
+        self.is_binary = False
+        self.similarity: Optional[int] = None
+        self.additions = 0
+        self.deletions = 0
+        self.added_chars = 0  # Characters of the added lines, prefixes included
+        self.ascii_chars = 0
+        self.non_ascii_chars = 0
+        self.offset: Optional[int] = None  # Position of the file's first line, when fed with offsets
+        self._new_lines: Optional[Dict[int, DiffLine]] = None
+
+    @property
+    def path(self) -> str:
+        """Path after the change (before it, for deleted files)."""
+        return self.new_path or self.old_path or 'unknown'
+
+    @property
+    def is_rename(self) -> bool:
+        return self.status == RENAMED
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the file's diff text, without re-scanning it."""
+        return estimate_tokens_from_counts(self.ascii_chars, self.non_ascii_chars)
+
+    def header_text(self) -> str:
+        return '\n'.join(self.header)
+
+    def text(self) -> str:
+        return '\n'.join(self.header + [line for hunk in self.hunks for line in hunk.raw_lines()])
+
+    def new_line(self, line_no: int) -> Optional[DiffLine]:
+        """Return the added or context line shown at line_no of the new file, if it is in a hunk."""
+        if self._new_lines is None:
+            self._new_lines = {line.new_no: line for hunk in self.hunks for line in hunk.lines
+                               if line.new_no is not None}
+        return self._new_lines.get(line_no)
+
+    def __repr__(self) -> str:
+        return (f"FileDiff({self.path!r}, {self.status}, +{self.additions} -{self.deletions}, "
+                f"{len(self.hunks)} hunks{', binary' if self.is_binary else ''})")
+
+
+class ParsedDiff:
+    """A parsed unified diff: its files in order, indexed by path."""
+    __slots__ = ('files', 'source', '_by_path')
+
+    def __init__(self, files: List[FileDiff], source: Optional[str] = None):
+        self.files = files
+        self.source = source  # The text this was parsed from, when parsed from a string
+        self._by_path: Optional[Dict[str, FileDiff]] = None
+
+    def __iter__(self) -> Iterator[FileDiff]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def tokens(self) -> int:
+        return sum(f.tokens for f in self.files)
+
+    def file(self, path: str) -> Optional[FileDiff]:
+        """Look a file up by its new or old path."""
+        if self._by_path is None:
+            self._by_path = {}
+            for f in self.files:
+                for p in (f.old_path, f.new_path):
+                    if p:
+                        self._by_path.setdefault(p, f)
+        return self._by_path.get(path)
+
+    def text(self) -> str:
+        return self.source if self.source is not None else '\n'.join(f.text() for f in self.files)
+
+
+class DiffParser:
+    """Incremental unified diff parser: feed() lines in order, then close().
+
+    Accepts git diffs (starting with 'diff --git') and the YunXiao compare format,
+    where each file starts directly at its '---' line. Hunk line counts are
+    tracked, so removed lines like '--- x' are never mistaken for a new file.
+    """
+
+    def __init__(self, head_lines: Optional[int] = None):
+        """Initialize the parser.
+
+        Args:
+            head_lines: Keep only this many lines of each file's first hunk (None keeps all).
+                Counts, statistics and token estimates still cover every line.
+        """
+        self.head_lines = head_lines
+        self.files: List[FileDiff] = []
+        self._file: Optional[FileDiff] = None
+        self._hunk: Optional[Hunk] = None
+        self._old_left = self._new_left = 0
+        self._old_no = self._new_no = 0
+        self._pending_minus: Optional[str] = None  # '---' line waiting to see if '+++' follows
+        self._pending_offset: Optional[int] = None
+        self._offset: Optional[int] = None  # Offset of the line being parsed
+
+    def feed(self, line: str, offset: Optional[int] = None) -> None:
+        """Parse one line (without its trailing newline).
+
+        Args:
+            line: The line
+            offset: Its position in the source; a file records the offset of its first line
+        """
+        if self._pending_minus is not None:
+            minus, self._pending_minus = self._pending_minus, None
+            self._offset = self._pending_offset
+            if line.startswith('+++ '):
+                if self._starts_new_file():
+                    self._start_file()
+                self._header_line(minus)
+                self._header_line(line)
+                return
+            self._outside_hunk(minus)
+
+        self._offset = offset
+
+        if self._old_left > 0 or self._new_left > 0:
+            self._hunk_line(line)
+            return
+        if line.startswith('--- '):
+            self._pending_minus = line
+            self._pending_offset = offset
+            return
+        self._outside_hunk(line)
+
+    def feed_text(self, text: str) -> None:
+        for line in text.split('\n'):
+            self.feed(line)
+
+    def close(self, source: Optional[str] = None) -> ParsedDiff:
+        """Finish parsing and return the diff."""
+        if self._pending_minus is not None:
+            self._offset = self._pending_offset
+            self._outside_hunk(self._pending_minus)
+            self._pending_minus = None
+        return ParsedDiff(self.files, source)
+
+    def _starts_new_file(self) -> bool:
+        # Don't split a git header from its ---/+++ lines
+        current = self._file
+        return current is None or bool(current.hunks) or not any(h.startswith('diff --git ') for h in current.header)
+
+    def _start_file(self) -> FileDiff:
+        self._file = FileDiff()
+        self._file.offset = self._offset
+        self._hunk = None
+        self.files.append(self._file)
+        return self._file
+
+    def _count(self, target, line: str) -> None:
+        ascii_chars, non_ascii = _char_counts(line)
+        target.ascii_chars += ascii_chars
+        target.non_ascii_chars += non_ascii
+
+    def _outside_hunk(self, line: str) -> None:
+        if line.startswith('diff --git '):
+            self._start_file()
+            self._header_line(line)
+            return
+        if self._file is None:
+            self._start_file()
+
+        match = HUNK_HEADER_RE.match(line)
+        if match:
+            old_count = int(match.group(2)) if match.group(2) is not None else 1
+            new_count = int(match.group(4)) if match.group(4) is not None else 1
+            hunk = Hunk(line, int(match.group(1)), old_count, int(match.group(3)), new_count, match.group(5))
+            self._file.hunks.append(hunk)
+            self._hunk = hunk
+            self._file.ascii_chars += hunk.ascii_chars
+            self._file.non_ascii_chars += hunk.non_ascii_chars
+            self._old_left, self._new_left = old_count, new_count
+            self._old_no, self._new_no = hunk.old_start, hunk.new_start
+        elif self._hunk is not None:
+            # Text after a complete hunk (a '\ No newline' marker, blank separators) stays with it
+            self._append(DiffLine('\\' if line.startswith('\\') else '', None, None, line))
+        else:
+            self._header_line(line)
+
+    def _hunk_line(self, line: str) -> None:
+        f = self._file
+        kind = line[:1] or ' '
+        if kind == '-':
+            entry = DiffLine('-', self._old_no, None, line)
+            self._old_no += 1
+            self._old_left -= 1
+            f.deletions += 1
+        elif kind == '+':
+            entry = DiffLine('+', None, self._new_no, line)
+            self._new_no += 1
+            self._new_left -= 1
+            f.additions += 1
+            f.added_chars += len(line)
+        elif kind == '\\':
+            entry = DiffLine('\\', None, None, line)
+        else:
+            entry = DiffLine(' ', self._old_no, self._new_no, line)
+            self._old_no += 1
+            self._new_no += 1
+            self._old_left -= 1
+            self._new_left -= 1
+        self._append(entry)
+
+    def _append(self, entry: DiffLine) -> None:
+        hunk = self._hunk
+        if self.head_lines is None or (hunk is self._file.hunks[0] and len(hunk.lines) < self.head_lines):
+            hunk.lines.append(entry)
+        ascii_chars, non_ascii = _char_counts(entry.text)
+        self._hunk.ascii_chars += ascii_chars
+        self._hunk.non_ascii_chars += non_ascii
+        self._file.ascii_chars += ascii_chars
+        self._file.non_ascii_chars += non_ascii
+
+    def _header_line(self, line: str) -> None:
+        f = self._file
+        f.header.append(line)
+        self._count(f, line)
+
+        if line.startswith('diff --git '):
+            old, sep, new = line[len('diff --git '):].partition(' b/')
+            if sep:
+                f.old_path = _strip_path(old, 'a/')
+                f.new_path = new.strip()
+        elif line.startswith('--- '):
+            path = _strip_path(line[4:], 'a/')
+            if path is None:
+                f.status = ADDED
+                f.old_path = None
+            else:
+                f.old_path = path
+        elif line.startswith('+++ '):
+            path = _strip_path(line[4:], 'b/')
+            if path is None:
+                f.status = DELETED
+                f.new_path = None
+            else:
+                f.new_path = path
+        elif line.startswith('new file mode'):
+            f.status = ADDED
+            f.old_path = None
+        elif line.startswith('deleted file mode'):
+            f.status = DELETED
+            f.new_path = None
+        elif line.startswith('rename from '):
+            f.status = RENAMED
+            f.old_path = line[len('rename from '):].strip()
+        elif line.startswith('rename to '):
+            f.status = RENAMED
+            f.new_path = line[len('rename to '):].strip()
+        elif line.startswith('copy from '):
+            f.status = COPIED
+            f.old_path = line[len('copy from '):].strip()
+        elif line.startswith('copy to '):
+            f.status = COPIED
+            f.new_path = line[len('copy to '):].strip()
+        elif line.startswith('similarity index '):
+            try:
+                f.similarity = int(line[len('similarity index '):].rstrip('%'))
+            except ValueError:
+                pass
+        elif line.startswith('Binary files ') or line == 'GIT binary patch':
+            f.is_binary = True
+
+
+def parse_diff(diff: Union[str, Iterable[str]]) -> ParsedDiff:
+    """Parse a unified diff given as text or as an iterable of lines, in one pass.
+
+    Args:
+        diff: Diff text, or lines (trailing newlines are stripped), e.g. a
+            subprocess stdout or the per-file diffs of the compare API
+
+    Returns:
+        ParsedDiff; when parsed from text, its text() returns the original string
+    """
+    parser = DiffParser()
+    if isinstance(diff, str):
+        parser.feed_text(diff)
+        return parser.close(source=diff)
+    for line in diff:
+        parser.feed(line.rstrip('\r\n') if line.endswith('\n') else line)
+    return parser.close()
@@ -0,0 +1,210 @@
+"""Choosing between diff sources (local git, YunXiao compare API), with hedging and latency tracking."""
+
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+# yunxiao: API first, git on failure (the original behaviour)
+# local:   git first, API on failure
+# hedge:   race all sources, first non-empty result wins
+# auto:    fastest source by recorded latency first, the other started if it runs long
+POLICIES = ('yunxiao', 'local', 'hedge', 'auto')
+
+DiffFetcher = Callable[[], Awaitable[str]]
+
+
+@dataclass
+class SourceLatency:
+    """Latency record of one diff source."""
+    ewma: Optional[float] = None
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    last: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'ewma': round(self.ewma, 3) if self.ewma is not None else None,
+                'last': round(self.last, 3) if self.last is not None else None,
+                'successes': self.successes, 'failures': self.failures}
+
+
+class LatencyTracker:
+    """Exponentially weighted moving average of each source's fetch latency."""
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._sources: Dict[str, SourceLatency] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            stats = self._sources.setdefault(source, SourceLatency())
+            stats.last = elapsed
+            if not ok:
+                stats.failures += 1
+                stats.consecutive_failures += 1
+                return
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.ewma = elapsed if stats.ewma is None else self.alpha * elapsed + (1 - self.alpha) * stats.ewma
+
+    def expected(self, source: str) -> float:
+        """Expected latency in seconds: inf while unmeasured or after repeated failures."""
+        with self._lock:
+            stats = self._sources.get(source)
+            if stats is None or stats.ewma is None or stats.consecutive_failures >= 2:
+                return math.inf
+            return stats.ewma
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._sources.items()}
+
+
+_shared_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Return the process-wide tracker, so batch and server runs learn across reviews."""
+    return _shared_tracker
+
+
+def close_diff(result: Any) -> None:
+    """Release a diff nobody will use, e.g. close a losing source's DiffSpool."""
+    close = getattr(result, 'close', None)
+    if callable(close):
+        close()
+
+
+class DiffSourceSelector:
+    """Fetches a diff from the best available source according to a policy.
+
+    Sources run as tasks: sequential policies start the next source only when
+    the previous one fails or returns nothing, 'hedge' starts all of them at
+    once, and 'auto' starts the historically fastest source and hedges with the
+    next one after hedge_delay (default: twice the leader's average latency).
+    The first non-empty diff wins; the rest are cancelled and whatever they
+    still return is closed.
+    """
+
+    def __init__(self, policy: str = 'yunxiao', tracker: Optional[LatencyTracker] = None,
+                 hedge_delay: Optional[float] = None, preferred: str = 'git'):
+        """Initialize the selector.
+
+        Args:
+            policy: One of POLICIES
+            tracker: Latency tracker (defaults to the process-wide one)
+            hedge_delay: Seconds before 'auto' starts the backup source (None derives it from latency)
+            preferred: Source 'auto' tries first while no latency has been recorded
+
+        Raises:
+            ValueError: If policy is unknown
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown diff source policy '{policy}'; expected one of {POLICIES}")
+        self.policy = policy
+        self.tracker = tracker or get_latency_tracker()
+        self.hedge_delay = hedge_delay
+        self.preferred = preferred
+
+    def _plan(self, sources: Dict[str, DiffFetcher]) -> Tuple[List[str], Optional[float]]:
+        """Return the source order and the delay before starting each next source (None: on failure only)."""
+        names = list(sources)
+        if self.policy == 'yunxiao':
+            return sorted(names, key=lambda n: n != 'yunxiao'), None
+        if self.policy == 'local':
+            return sorted(names, key=lambda n: n != 'git'), None
+        if self.policy == 'hedge':
+            return names, 0.0
+
+        order = sorted(names, key=lambda n: (self.tracker.expected(n), n != self.preferred))
+        if self.hedge_delay is not None:
+            return order, self.hedge_delay
+        leader = self.tracker.expected(order[0])
+        return order, min(max(2 * leader, 0.2), 10.0) if math.isfinite(leader) else 2.0
+
+    async def _timed(self, name: str, fetch: DiffFetcher) -> str:
+        start = time.monotonic()
+        try:
+            diff = await fetch()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.tracker.record(name, time.monotonic() - start, ok=False)
+            raise
+        self.tracker.record(name, time.monotonic() - start, ok=True)
+        logger.debug(f"Diff source {name} answered in {time.monotonic() - start:.2f}s ({len(diff or '')} chars)")
+        return diff
+
+    async def fetch(self, sources: Dict[str, DiffFetcher]) -> Tuple[str, str]:
+        """Fetch a diff from the given sources.
+
+        Args:
+            sources: Source name ('git', 'yunxiao') -> coroutine function returning diff text
+
+        Returns:
+            (diff, source name); the diff is empty only when every source that
+            answered returned an empty diff
+
+        Raises:
+            Exception: The last source error when no source answered
+        """
+        order, delay = self._plan(sources)
+        waiting = list(order)
+        running: Dict[asyncio.Task, str] = {}
+        empty: Optional[Tuple[str, str]] = None
+        last_error: Optional[BaseException] = None
+
+        def start_next() -> None:
+            name = waiting.pop(0)
+            running[asyncio.create_task(self._timed(name, sources[name]))] = name
+
+        start_next()
+        winner: Optional[Tuple[Any, str]] = None
+        try:
+            while running and winner is None:
+                timeout = delay if waiting and delay is not None else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.debug(f"Diff source {', '.join(running.values())} is slow, hedging with {waiting[0]}")
+                    start_next()
+                    continue
+                fell_through = False
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        diff = task.result()
+                    except Exception as e:
+                        logger.warning(f"Diff source {name} failed: {e}")
+                        last_error = e
+                        fell_through = True
+                        continue
+                    if diff and winner is None:
+                        winner = (diff, name)
+                    elif not diff and empty is None:
+                        empty = (diff, name)
+                    else:
+                        close_diff(diff)
+                    fell_through = True
+                if winner is None and waiting and (fell_through or not running):
+                    start_next()
+        finally:
+            # Losers may still hold a spool (and its temp file): cancel them, wait, close what they return
+            for task in running:
+                task.cancel()
+            for result in await asyncio.gather(*running, return_exceptions=True):
+                close_diff(result)
+
+        if winner is not None:
+            if empty is not None:
+                close_diff(empty[0])
+            return winner
+        if empty is not None:
+            return empty
+        if last_error is not None:
+            raise last_error
+        raise ValueError("No diff source available")
@@ -0,0 +1,173 @@
+"""Bounded-memory diff collection: diff text kept in memory up to a threshold, in a temp file beyond."""
+
+import os
+import sys
+import tempfile
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+from loguru import logger
+
+from .diff_filter import GENERATED_SCAN_LINES, DiffFilter, FilterResult
+from .diff_model import DiffParser, ParsedDiff, parse_diff
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Block size for scanning a spilled diff (read rather than mmap'd, so its pages never count as resident)
+READ_BLOCK_BYTES = 1024 * 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class DiffSpool:
+    """Collects a diff written in chunks (per file from the compare API, per read from git).
+
+    Text stays in memory until it exceeds spill_chars, then everything moves to
+    an anonymous temporary file, so a diff of hundreds of MB is never held as
+    one string. line_spans() reads a spilled diff back in fixed-size blocks,
+    and read() returns the text between two of its positions.
+    Truthiness follows diff_content.strip(): a whitespace-only diff is empty.
+    """
+
+    def __init__(self, spill_chars: int = 32 * 1024 * 1024):
+        """Initialize the spool.
+
+        Args:
+            spill_chars: Characters kept in memory before spilling to disk (0 spills right away)
+        """
+        self.spill_chars = spill_chars
+        self._parts: List[str] = []
+        self._file: Optional[IO[bytes]] = None
+        self.chars = 0
+        self._has_content = False
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[str], spill_chars: int = 32 * 1024 * 1024) -> 'DiffSpool':
+        spool = cls(spill_chars)
+        for chunk in chunks:
+            spool.write(chunk)
+        return spool
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        self.chars += len(text)
+        if not self._has_content and not text.isspace():
+            self._has_content = True
+        if self._file is not None:
+            self._file.write(text.encode('utf-8', errors='replace'))
+            return
+        self._parts.append(text)
+        if self.chars > self.spill_chars:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._file = tempfile.TemporaryFile(prefix='yx-cc-diff-')
+        for part in self._parts:
+            self._file.write(part.encode('utf-8', errors='replace'))
+        self._parts = []
+        logger.info(f"Diff exceeds {self.spill_chars} characters, spilled to a temporary file")
+
+    def text(self) -> str:
+        """The whole diff as one string (materializes a spilled diff)."""
+        if self._file is None:
+            if len(self._parts) > 1:
+                self._parts = [''.join(self._parts)]
+            return self._parts[0] if self._parts else ''
+        self._file.flush()
+        self._file.seek(0)
+        return self._file.read().decode('utf-8', errors='replace')
+
+    @property
+    def size(self) -> int:
+        """End position of the diff in the units of line_spans() and read()."""
+        if self._file is None:
+            return self.chars
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def line_spans(self) -> Iterator[Tuple[int, str]]:
+        """Iterate over (position, line) pairs, lines without their newlines.
+
+        Positions are character offsets while the diff is in memory and byte
+        offsets once spilled; either way read() takes them.
+        """
+        if self._file is None:
+            start = 0
+            for line in self.text().split('\n'):
+                yield start, line
+                start += len(line) + 1
+            return
+        self._file.flush()
+        self._file.seek(0)
+        position = 0
+        tail = b''
+        while True:
+            block = self._file.read(READ_BLOCK_BYTES)
+            if not block:
+                break
+            lines = (tail + block).split(b'\n')
+            tail = lines.pop()
+            for raw in lines:
+                yield position, raw.decode('utf-8', errors='replace')
+                position += len(raw) + 1
+        if position or tail:
+            yield position, tail.decode('utf-8', errors='replace')
+
+    def read(self, start: int, end: int) -> str:
+        """Return the text between two line_spans() positions."""
+        if self._file is None:
+            return self.text()[start:end]
+        self._file.flush()
+        self._file.seek(start)
+        return self._file.read(end - start).decode('utf-8', errors='replace')
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._parts = []
+
+    def __len__(self) -> int:
+        return self.chars
+
+    def __bool__(self) -> bool:
+        return self._has_content
+
+
+def filter_spooled_diff(spool: DiffSpool, diff_filter: DiffFilter) -> FilterResult:
+    """Filter a spooled diff in two passes, parsing only the files that are admitted.
+
+    The first pass keeps each file's counts, header and the head of its first
+    hunk (all the filter looks at) plus where the file starts in the spool, so
+    ranking and the token budget run without any file's lines in memory. The
+    second pass reads back the admitted files' text and parses it in full.
+
+    Returns:
+        FilterResult whose diff holds the admitted files, highest risk first,
+        with their text as its source
+    """
+    parser = DiffParser(head_lines=GENERATED_SCAN_LINES)
+    for offset, line in spool.line_spans():
+        parser.feed(line, offset)
+    files = parser.close().files
+    # A file ends where the next one starts, less the newline between them
+    ends = {id(f): files[i + 1].offset - 1 for i, f in enumerate(files[:-1])}
+    size = spool.size
+
+    admitted, excluded, used = diff_filter.select(files)
+    texts = [spool.read(f.offset, ends.get(id(f), size)) for f in admitted]
+    diff = parse_diff('\n'.join(texts)) if texts else ParsedDiff([], source='')
+    return FilterResult(diff=diff, excluded=excluded, tokens=used)
@@ -0,0 +1,193 @@
+"""Content-addressed on-disk cache of LLM responses."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .utils import env_bool, env_float, env_int
+
+
+class LLMResponseCache:
+    """Persistent LLM response cache keyed by a hash of the full request.
+
+    Entries live under <cache_dir>/<key[:2]>/<key>.json. Reads refresh the file's
+    mtime. A running byte total, seeded by one directory scan at startup, tracks
+    the cache size; only when it grows past max_bytes is the directory scanned
+    again and trimmed oldest-mtime-first down to low_water of max_bytes. Entries
+    older than ttl seconds are treated as misses.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 512 * 1024 * 1024, ttl: float = 7 * 24 * 3600,
+                 low_water: float = 0.8):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cache entries
+            max_bytes: Maximum total size of the cache directory
+            ttl: Entry lifetime in seconds (<= 0 disables expiry)
+            low_water: Fraction of max_bytes eviction trims the cache down to
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.low_water_bytes = int(max_bytes * min(max(low_water, 0.0), 1.0))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def make_key(provider: str, model: Optional[str], temperature: Optional[float],
+                 system_prompt: str, prompt: str, **extra: Any) -> str:
+        """Hash every input that influences the response into a cache key."""
+        hasher = hashlib.sha256()
+        header = json.dumps(
+            {'provider': provider, 'model': model, 'temperature': temperature, **extra},
+            sort_keys=True
+        )
+        for part in (header, system_prompt, prompt):
+            encoded = part.encode('utf-8')
+            hasher.update(len(encoded).to_bytes(8, 'big'))
+            hasher.update(encoded)
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            if self.ttl > 0 and time.time() - record.get('created_at', 0) > self.ttl:
+                self._unlink(path)
+                raise FileNotFoundError(path)
+            os.utime(path)  # Mark as recently used for LRU eviction
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable LLM cache entry {path}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.debug(f"LLM cache hit: {key[:12]}")
+        return record.get('response')
+
+    def contains(self, key: str) -> bool:
+        """Return whether an unexpired entry exists, without counting a hit or miss or refreshing it."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return self.ttl <= 0 or time.time() - record.get('created_at', 0) <= self.ttl
+
+    def put(self, key: str, response: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Store a response, then evict least recently used entries if over budget."""
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            record = {'created_at': time.time(), 'response': response, **(metadata or {})}
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+            size = tmp_path.stat().st_size
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._total_bytes += size - replaced
+                over_budget = self._total_bytes > self.max_bytes
+            if over_budget:
+                self._evict()
+        except Exception as e:
+            logger.warning(f"Failed to write LLM cache entry {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _scan(self) -> List[Tuple[float, int, Path]]:
+        """Return (mtime, size, path) for every cache entry on disk."""
+        files = []
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _unlink(self, path: Path) -> None:
+        """Delete an entry and take its size off the running total."""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._total_bytes -= size
+
+    def _evict(self) -> None:
+        """Trim least recently used entries down to the low-water mark.
+
+        The scan also resynchronises the running total with the directory, which
+        other processes sharing the cache may have changed.
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            return  # Another thread is already evicting
+        try:
+            files = self._scan()
+            total = sum(size for _, size, _ in files)
+            if total > self.max_bytes:
+                for _, size, path in sorted(files):
+                    path.unlink(missing_ok=True)
+                    total -= size
+                    if total <= self.low_water_bytes:
+                        break
+            with self._lock:
+                self._total_bytes = total
+        finally:
+            self._evict_lock.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide LLM response cache, or None when YX_CC_LLM_CACHE is disabled."""
+    global _shared_cache
+    if not env_bool('YX_CC_LLM_CACHE', True):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            cache_dir = os.getenv('YX_CC_LLM_CACHE_DIR') or str(Path.home() / '.cache' / 'yx-cc' / 'llm')
+            try:
+                _shared_cache = LLMResponseCache(
+                    Path(cache_dir).expanduser(),
+                    max_bytes=env_int('YX_CC_LLM_CACHE_MAX_MB', 512) * 1024 * 1024,
+                    ttl=env_float('YX_CC_LLM_CACHE_TTL', 7 * 24 * 3600),
+                )
+                logger.debug(f"LLM response cache at: {cache_dir}")
+            except OSError as e:
+                logger.warning(f"LLM response cache disabled, cannot use {cache_dir}: {e}")
+                return None
+        return _shared_cache
@@ -0,0 +1,169 @@
+"""Incremental consumption of streamed LLM output: metrics and throttled progress."""
+
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+
+from .utils import estimate_tokens
+
+
+@dataclass
+class StreamMetrics:
+    """Latency and throughput of one LLM call."""
+    ttft: Optional[float]  # seconds until the first content token, None if nothing was received
+    duration: float  # seconds from request to the end of the stream
+    output_tokens: int
+    tokens_per_second: float  # output tokens over the generation time after the first token
+    prompt_tokens: Optional[int] = None  # input tokens reported by the provider
+    cached_tokens: Optional[int] = None  # input tokens served from the provider's prompt cache
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: round(v, 3) if isinstance(v, float) else v for k, v in asdict(self).items()}
+
+    @classmethod
+    def combine(cls, metrics: List['StreamMetrics']) -> Optional['StreamMetrics']:
+        """Sum the metrics of concurrent calls (e.g. diff chunks) into one phase-level record."""
+        if not metrics:
+            return None
+        ttfts = [m.ttft for m in metrics if m.ttft is not None]
+        duration = max(m.duration for m in metrics)
+        output_tokens = sum(m.output_tokens for m in metrics)
+
+        def total(name: str) -> Optional[int]:
+            values = [getattr(m, name) for m in metrics if getattr(m, name) is not None]
+            return sum(values) if values else None
+
+        return cls(
+            ttft=min(ttfts) if ttfts else None,
+            duration=duration,
+            output_tokens=output_tokens,
+            tokens_per_second=output_tokens / duration if duration > 0 else 0.0,
+            prompt_tokens=total('prompt_tokens'),
+            cached_tokens=total('cached_tokens')
+        )
+
+
+class StreamMeter:
+    """Measures time-to-first-token and generation speed while a runner consumes a stream."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.prompt_tokens: Optional[int] = None
+        self.cached_tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+
+    def record_usage(self, prompt_tokens: Optional[int] = None, cached_tokens: Optional[int] = None,
+                     output_tokens: Optional[int] = None) -> None:
+        """Record token usage reported by the provider."""
+        self.prompt_tokens = prompt_tokens
+        self.cached_tokens = cached_tokens
+        self.output_tokens = output_tokens
+
+    def mark(self) -> None:
+        """Record that content has arrived."""
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def finish(self, text: str, output_tokens: Optional[int] = None) -> StreamMetrics:
+        """Build the metrics once the stream is exhausted.
+
+        Args:
+            text: Full generated text
+            output_tokens: Token count reported by the provider, if any (otherwise the
+                recorded usage, or an estimate)
+        """
+        end = time.monotonic()
+        if output_tokens is None:
+            output_tokens = self.output_tokens
+        tokens = output_tokens if output_tokens is not None else estimate_tokens(text)
+        ttft = self.first_token_at - self.start if self.first_token_at is not None else None
+        generation_time = end - (self.first_token_at or self.start)
+        return StreamMetrics(
+            ttft=ttft,
+            duration=end - self.start,
+            output_tokens=tokens,
+            tokens_per_second=tokens / generation_time if generation_time > 0 else 0.0,
+            prompt_tokens=self.prompt_tokens,
+            cached_tokens=self.cached_tokens
+        )
+
+
+class StreamHandler:
+    """Receives a runner's output as it is generated. The default implementation ignores it."""
+
+    async def on_delta(self, delta: str) -> None:
+        """Called with each new piece of generated text."""
+
+    def on_complete(self, metrics: StreamMetrics) -> None:
+        """Called once the response is complete."""
+
+
+class MetricsRecorder(StreamHandler):
+    """Collects the metrics of every call it is passed to, ignoring the streamed text."""
+
+    def __init__(self):
+        self.metrics: List[StreamMetrics] = []
+
+    def on_complete(self, metrics: StreamMetrics) -> None:
+        self.metrics.append(metrics)
+
+
+ProgressUpdate = Callable[[str], Awaitable[None]]
+
+# Every code suggestion carries this key, so its occurrences count the suggestions begun so far
+SUGGESTION_MARKER = '"relevant_file"'
+
+
+class PhaseStreamHandler(StreamHandler):
+    """Throttled phase-comment progress updates for a streamed LLM call.
+
+    Updates are awaited inline, so none is in flight once the runner returns and
+    the final phase result can never be overwritten by a late progress message.
+    """
+
+    def __init__(self, update: Optional[ProgressUpdate] = None, interval: float = 10.0,
+                 count_suggestions: bool = False):
+        """Initialize the handler.
+
+        Args:
+            update: Awaitable receiving a markdown progress message (None records metrics only)
+            interval: Minimum seconds between progress updates
+            count_suggestions: Report how many code suggestions the partial response has
+        """
+        self.update = update
+        self.interval = interval
+        self.count_suggestions = count_suggestions
+        self.metrics: Optional[StreamMetrics] = None
+        self._parts: List[str] = []
+        self._chars = 0
+        self._start = time.monotonic()
+        self._last_update = self._start
+
+    async def on_delta(self, delta: str) -> None:
+        self._parts.append(delta)
+        self._chars += len(delta)
+        if self.update is None:
+            return
+        now = time.monotonic()
+        if now - self._last_update < self.interval:
+            return
+        self._last_update = now
+        try:
+            await self.update(self._progress_message(now))
+        except Exception as e:
+            logger.warning(f"Streaming progress update failed: {e}")
+
+    def on_complete(self, metrics: StreamMetrics) -> None:
+        self.metrics = metrics
+
+    def _progress_message(self, now: float) -> str:
+        text = ''.join(self._parts)
+        tokens = estimate_tokens(text)
+        rate = tokens / (now - self._start) if now > self._start else 0.0
+        message = f"_Generating... ~{tokens} tokens received ({rate:.0f} tokens/s)_"
+        suggestions = text.count(SUGGESTION_MARKER) if self.count_suggestions else 0
+        if suggestions:
+            message += f"\n\n{suggestions} suggestion{'s' if suggestions > 1 else ''} so far"
+        return message
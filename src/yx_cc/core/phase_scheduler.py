@@ -0,0 +1,140 @@
+"""Dependency-driven scheduling of review phases."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+
+PHASES = ('summary', 'analysis', 'comments')
+
+# Each phase consumes the output of the phases it depends on
+DEFAULT_PHASE_DEPENDENCIES: Dict[str, List[str]] = {
+    'summary': [],
+    'analysis': ['summary'],
+    'comments': ['analysis'],
+}
+
+PhaseRunner = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def parse_phase_dependencies(spec: Optional[str]) -> Dict[str, List[str]]:
+    """Parse a dependency spec like 'summary:;comments:;analysis:summary,comments'.
+
+    Phases not mentioned keep their default dependencies. An empty or missing
+    spec returns the defaults.
+
+    Raises:
+        ValueError: If the spec names an unknown phase or contains a cycle
+    """
+    dependencies = {phase: list(deps) for phase, deps in DEFAULT_PHASE_DEPENDENCIES.items()}
+    if not spec or not spec.strip():
+        return dependencies
+
+    for entry in spec.split(';'):
+        if not entry.strip():
+            continue
+        phase, _, deps = entry.partition(':')
+        phase = phase.strip()
+        dep_list = [d.strip() for d in deps.split(',') if d.strip()]
+        for name in [phase] + dep_list:
+            if name not in PHASES:
+                raise ValueError(f"Unknown review phase '{name}' in phase dependencies; expected one of {PHASES}")
+        dependencies[phase] = dep_list
+
+    topological_order(dependencies)
+    return dependencies
+
+
+def topological_order(dependencies: Dict[str, List[str]]) -> List[str]:
+    """Return phases ordered so every phase comes after its dependencies.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    order: List[str] = []
+    state: Dict[str, str] = {}
+
+    def visit(phase: str, path: List[str]):
+        if state.get(phase) == 'done':
+            return
+        if state.get(phase) == 'visiting':
+            raise ValueError(f"Phase dependency cycle: {' -> '.join(path + [phase])}")
+        state[phase] = 'visiting'
+        for dep in dependencies.get(phase, []):
+            visit(dep, path + [phase])
+        state[phase] = 'done'
+        order.append(phase)
+
+    for phase in dependencies:
+        visit(phase, [])
+    return order
+
+
+class PhaseScheduler:
+    """Runs review phases as a DAG, starting each phase as soon as its dependencies finish.
+
+    Phases without a path between them run concurrently, so end-to-end latency
+    approaches the longest dependency chain instead of the sum of all phases.
+    """
+
+    def __init__(self, dependencies: Optional[Dict[str, List[str]]] = None):
+        """Initialize the scheduler.
+
+        Args:
+            dependencies: Map of phase name to the phases whose output it consumes
+        """
+        self.dependencies = dependencies or DEFAULT_PHASE_DEPENDENCIES
+        self.order = topological_order(self.dependencies)
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    async def run(self, runners: Dict[str, PhaseRunner]) -> Dict[str, Any]:
+        """Run the given phases and return their outputs.
+
+        Dependencies on phases that are not in runners (e.g. disabled modes) are
+        ignored. Each runner receives a dict with its dependencies' outputs. If a
+        phase fails, the phases still running are cancelled and the error is raised.
+
+        Args:
+            runners: Map of phase name to an async callable taking dependency outputs
+
+        Returns:
+            Map of phase name to that phase's output
+        """
+        self.timings = {}
+        if not runners:
+            return {}
+        start = time.monotonic()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_phase(phase: str) -> Any:
+            deps = [d for d in self.dependencies.get(phase, []) if d in tasks]
+            dep_outputs = {dep: await tasks[dep] for dep in deps}
+            phase_start = time.monotonic()
+            logger.debug(f"Phase '{phase}' started (dependencies: {deps or 'none'})")
+            output = await runners[phase](dep_outputs)
+            phase_end = time.monotonic()
+            self.timings[phase] = {
+                'started_at': round(phase_start - start, 3),
+                'duration': round(phase_end - phase_start, 3),
+            }
+            logger.debug(f"Phase '{phase}' finished in {phase_end - phase_start:.1f}s")
+            return output
+
+        # Tasks are created in topological order so every dependency's task already exists
+        for phase in self.order + [p for p in runners if p not in self.order]:
+            if phase in runners:
+                tasks[phase] = asyncio.create_task(run_phase(phase), name=f"phase-{phase}")
+
+        try:
+            done, pending = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        logger.info(f"Review phases finished in {time.monotonic() - start:.1f}s: {self.timings}")
+        return {phase: task.result() for phase, task in tasks.items()}
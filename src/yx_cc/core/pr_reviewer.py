@@ -1,18 +1,30 @@
 """PR review orchestrator using local Git + YunXiao API + Claude Code SDK."""
 
 import os
+import copy
+import json
 import time
+import asyncio
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Callable, Iterable, List, Optional
 from loguru import logger
 
 from ..integrations.ali_yunxiao import AliYunXiaoClient
 from ..integrations.git_handler import GitHandler
-from ..integrations.claude_code_runner import ClaudeCodeRunner
-from ..integrations.openai_runner import OpenAIRunner
+from ..integrations import create_llm_runner
 from .prompt_reader import PromptReader
-from .utils import JsonDumper, split_thinking_and_json, safe_json_repair
+from .utils import JsonDumper, split_thinking_and_json, safe_json_repair, env_int, env_float, env_bool, count_tokens_for_budget, estimate_tokens, TOKEN_ESTIMATE_MARGIN
 from .output_formatter import OutputFormatter
+from .comment_poster import InlineCommentPoster, PostingSummary
+from .comment_index import PRCommentIndex, comment_author_id
+from .diff_model import FileDiff, ParsedDiff, parse_diff
+from .diff_filter import DiffFilter, FilterResult
+from .review_cache import FileReviewCache, get_file_review_cache
+from .diff_source import DiffSourceSelector, close_diff
+from .diff_stream import DiffSpool, filter_spooled_diff, peak_rss_mb
+from .diff_chunker import chunk_diff, fit_diff_to_budget, merge_analysis_results, merge_comment_results
+from .phase_scheduler import PhaseScheduler, parse_phase_dependencies
+from .llm_stream import MetricsRecorder, PhaseStreamHandler, StreamMetrics
 # from json_repair import repair_json  # Now using safe_json_repair instead
 
 
@@ -40,10 +52,11 @@ class PRReviewer:
             raise
 
         try:
-            self.claude_runner = OpenAIRunner(max_turns=5)
-            logger.info("Claude Code runner initialized successfully with max_turns=5")
+            # Only the selected backend's SDK is imported (YX_CC_LLM_BACKEND)
+            self.claude_runner = create_llm_runner(max_turns=5)
+            logger.info(f"LLM runner initialized successfully: {type(self.claude_runner).__name__} with max_turns=5")
         except Exception as e:
-            logger.error(f"Failed to initialize Claude Code runner: {e}")
+            logger.error(f"Failed to initialize LLM runner: {e}")
             raise
 
         # Initialize prompt reader
@@ -85,6 +98,15 @@ class PRReviewer:
 
         # Configuration flags
         self.use_yunxiao_for_diff = True
+        # Where diffs come from: YunXiao first (default), local git first, a race, or latency-driven
+        self.diff_source = DiffSourceSelector(
+            (os.getenv('YX_CC_DIFF_SOURCE') or 'yunxiao').strip().lower(),
+            hedge_delay=env_float('YX_CC_DIFF_HEDGE_DELAY', 0.0) or None
+        )
+        # Fetch the PR's two branches (deepening a shallow clone to their merge base) before local git diffs
+        self.git_fetch = env_bool('YX_CC_GIT_FETCH', False)
+        # Diffs above this size are spooled to a temporary file; only the admitted files are parsed
+        self.diff_spill_chars = env_int('YX_CC_DIFF_SPILL_MB', 32) * 1024 * 1024
 
         # Initialize JSON dumper for storing results
         self.json_dumper = JsonDumper()
@@ -97,15 +119,119 @@ class PRReviewer:
         # Get current branch - prioritize environment variables, fallback to git if available
         self.current_branch = self._get_current_branch()
 
+        # Per-review state (phase comments, timings, comment snapshot); see _reset_review_state
+        self._reset_review_state()
+
+        # Inline comment posting: bounded concurrency plus a shared token-bucket rate limit
+        self.comment_post_concurrency = env_int('YX_CC_COMMENT_CONCURRENCY', 4)
+        self.comment_post_rate = env_float('YX_CC_COMMENT_RATE', 5.0)
+        # Skip suggestions already posted by an earlier run; update near-duplicates in place
+        self.comment_dedup = env_bool('YX_CC_COMMENT_DEDUP', True)
+        self.comment_similarity = env_float('YX_CC_COMMENT_SIMILARITY', 0.8)
+        # Bot account whose comments count as ours; unset, it is learned from the comments we post
+        self.bot_user_id = os.getenv('YX_CC_BOT_USER_ID') or None
+
+        # Diffs over the token budget are split into chunks reviewed concurrently,
+        # which bounds per-call latency regardless of PR size
+        self.chunk_token_budget = env_int('YX_CC_CHUNK_TOKENS', 30000)
+        self.chunk_concurrency = env_int('YX_CC_CHUNK_CONCURRENCY', 4)
+
+        # Lockfiles, generated and vendored files are dropped before prompting; the rest
+        # are admitted by risk until the review-wide diff token budget is used
+        self.diff_filter = DiffFilter(
+            DiffFilter.parse_globs(os.getenv('YX_CC_DIFF_IGNORE')),
+            token_budget=env_int('YX_CC_DIFF_TOKEN_BUDGET', 120000),
+            detect_generated=env_bool('YX_CC_DIFF_FILTER', True)
+        )
+
+        # Suggestions per file keyed by its hunks: unchanged files skip the comments LLM call
+        self.file_review_cache = get_file_review_cache()
+
+        # Phase DAG: which phases' output each phase consumes; independent phases run concurrently
+        self.phase_dependencies = parse_phase_dependencies(os.getenv('YX_CC_PHASE_DEPS'))
+        logger.info(f"Phase dependencies: {self.phase_dependencies}")
+
+        # Streamed LLM output refreshes the phase comment at most this often (seconds)
+        self.stream_update_interval = env_float('YX_CC_STREAM_UPDATE_INTERVAL', 10.0)
+
+    def _reset_review_state(self):
+        """Clear the state that belongs to a single PR review."""
         # Track phase comments for updates
         self.phase_comment_ids: Dict[str, str] = {}
         # Track phase start times for duration calculation
         self.phase_start_times: Dict[str, float] = {}
-
         # Cache for PR context to avoid repeated API calls
         self._pr_context_cache: Dict[str, Any] = {}
+        self.last_posting_summary: Optional[PostingSummary] = None
+        # One comment snapshot per run, shared by the incremental check and all phases
+        self._comment_index: Optional[PRCommentIndex] = None
+        # The review's diffs by id of their text, each parsed once (see _parse_diff)
+        self._parsed_diffs: Dict[int, ParsedDiff] = {}
+        self.last_filter_result: Optional[FilterResult] = None
+        self.last_file_cache_stats: Optional[Dict[str, int]] = None
+        self.last_diff_source: Optional[Dict[str, Any]] = None
+        self.last_diff_size: Optional[Dict[str, Any]] = None
+        self.last_git_fetch: Optional[Dict[str, Any]] = None
+        self._git_fetch_task: Optional[asyncio.Task] = None
+        self._stream_handlers: Dict[str, PhaseStreamHandler] = {}
+
+    def spawn(self) -> 'PRReviewer':
+        """Return a reviewer for another PR that shares this one's clients and configuration.
+
+        The YunXiao client, LLM runner, prompt reader and caches are shared, while
+        per-review state starts empty, so spawned reviewers can run concurrently.
+        Each review still starts its own targeted fetch; the shared GitHandler
+        runs them one at a time.
+        """
+        reviewer = copy.copy(self)
+        reviewer._reset_review_state()
+        return reviewer
+
+    async def _get_comment_index(self, pr_local_id: int) -> PRCommentIndex:
+        """Return this run's comment snapshot, fetching it on first use or after we posted."""
+        index = self._comment_index
+        if index is None or index.stale or index.pr_local_id != pr_local_id:
+            index = await PRCommentIndex.fetch(self.yunxiao_client, pr_local_id)
+            self._comment_index = index
+        return index
+
+    def _invalidate_comment_index(self):
+        """Mark the comment snapshot stale after creating or deleting a comment."""
+        if self._comment_index is not None:
+            self._comment_index.stale = True
+
+    def _record_comment_update(self, comment_biz_id: str, content: str):
+        """Apply an edit of one of our comments to the snapshot, so progress updates don't force a refetch."""
+        if self._comment_index is not None:
+            self._comment_index.update_content(comment_biz_id, content)
+
+    def _dependency_context(self, phase: str, dep_outputs: Dict[str, Any]) -> Optional[str]:
+        """Build a phase's context from the outputs of the phases it depends on.
+
+        A single dependency is passed through unchanged; several are joined under
+        headings. A phase configured without dependencies gets an empty context.
+        Returns None when its dependencies did not run, so the phase falls back to
+        the results already posted on the PR.
+        """
+        if not self.phase_dependencies.get(phase):
+            return ""
+        texts = {}
+        for dep, output in dep_outputs.items():
+            # The comments phase returns (raw_result, parsed_comments)
+            texts[dep] = output[0] if isinstance(output, tuple) else output
+        if not texts:
+            return None
+        if len(texts) == 1:
+            return next(iter(texts.values()))
+        headings = {'summary': 'Summary', 'analysis': 'Change Analysis', 'comments': 'Generated Comments'}
+        return "\n\n".join(f"### {headings.get(dep, dep)}\n{text}" for dep, text in texts.items())
+
+    def _llm_cache_stats(self) -> Optional[Dict[str, int]]:
+        """Return the LLM response cache counters, or None if the runner has no cache."""
+        llm_cache = getattr(self.claude_runner, 'llm_cache', None)
+        return llm_cache.stats() if llm_cache is not None else None
 
-    def _get_last_reviewed_commit_id(self, pr_local_id: int) -> Optional[str]:
+    async def _get_last_reviewed_commit_id(self, pr_local_id: int) -> Optional[str]:
         """Get the commit ID of the last review from existing comments.
 
         Args:
@@ -116,21 +242,8 @@ class PRReviewer:
         """
         logger.debug(f"Looking for last reviewed commit ID for PR #{pr_local_id}")
         try:
-            comments = self.yunxiao_client.list_merge_request_comments(pr_local_id)
-
-            last_version = -1
-            last_commit_id = None
-
-            for comment in comments:
-                if "related_patchset" in comment and comment["related_patchset"]:
-                    patch_set = comment["related_patchset"]
-                    version_no = patch_set.get("versionNo")
-                    commit_id = patch_set.get("commitId")
-
-                    if version_no is not None and commit_id:
-                        if version_no > last_version:
-                            last_version = version_no
-                            last_commit_id = commit_id
+            index = await self._get_comment_index(pr_local_id)
+            last_commit_id, last_version = index.last_reviewed_commit()
 
             if last_commit_id:
                 logger.info(f"Found last reviewed commit ID for PR #{pr_local_id}: {last_commit_id} (version {last_version})")
@@ -143,7 +256,7 @@ class PRReviewer:
             logger.warning(f"Could not determine last reviewed commit for PR #{pr_local_id}: {e}")
             return None
 
-    def _get_pr_head_commit(self, pr: Dict[str, Any]) -> Optional[str]:
+    async def _get_pr_head_commit(self, pr: Dict[str, Any]) -> Optional[str]:
         """Get the head commit of the PR's source branch."""
         source_branch = pr.get('sourceBranch')
         if not source_branch:
@@ -151,10 +264,10 @@ class PRReviewer:
             return None
 
         logger.debug(f"Getting head commit for source branch: {source_branch}")
-        return self.yunxiao_client.get_branch_head_commit(source_branch)
+        return await self.yunxiao_client.get_branch_head_commit_async(source_branch)
 
-    def get_existing_phase_context(self, pr_local_id: int, phase_name: str) -> Optional[str]:
-        """Retrieve existing phase results from PR comments using ListMergeRequestComments API.
+    async def get_existing_phase_context(self, pr_local_id: int, phase_name: str) -> Optional[str]:
+        """Retrieve existing phase results from the run's PR comment snapshot.
 
         Args:
             pr_local_id: PR local ID
@@ -166,33 +279,11 @@ class PRReviewer:
         try:
             logger.debug(f"Retrieving existing context for phase '{phase_name}' from PR #{pr_local_id}")
 
-            # Get all comments for the PR
-            comments = self.yunxiao_client.list_merge_request_comments(
-                pr_local_id,
-                comment_type="GLOBAL_COMMENT"
-            )
-
-            # Look for phase completion comments
-            phase_marker = f"**{phase_name} Complete**"
-            for comment in comments:
-                content = comment.get('content', '')
-                if phase_marker in content:
-                    # Extract the content after the phase marker
-                    lines = content.split('\n')
-                    result_lines = []
-                    found_marker = False
-
-                    for line in lines:
-                        if phase_marker in line:
-                            found_marker = True
-                            continue
-                        if found_marker and line.strip():
-                            result_lines.append(line)
-
-                    if result_lines:
-                        result = '\n'.join(result_lines).strip()
-                        logger.info(f"Found existing {phase_name} context: {len(result)} characters")
-                        return result
+            index = await self._get_comment_index(pr_local_id)
+            result = index.phase_result(phase_name)
+            if result:
+                logger.info(f"Found existing {phase_name} context: {len(result)} characters")
+                return result
 
             logger.debug(f"No existing context found for phase '{phase_name}'")
             return None
@@ -221,7 +312,7 @@ class PRReviewer:
 
         # Check for existing summary unless forced to regenerate
         if not force_regenerate:
-            existing_summary = self.get_existing_phase_context(pr_local_id, "Summary Generation")
+            existing_summary = await self.get_existing_phase_context(pr_local_id, "Summary Generation")
             if existing_summary:
                 logger.info("Using existing summary from PR comments")
                 return existing_summary
@@ -233,7 +324,7 @@ class PRReviewer:
         # await self._post_phase_start_comment(...)
         # await self._post_phase_result_comment(...)
 
-        _, summary_result = await self._phase_1_summary(pr, diff_content)
+        _, summary_result = await self._phase_1_summary(pr, diff_content, bypass_cache=force_regenerate)
 
         # Update PR description with the generated summary
         logger.info("Updating PR description with generated summary")
@@ -263,14 +354,14 @@ class PRReviewer:
 
         # Check for existing analysis unless forced to regenerate
         if not force_regenerate:
-            existing_analysis = self.get_existing_phase_context(pr_local_id, "Change Analysis")
+            existing_analysis = await self.get_existing_phase_context(pr_local_id, "Change Analysis")
             if existing_analysis:
                 logger.info("Using existing analysis from PR comments")
                 return existing_analysis
 
         # Get summary context if not provided
         if summary_context is None:
-            summary_context = self.get_existing_phase_context(pr_local_id, "Summary Generation")
+            summary_context = await self.get_existing_phase_context(pr_local_id, "Summary Generation")
             if not summary_context:
                 logger.warning("No summary context available for analysis phase")
                 summary_context = "No summary available"
@@ -279,7 +370,7 @@ class PRReviewer:
         to_patch_set_id = pr.get('toPatchSetId', '')
 
         await self._post_phase_start_comment(pr_local_id, "Change Analysis", to_patch_set_id)
-        analysis_thinking, analysis_result = await self._phase_2_analysis(pr, diff_content, summary_context)
+        analysis_thinking, analysis_result = await self._phase_2_analysis(pr, diff_content, summary_context, bypass_cache=force_regenerate)
         await self._post_phase_result_comment(pr_local_id, "Change Analysis", analysis_result, to_patch_set_id, analysis_thinking)
 
         return analysis_result
@@ -306,7 +397,7 @@ class PRReviewer:
 
         # Check for existing comments unless forced to regenerate
         if not force_regenerate:
-            existing_comments = self.get_existing_phase_context(pr_local_id, "Comment Generation")
+            existing_comments = await self.get_existing_phase_context(pr_local_id, "Comment Generation")
             if existing_comments:
                 logger.info("Using existing comments from PR comments")
                 # Parse the existing comments
@@ -315,7 +406,7 @@ class PRReviewer:
 
         # Get analysis context if not provided
         if analysis_context is None:
-            analysis_context = self.get_existing_phase_context(pr_local_id, "Change Analysis")
+            analysis_context = await self.get_existing_phase_context(pr_local_id, "Change Analysis")
             if not analysis_context:
                 logger.warning("No analysis context available for comments phase")
                 analysis_context = "No analysis available"
@@ -324,14 +415,14 @@ class PRReviewer:
         to_patch_set_id = pr.get('toPatchSetId', '')
 
         await self._post_phase_start_comment(pr_local_id, "Comment Generation", to_patch_set_id)
-        comments_thinking, comments_raw_result, comments_parsed = await self._phase_3_comments(pr, diff_content, analysis_context)
+        comments_thinking, comments_raw_result, comments_parsed = await self._phase_3_comments(pr, diff_content, analysis_context, bypass_cache=force_regenerate)
         await self._post_phase_result_comment(pr_local_id, "Comment Generation", comments_raw_result, to_patch_set_id, comments_thinking)
 
         # Post inline comments
-        await self._post_inline_comments(pr, comments_parsed)
+        posting_summary = await self._post_inline_comments(pr, comments_parsed)
 
         # Final update after all inline comments are posted
-        await self._update_comment_generation_final(pr_local_id, len(comments_parsed))
+        await self._update_comment_generation_final(pr_local_id, posting_summary)
 
         return comments_raw_result, comments_parsed
 
@@ -354,34 +445,63 @@ class PRReviewer:
         logger.info(f"Enabled phases: {self.enabled_modes}")
 
         # Reset phase comment tracking for this PR
-        self.phase_comment_ids.clear()
-        self.phase_start_times.clear()
+        self._reset_review_state()
+        llm_cache_start = self._llm_cache_stats()
 
-        # Check for incremental update
-        last_reviewed_commit_id = self._get_last_reviewed_commit_id(pr_local_id)
-        current_head_commit_id = self._get_pr_head_commit(pr)
+        # Check for incremental update (both lookups are independent, so overlap them)
+        last_reviewed_commit_id, current_head_commit_id = await asyncio.gather(
+            self._get_last_reviewed_commit_id(pr_local_id),
+            self._get_pr_head_commit(pr)
+        )
 
         is_incremental_update = last_reviewed_commit_id and current_head_commit_id and (last_reviewed_commit_id != current_head_commit_id)
 
+        comments_spool: Optional[DiffSpool] = None
         if is_incremental_update:
             logger.info(f"Incremental update detected for PR #{pr_local_id}. Reviewing changes from {last_reviewed_commit_id} to {current_head_commit_id}.")
-            diff_content = self._get_diff_content(pr, target_branch, source_branch, from_commit=last_reviewed_commit_id, to_commit=current_head_commit_id)
+            diff_spool = await self._get_diff_content(pr, target_branch, source_branch, from_commit=last_reviewed_commit_id, to_commit=current_head_commit_id)
+            if 'comments' in self.enabled_modes and self._file_review_cache_warm(pr):
+                # The full diff keeps hunks comparable with the last run, so the file review
+                # cache can skip every file this patchset left unchanged
+                logger.info(f"File review cache holds PR #{pr_local_id}; comments phase reviews the full diff")
+                comments_spool = await self._get_diff_content(pr, target_branch, source_branch)
             enabled_modes = [mode for mode in self.enabled_modes if mode != 'summary']
             logger.info(f"Summary phase disabled for incremental update. Effective modes: {enabled_modes}")
         else:
             logger.info(f"New PR or no previous review found for PR #{pr_local_id}. Performing full review.")
-            diff_content = self._get_diff_content(pr, target_branch, source_branch)
+            diff_spool = await self._get_diff_content(pr, target_branch, source_branch)
             enabled_modes = self.enabled_modes
 
-        if not diff_content.strip():
-            logger.warning(f"No changes detected for PR #{pr_local_id}")
+        try:
+            if not diff_spool:
+                logger.warning(f"No changes detected for PR #{pr_local_id}")
+                return {
+                    'status': 'no_changes',
+                    'message': 'No changes detected between branches',
+                    'pr_id': pr_local_id
+                }
+
+            logger.info(f"Diff content retrieved, size: {len(diff_spool)} characters")
+            comments_diff_content = None
+            if comments_spool:
+                comments_diff_content = self._filter_diff_spool(comments_spool).diff.text() or None
+            # Parsed once; the phases reuse its file index and token counts
+            filter_result = self._filter_diff_spool(diff_spool)
+            diff_memory = {'chars': len(diff_spool), 'spilled': diff_spool.spilled, 'peak_rss_mb': peak_rss_mb()}
+        finally:
+            diff_spool.close()
+            if comments_spool is not None:
+                comments_spool.close()
+        logger.info(f"Diff memory: {diff_memory}")
+        if not filter_result.diff.files:
+            logger.warning(f"All changed files of PR #{pr_local_id} were excluded by the diff filter")
             return {
                 'status': 'no_changes',
-                'message': 'No changes detected between branches',
-                'pr_id': pr_local_id
+                'message': 'All changed files were excluded by the diff filter',
+                'pr_id': pr_local_id,
+                'diff_filter': filter_result.to_dict()
             }
-
-        logger.info(f"Diff content retrieved, size: {len(diff_content)} characters")
+        diff_content = filter_result.diff.text()
 
         # Initialize results
         result = {
@@ -392,27 +512,67 @@ class PRReviewer:
             'summary': '',
             'analysis': '',
             'comments_posted': 0,
-            'comments': []
+            'comments': [],
+            'diff_filter': filter_result.to_dict(),
+            'diff_memory': diff_memory
         }
 
         try:
-            # Run enabled phases
-            if 'summary' in enabled_modes:
-                result['summary'] = await self.run_summary_phase(pr, diff_content, force_regenerate)
+            # Run enabled phases; each starts as soon as the phases it depends on finish
+            phase_runners = {
+                'summary': lambda deps: self.run_summary_phase(pr, diff_content, force_regenerate),
+                'analysis': lambda deps: self.run_analysis_phase(
+                    pr, diff_content, self._dependency_context('analysis', deps), force_regenerate),
+                'comments': lambda deps: self.run_comments_phase(
+                    pr, comments_diff_content or diff_content, self._dependency_context('comments', deps),
+                    force_regenerate),
+            }
+            scheduler = PhaseScheduler(self.phase_dependencies)
+            outputs = await scheduler.run({phase: runner for phase, runner in phase_runners.items() if phase in enabled_modes})
+            result['phase_timings'] = scheduler.timings
+
+            if 'summary' in outputs:
+                result['summary'] = outputs['summary']
 
-            if 'analysis' in enabled_modes:
-                result['analysis'] = await self.run_analysis_phase(pr, diff_content, result['summary'], force_regenerate)
+            if 'analysis' in outputs:
+                result['analysis'] = outputs['analysis']
 
-            if 'comments' in enabled_modes:
-                comments_raw, comments_parsed = await self.run_comments_phase(pr, diff_content, result['analysis'], force_regenerate)
+            if 'comments' in outputs:
+                comments_raw, comments_parsed = outputs['comments']
                 result['comments_posted'] = len(comments_parsed)
                 result['comments'] = comments_parsed
                 result['comments_raw'] = comments_raw
+                if self.last_posting_summary is not None:
+                    result['comments_posted'] = self.last_posting_summary.posted
+                    result['inline_comment_results'] = self.last_posting_summary.to_dict()
+
+            llm_metrics = {phase: h.metrics.to_dict() for phase, h in self._stream_handlers.items() if h.metrics}
+            if llm_metrics:
+                result['llm_metrics'] = llm_metrics
+                cache_usage = {phase: f"{m['cached_tokens']}/{m['prompt_tokens']}" for phase, m in llm_metrics.items()
+                               if m.get('cached_tokens') is not None and m.get('prompt_tokens')}
+                if cache_usage:
+                    logger.info(f"Provider prompt cache (cached/prompt tokens) by phase: {cache_usage}")
+
+            if self.last_diff_source is not None:
+                result['diff_source'] = self.last_diff_source
+            if self.last_diff_size is not None:
+                result['diff_size'] = self.last_diff_size
+            if self.last_git_fetch is not None:
+                result['git_fetch'] = self.last_git_fetch
+
+            if self.last_file_cache_stats is not None:
+                result['file_review_cache'] = self.last_file_cache_stats
+
+            if llm_cache_start is not None:
+                llm_cache_end = self._llm_cache_stats()
+                result['llm_cache'] = {k: llm_cache_end[k] - llm_cache_start[k] for k in llm_cache_start}
 
             # Post final summary if any phases were run and it's not an incremental update
             if enabled_modes and not is_incremental_update:
                 logger.info("Posting final summary comment")
-                await self._post_final_summary(pr, result['summary'], result['analysis'], result['comments'])
+                await self._post_final_summary(pr, result['summary'], result['analysis'], result['comments'],
+                                               filter_result=filter_result)
 
             # Dump review results to JSON file
             try:
@@ -461,7 +621,7 @@ class PRReviewer:
         try:
             # Find the PR for current branch
             logger.debug(f"Searching for PR: {self.current_branch} -> {target_branch}")
-            pr = self.yunxiao_client.find_pull_request_by_branch(
+            pr = await self.yunxiao_client.find_pull_request_by_branch_async(
                 source_branch=self.current_branch,
                 target_branch=target_branch
             )
@@ -475,7 +635,7 @@ class PRReviewer:
             if not pr_local_id:
                 raise ValueError("PR local ID not found")
             logger.debug(f"Getting detailed PR information for #{pr_local_id}")
-            detailed_pr = self.yunxiao_client.get_specific_pull_request(int(pr_local_id))
+            detailed_pr = await self.yunxiao_client.get_specific_pull_request_async(int(pr_local_id))
 
             logger.info(f"Found PR #{pr_local_id}: {detailed_pr.get('title', 'Unknown title')}")
             return await self.run_selective_review(detailed_pr, target_branch, force_regenerate)
@@ -491,7 +651,7 @@ class PRReviewer:
         try:
             # Get detailed PR information using GetChangeRequest API
             logger.debug(f"Fetching detailed PR information for ID: {pr_local_id}")
-            pr = self.yunxiao_client.get_specific_pull_request(pr_local_id)
+            pr = await self.yunxiao_client.get_specific_pull_request_async(pr_local_id)
 
             if not pr:
                 logger.error(f"PR with local ID {pr_local_id} not found")
@@ -517,7 +677,11 @@ class PRReviewer:
 
         # Get diff content - prioritize Yunxiao API over local git
         logger.debug(f"Getting diff content between {target_branch} and {source_branch}")
-        diff_content = self._get_diff_content(pr, target_branch, source_branch)
+        diff_spool = await self._get_diff_content(pr, target_branch, source_branch)
+        try:
+            diff_content = diff_spool.text()
+        finally:
+            diff_spool.close()
 
         if not diff_content.strip():
             logger.warning(f"No changes detected between {target_branch} and {source_branch}")
@@ -562,10 +726,10 @@ class PRReviewer:
             await self._post_phase_result_comment(pr_local_id, "Comment Generation", comments_raw_result, to_patch_set_id, comments_thinking)
 
             # Post inline comments
-            await self._post_inline_comments(pr, comments_parsed)
+            posting_summary = await self._post_inline_comments(pr, comments_parsed)
 
             # Final update after all inline comments are posted
-            await self._update_comment_generation_final(pr_local_id, len(comments_parsed))
+            await self._update_comment_generation_final(pr_local_id, posting_summary)
 
             # Final summary comment
             logger.info("Posting final summary comment")
@@ -577,9 +741,10 @@ class PRReviewer:
                 'pr_title': pr['title'],
                 'summary': summary_result,
                 'analysis': analysis_result,
-                'comments_posted': len(comments_parsed),
+                'comments_posted': posting_summary.posted,
                 'comments': comments_parsed,
-                'comments_raw': comments_raw_result
+                'comments_raw': comments_raw_result,
+                'inline_comment_results': posting_summary.to_dict()
             }
 
             # Dump review results to JSON file
@@ -598,39 +763,64 @@ class PRReviewer:
             await self._post_error_comment(pr_local_id, str(e), to_patch_set_id)
             raise
 
-    async def _phase_1_summary(self, pr: Dict[str, Any], diff_content: str) -> tuple[str, str]:
+    def _build_prompt_prefix(self, pr: Dict[str, Any], diff: str) -> str:
+        """Build the user prompt prefix shared by every phase: PR details followed by the diff.
+
+        It must stay byte-identical across phases so the provider can serve it from
+        its prompt cache; anything phase-specific belongs in the tail.
+        """
+        return (
+            f"PR Title: {pr.get('title', 'Unknown')}\n"
+            f"PR Description: {pr.get('description', 'No description')}\n"
+            f"Source Branch: {pr.get('sourceBranch', 'unknown')}\n"
+            f"Target Branch: {pr.get('targetBranch', 'unknown')}\n"
+            f"\n"
+            f"Git Diff:\n"
+            f"{diff}\n"
+        )
+
+    def _phase_prompt_builder(self, pr: Dict[str, Any], stage: str,
+                              context_label: Optional[str] = None,
+                              context: Optional[str] = None) -> Callable[[str], str]:
+        """Return a builder for a phase's user prompt: shared prefix, then the phase tail.
+
+        The tail holds the phase instructions from <stage>.toml and the output of
+        earlier phases, which differ per phase and therefore come after the diff.
+        """
+        tail = f"\n---\n\n# Task\n\n{self.prompt_reader.read_prompt_text(stage)}\n"
+        if context_label:
+            tail += f"\n{context_label}:\n{context}\n"
+        return lambda diff: self._build_prompt_prefix(pr, diff) + tail
+
+    async def _phase_1_summary(self, pr: Dict[str, Any], diff_content: str, bypass_cache: bool = False) -> tuple[str, str]:
         """Phase 1: Generate PR summary using system prompt.
 
+        Args:
+            bypass_cache: Skip the LLM response cache lookup (set by --force-regenerate)
+
         Returns:
             tuple[str, str]: (thinking_content, result_json)
         """
         logger.debug("Phase 1: Reading summary system prompt")
-        system_prompt = self.prompt_reader.read_system_prompt('summary')
-
-        context = {
-            'pr_title': pr.get('title', 'Unknown'),
-            'pr_description': pr.get('description', 'No description'),
-            'source_branch': pr.get('sourceBranch', 'unknown'),
-            'target_branch': pr.get('targetBranch', 'unknown'),
-            'diff_content': diff_content
-        }
+        system_prompt = self.prompt_reader.read_shared_system_prompt()
 
-        logger.debug(f"Phase 1: Building prompt for PR: {context['pr_title']}")
-        prompt = f"""
+        logger.debug(f"Phase 1: Building prompt for PR: {pr.get('title', 'Unknown')}")
+        build_prompt = self._phase_prompt_builder(pr, 'summary')
 
-PR Title: {context['pr_title']}
-PR Description: {context['pr_description']}
-Source Branch: {context['source_branch']}
-Target Branch: {context['target_branch']}
-
-Git Diff:
-{diff_content}
-
-"""
+        # The summary needs one coherent view, so an oversized diff is truncated rather than chunked
+        budget = self._diff_token_budget(system_prompt, build_prompt(''))
+        parsed_diff = self._parse_diff(diff_content)
+        if count_tokens_for_budget(diff_content, budget, estimate=parsed_diff.tokens) > budget:
+            logger.info(f"Phase 1: Diff exceeds {budget} tokens, truncating for the summary")
+            diff_content = fit_diff_to_budget(parsed_diff, int(budget * (1 - TOKEN_ESTIMATE_MARGIN)))
+        prompt = build_prompt(diff_content)
 
         logger.debug("Phase 1: Sending request to Claude Code SDK")
         try:
-            result = await self.claude_runner.run_async(system_prompt, prompt)
+            result = await self.claude_runner.run_async(
+                system_prompt, prompt, bypass_cache=bypass_cache,
+                stream_handler=self._phase_stream_handler(pr['localId'], 'summary')
+            )
             # TODO: only needed when we use claude code 
             #thinking, result = split_thinking_and_json(result)
             result = safe_json_repair(result)
@@ -642,35 +832,29 @@ Git Diff:
             logger.error(f"Phase 1: Claude Code SDK request failed: {e}")
             raise
 
-    async def _phase_2_analysis(self, pr: Dict[str, Any], diff_content: str, summary: str) -> tuple[str, str]:
+    async def _phase_2_analysis(self, pr: Dict[str, Any], diff_content: str, summary: str,
+                                bypass_cache: bool = False) -> tuple[str, str]:
         """Phase 2: Analyze changes using system prompt.
 
+        Args:
+            bypass_cache: Skip the LLM response cache lookup (set by --force-regenerate)
+
         Returns:
             tuple[str, str]: (thinking_content, result_json)
         """
         logger.debug("Phase 2: Reading analysis system prompt")
-        system_prompt = self.prompt_reader.read_system_prompt('analysis')
+        system_prompt = self.prompt_reader.read_shared_system_prompt()
 
         logger.debug(f"Phase 2: Building analysis prompt for PR: {pr.get('title', 'Unknown')}")
-        prompt = f"""
-
-Previous Summary:
-{summary}
-
-PR Details:
-- Title: {pr.get('title', 'Unknown')}
-- Description: {pr.get('description', 'No description')}
-- Source Branch: {pr.get('sourceBranch', 'unknown')}
-- Target Branch: {pr.get('targetBranch', 'unknown')}
-
-Git Diff:
-{diff_content}
-
-"""
+        build_prompt = self._phase_prompt_builder(pr, 'analysis', "Previous Summary", summary)
 
         logger.debug("Phase 2: Sending analysis request to Claude Code SDK")
         try:
-            result = await self.claude_runner.run_async(system_prompt, prompt)
+            result = await self._run_over_diff(
+                "Phase 2", system_prompt, build_prompt, diff_content, merge_analysis_results,
+                bypass_cache=bypass_cache,
+                stream_handler=self._phase_stream_handler(pr['localId'], 'analysis', "Change Analysis")
+            )
             #thinking, result = split_thinking_and_json(result)
             thinking = ""
             result = safe_json_repair(result)
@@ -681,45 +865,234 @@ Git Diff:
             logger.error(f"Phase 2: Claude Code SDK analysis request failed: {e}")
             raise
 
-    async def _phase_3_comments(self, pr: Dict[str, Any], diff_content: str, analysis: str) -> tuple[str, str, List[Dict[str, Any]]]:
+    async def _phase_3_comments(self, pr: Dict[str, Any], diff_content: str, analysis: str,
+                                bypass_cache: bool = False) -> tuple[str, str, List[Dict[str, Any]]]:
         """Phase 3: Generate specific comments using system prompt.
 
+        Args:
+            bypass_cache: Skip the LLM response cache lookup (set by --force-regenerate)
+
         Returns:
             tuple[str, str, List[Dict[str, Any]]]: (thinking_content, result_json, parsed_comments)
         """
         logger.debug("Phase 3: Reading comment system prompt")
-        system_prompt = self.prompt_reader.read_system_prompt('comment')
+        system_prompt = self.prompt_reader.read_shared_system_prompt()
 
         logger.debug(f"Phase 3: Building comment generation prompt for PR: {pr.get('title', 'Unknown')}")
-        prompt = f"""
-Previous Analysis:
-{analysis}
-
-PR Details:
-- Title: {pr.get('title', 'Unknown')}
-- Description: {pr.get('description', 'No description')}
-
-Git Diff:
-{diff_content}
-"""
+        build_prompt = self._phase_prompt_builder(pr, 'comment', "Previous Analysis", analysis)
+
+        # Files whose hunks match a previous run reuse that run's suggestions
+        parsed_diff = self._parse_diff(diff_content)
+        reused: Dict[str, List[Dict[str, Any]]] = {}
+        pending = parsed_diff.files
+        cache_context = None
+        if self.file_review_cache is not None:
+            cache_context = self._file_cache_context(pr, system_prompt)
+            if not bypass_cache:
+                reused, pending = self.file_review_cache.partition(parsed_diff, cache_context)
+            self.last_file_cache_stats = {'reused_files': len(reused), 'reviewed_files': len(pending)}
+            if reused:
+                logger.info(f"Phase 3: Reusing suggestions for {len(reused)} unchanged files, "
+                            f"reviewing {len(pending)} changed files")
 
-        logger.debug("Phase 3: Sending comment generation request to Claude Code SDK")
-        # try:
-        result = await self.claude_runner.run_async(system_prompt, prompt, max_turns=10)
-        #thinking, json_block = split_thinking_and_json(result)
         thinking = ""
-        json_block = safe_json_repair(result)
-        logger.debug(f"Phase 3: Received comment response from Claude, length: {len(json_block)} characters")
-        logger.debug(f"Phase 3: Thinking content length: {len(thinking or '')} characters")
-
-        logger.debug("Phase 3: Parsing comment response")
-        comments = self._parse_comment_response(json_block)
-        logger.debug(f"Phase 3: Parsed {len(comments)} comments from response")
+        comments: List[Dict[str, Any]] = []
+        results: List[str] = []
+        if pending:
+            review_diff = parsed_diff
+            if reused:
+                review_diff = ParsedDiff(pending)
+                review_diff.source = review_diff.text()
+            logger.debug("Phase 3: Sending comment generation request to Claude Code SDK")
+            result = await self._run_over_diff(
+                "Phase 3", system_prompt, build_prompt, review_diff.text(),
+                lambda results, weights: merge_comment_results(results),
+                parsed_diff=review_diff, max_turns=10, bypass_cache=bypass_cache,
+                stream_handler=self._phase_stream_handler(
+                    pr['localId'], 'comments', "Comment Generation", count_suggestions=True)
+            )
+            #thinking, json_block = split_thinking_and_json(result)
+            json_block = safe_json_repair(result)
+            logger.debug(f"Phase 3: Received comment response from Claude, length: {len(json_block)} characters")
+            logger.debug(f"Phase 3: Thinking content length: {len(thinking or '')} characters")
+
+            logger.debug("Phase 3: Parsing comment response")
+            comments = self._parse_comment_response(json_block)
+            logger.debug(f"Phase 3: Parsed {len(comments)} comments from response")
+            results.append(result)
+            self._store_file_suggestions(pending, json_block, cache_context)
+
+        if reused:
+            reused_block = json.dumps({'code_suggestions': [s for suggestions in reused.values() for s in suggestions]},
+                                      ensure_ascii=False)
+            # Usually already on the PR; the poster skips those and posts any that are missing
+            comments += [dict(comment, reused=True) for comment in self._parse_comment_response(reused_block)]
+            results.append(reused_block)
+        result = results[0] if len(results) == 1 else merge_comment_results(results)
         return thinking or "", result, comments
         # except Exception as e:
         #     logger.error(f"Phase 3: Claude Code SDK comment generation failed: {e}")
         #     raise
 
+    def _file_cache_context(self, pr: Dict[str, Any], system_prompt: str) -> str:
+        """File review cache context of the comments phase for this PR."""
+        # Scoped to this PR: reused suggestions are posted (de-duplicated) on the PR they came from
+        return FileReviewCache.make_context(
+            self.yunxiao_client.organization_id, self.yunxiao_client.repository_id, str(pr['localId']),
+            system_prompt, self.prompt_reader.read_prompt_text('comment'),
+            getattr(self.claude_runner, 'model', None))
+
+    def _file_review_cache_warm(self, pr: Dict[str, Any]) -> bool:
+        """Return whether the file review cache holds suggestions from an earlier review of this PR."""
+        if self.file_review_cache is None:
+            return False
+        try:
+            context = self._file_cache_context(pr, self.prompt_reader.read_shared_system_prompt())
+            return self.file_review_cache.has_entries(context)
+        except Exception as e:
+            logger.debug(f"Cannot check the file review cache: {e}")
+            return False
+
+    def _store_file_suggestions(self, files: List[FileDiff], json_block: str, cache_context: Optional[str]):
+        """Store a comment phase result per file in the file review cache."""
+        if self.file_review_cache is None or cache_context is None:
+            return
+        try:
+            suggestions = json.loads(json_block).get('code_suggestions')
+        except (ValueError, AttributeError):
+            suggestions = None
+        if not isinstance(suggestions, list):
+            logger.debug("Phase 3: Response has no code_suggestions list, not caching per file")
+            return
+        stored = self.file_review_cache.store(files, suggestions, cache_context)
+        logger.debug(f"Phase 3: Stored suggestions for {stored} files in the file review cache")
+
+    def _phase_stream_handler(self, pr_local_id: int, phase_key: str, phase_name: Optional[str] = None,
+                              count_suggestions: bool = False) -> PhaseStreamHandler:
+        """Create the stream handler for a phase's LLM call and keep it for the run's metrics.
+
+        Args:
+            pr_local_id: PR local ID
+            phase_key: Key under which the call's metrics are reported
+            phase_name: Phase comment to refresh with progress (None records metrics only)
+            count_suggestions: Report the number of code suggestions received in the progress message
+        """
+        async def _send_update(message: str):
+            await self._update_phase_progress(pr_local_id, phase_name, message)
+
+        handler = PhaseStreamHandler(
+            _send_update if phase_name else None,
+            interval=self.stream_update_interval,
+            count_suggestions=count_suggestions
+        )
+        self._stream_handlers[phase_key] = handler
+        return handler
+
+    def _filter_diff_spool(self, spool: DiffSpool) -> FilterResult:
+        """Apply the diff filter and make its output the review's parsed diff.
+
+        A diff held in memory is parsed whole. A spilled one is ranked from
+        per-file statistics, and only the admitted files are read back and
+        parsed (see filter_spooled_diff).
+        """
+        if spool.spilled:
+            filter_result = filter_spooled_diff(spool, self.diff_filter)
+        else:
+            filter_result = self.diff_filter.apply(self._parse_diff(spool.text()))
+        logger.info(f"Diff covers {len(filter_result.diff) + len(filter_result.excluded)} files, "
+                    f"~{filter_result.diff.tokens + sum(e.tokens for e in filter_result.excluded)} tokens")
+        self.last_filter_result = filter_result
+        self._parsed_diffs[id(filter_result.diff.text())] = filter_result.diff
+        if filter_result.excluded:
+            excluded_tokens = sum(e.tokens for e in filter_result.excluded)
+            logger.info(f"Diff filter: {len(filter_result.diff)} files (~{filter_result.tokens} tokens) included, "
+                        f"{len(filter_result.excluded)} excluded (~{excluded_tokens} tokens)")
+            for e in filter_result.excluded:
+                logger.debug(f"Excluded {e.path}: {e.reason}")
+        return filter_result
+
+    def _parse_diff(self, diff_content: str) -> ParsedDiff:
+        """Return the parsed form of diff_content, parsing each diff text only once per review."""
+        parsed = self._parsed_diffs.get(id(diff_content))
+        if parsed is None or parsed.source is not diff_content:
+            parsed = parse_diff(diff_content)
+            self._parsed_diffs[id(diff_content)] = parsed
+        return parsed
+
+    def _diff_token_budget(self, system_prompt: str, prompt_without_diff: str) -> int:
+        """Return how many diff tokens fit in one LLM call next to the rest of the prompt."""
+        max_tokens = getattr(self.claude_runner, 'max_tokens', self.chunk_token_budget)
+        overhead = estimate_tokens(system_prompt) + estimate_tokens(prompt_without_diff)
+        # Leave headroom for the chunk note and tokenizer differences between pieces
+        budget = min(self.chunk_token_budget, max_tokens - overhead - 500)
+        if budget <= 0:
+            raise ValueError(f"Prompt without the diff already uses {overhead} of {max_tokens} tokens")
+        return budget
+
+    async def _run_over_diff(self, phase_label: str, system_prompt: str, build_prompt: Callable[[str], str],
+                             diff_content: str, merge: Callable[[List[str], List[int]], str],
+                             parsed_diff: Optional[ParsedDiff] = None, **run_kwargs) -> str:
+        """Run a phase prompt over the diff, map-reducing over chunks if it exceeds the token budget.
+
+        Args:
+            phase_label: Label used in log messages
+            system_prompt: Phase system prompt
+            build_prompt: Builds the user prompt around a diff
+            diff_content: Full diff
+            merge: Reduces per-chunk JSON results (with estimated chunk token weights) into one result
+            parsed_diff: Parsed form of diff_content when it is not the review's own diff
+            **run_kwargs: Passed through to the runner's run_async
+
+        Returns:
+            The raw LLM response, or the merged JSON when the diff was chunked. A
+            chunk that fails is logged and left out of the merge; the phase only
+            fails when every chunk does.
+        """
+        budget = self._diff_token_budget(system_prompt, build_prompt(''))
+        parsed_diff = parsed_diff or self._parse_diff(diff_content)
+        diff_tokens = count_tokens_for_budget(diff_content, budget, estimate=parsed_diff.tokens)
+        if diff_tokens <= budget:
+            return await self.claude_runner.run_async(system_prompt, build_prompt(diff_content), **run_kwargs)
+
+        # Interleaved deltas from concurrent chunks can't be shown as one stream,
+        # so chunk calls only record metrics, summed into the phase handler at the end
+        phase_handler = run_kwargs.pop('stream_handler', None)
+        recorder = MetricsRecorder()
+        # Chunks are packed by estimate, so keep them clear of the exact limit
+        chunks = chunk_diff(parsed_diff, int(budget * (1 - TOKEN_ESTIMATE_MARGIN)))
+        total = len(chunks)
+        logger.info(f"{phase_label}: Diff has {diff_tokens} tokens, reviewing in {total} chunks of <= {budget} tokens")
+        semaphore = asyncio.Semaphore(max(1, self.chunk_concurrency))
+
+        async def run_chunk(index: int, chunk: str) -> str:
+            async with semaphore:
+                logger.debug(f"{phase_label}: Sending chunk {index}/{total}")
+                note = f"# Part {index}/{total} of the PR diff; review only the changes shown here.\n"
+                result = await self.claude_runner.run_async(system_prompt, build_prompt(note + chunk),
+                                                            stream_handler=recorder, **run_kwargs)
+                return safe_json_repair(result)
+
+        # A failed chunk must not abandon the others mid-call: merge what succeeded
+        outcomes = await asyncio.gather(*(run_chunk(i, c) for i, c in enumerate(chunks, 1)),
+                                        return_exceptions=True)
+        if isinstance(phase_handler, PhaseStreamHandler):
+            phase_handler.metrics = StreamMetrics.combine(recorder.metrics)
+        results, weights, errors = [], [], []
+        for index, (chunk, outcome) in enumerate(zip(chunks, outcomes), 1):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome
+                logger.error(f"{phase_label}: Chunk {index}/{total} failed: {outcome}")
+                errors.append(outcome)
+            else:
+                results.append(outcome)
+                weights.append(estimate_tokens(chunk))
+        if not results:
+            raise errors[0]
+        if errors:
+            logger.warning(f"{phase_label}: Merging {len(results)} of {total} chunks, {len(errors)} failed")
+        return merge(results, weights)
+
     async def _post_phase_start_comment(self, pr_local_id: int, phase_name: str, patch_set_id: str):
         """Post a comment indicating the start of a review phase."""
         logger.debug(f"Posting phase start comment for {phase_name} on PR #{pr_local_id}")
@@ -727,11 +1100,13 @@ Git Diff:
             # Record start time
             self.phase_start_times[phase_name.lower()] = time.time()
             
-            result = self.yunxiao_client.create_global_comment(
+            result = await self.yunxiao_client.create_global_comment_async(
                 pr_local_id,
                 f"🔄 **Review Phase Started**: {phase_name}\n\n_Processing..._",
                 patch_set_id
             )
+            self._invalidate_comment_index()
+            self._remember_bot_user(result)
             # Store comment ID for later update
             comment_biz_id = result.get('comment_biz_id')
             if comment_biz_id:
@@ -786,74 +1161,73 @@ Git Diff:
             if comment_biz_id:
                 # Update existing comment
                 logger.debug(f"Updating existing comment {comment_biz_id} for phase {phase_name}")
-                self.yunxiao_client.update_pr_comment(
-                    pr_local_id,
-                    comment_biz_id,
-                    content=f"✅ **{phase_name} Complete**{elapsed_str}\n\n{formatted_result}"
-                )
+                content = f"✅ **{phase_name} Complete**{elapsed_str}\n\n{formatted_result}"
+                await self.yunxiao_client.update_pr_comment_async(pr_local_id, comment_biz_id, content=content)
+                self._record_comment_update(comment_biz_id, content)
                 logger.debug(f"Successfully updated phase result comment for {phase_name}")
             else:
                 # Fallback to creating new comment if ID not found
                 logger.warning(f"No stored comment ID for phase {phase_name}, creating new comment")
-                self.yunxiao_client.create_global_comment(
+                await self.yunxiao_client.create_global_comment_async(
                     pr_local_id,
                     f"✅ **{phase_name} Complete**{elapsed_str}\n\n{formatted_result}",
                     patch_set_id
                 )
+                self._invalidate_comment_index()
                 logger.debug(f"Successfully created fallback phase result comment for {phase_name}")
         except Exception as e:
             logger.error(f"Failed to update/post phase result comment for {phase_name}: {e}")
 
-    async def _post_inline_comments(self, pr: Dict[str, Any], comments: List[Dict[str, Any]]):
-        """Post inline comments to specific lines with progress updates."""
+    async def _post_inline_comments(self, pr: Dict[str, Any], comments: List[Dict[str, Any]]) -> PostingSummary:
+        """Post inline comments concurrently under a rate limit, with progress updates."""
         pr_local_id = pr['localId']
         from_patch_set_id = pr.get('fromPatchSetId', '')
         to_patch_set_id = pr.get('toPatchSetId', '')
-
-        logger.info(f"Posting {len(comments)} inline comments to PR #{pr_local_id}")
-
-        for i, comment in enumerate(comments, 1):
-            # Update progress every 5 comments or on last comment
-            if i % 5 == 0 or i == len(comments):
-                progress_msg = f"Posting inline comments: {i}/{len(comments)} completed"
-                await self._update_phase_progress(pr_local_id, "Comment Generation", progress_msg)
-            
-            if comment.get('file') and comment.get('line'):
-                logger.debug(f"Posting inline comment {i}/{len(comments)}: {comment['file']}:{comment['line']}")
-                try:
-                    # Handle line ranges (e.g., "22-30") by taking the first line
-                    line_str = str(comment['line']).strip()
-                    if '-' in line_str:
-                        # Extract first line from range
-                        try:
-                            line_number = int(line_str.split('-')[0])
-                            logger.debug(f"Line range detected ({line_str}), using first line: {line_number}")
-                        except (ValueError, IndexError) as e:
-                            logger.warning(f"Invalid line range format '{line_str}', skipping comment: {e}")
-                            continue
-                    else:
-                        try:
-                            line_number = int(line_str)
-                        except ValueError as e:
-                            logger.warning(f"Invalid line number format '{line_str}', skipping comment: {e}")
-                            continue
-
-                    self.yunxiao_client.create_inline_comment(
-                        pr_local_id,
-                        f"**{comment.get('type', 'COMMENT')}**: {comment['content']}",
-                        comment['file'],
-                        line_number,
-                        from_patch_set_id,
-                        to_patch_set_id
-                    )
-                    logger.debug(f"Successfully posted inline comment {i}/{len(comments)}")
-                except Exception as e:
-                    logger.error(f"Failed to post inline comment for {comment['file']}:{comment['line']}: {e}")
-            else:
-                logger.warning(f"Skipping comment {i}/{len(comments)} - missing file or line information: {comment}")
-
-    async def _post_final_summary(self, pr: Dict[str, Any], summary: str, analysis: str, comments: List[Dict[str, Any]]):
-        """Post final review summary."""
+        existing = None
+        if self.comment_dedup and comments:
+            try:
+                existing = await self._get_comment_index(pr_local_id)
+            except Exception as e:
+                logger.warning(f"Could not list existing comments, posting without de-duplication: {e}")
+
+        reused = sum(1 for comment in comments if comment.get('reused'))
+        if reused and self.comment_dedup and existing is None:
+            # Without the PR's comments they can't be checked, and they were most likely posted before
+            logger.warning(f"Skipping {reused} inline comments reused from the previous review")
+            comments = [comment for comment in comments if not comment.get('reused')]
+        elif reused:
+            logger.info(f"{reused} inline comments are reused from the previous review; posting those not on the PR")
+
+        logger.info(f"Posting {len(comments)} inline comments to PR #{pr_local_id} "
+                    f"(concurrency={self.comment_post_concurrency}, rate={self.comment_post_rate}/s)")
+
+        async def on_progress(completed: int, total: int):
+            progress_msg = f"Posting inline comments: {completed}/{total} completed"
+            await self._update_phase_progress(pr_local_id, "Comment Generation", progress_msg)
+
+        poster = InlineCommentPoster(
+            self.yunxiao_client,
+            max_concurrency=self.comment_post_concurrency,
+            rate_per_second=self.comment_post_rate,
+            progress_callback=on_progress,
+            existing=existing,
+            similarity=self.comment_similarity,
+            bot_user_id=self.bot_user_id
+        )
+        summary = await poster.post_all(pr_local_id, comments, from_patch_set_id, to_patch_set_id)
+        self.bot_user_id = self.bot_user_id or poster.bot_user_id
+        self._invalidate_comment_index()
+        self.last_posting_summary = summary
+        return summary
+
+    def _remember_bot_user(self, response: Any):
+        """Learn the bot account from a comment we just created, unless YX_CC_BOT_USER_ID set it."""
+        if self.bot_user_id is None and isinstance(response, dict):
+            self.bot_user_id = comment_author_id(response)
+
+    async def _post_final_summary(self, pr: Dict[str, Any], summary: str, analysis: str, comments: List[Dict[str, Any]],
+                                  filter_result: Optional[FilterResult] = None):
+        """Post final review summary, listing the files the diff filter left out."""
         pr_local_id = pr['localId']
         to_patch_set_id = pr.get('toPatchSetId', '')
 
@@ -864,14 +1238,18 @@ Git Diff:
 - **Comments Generated**: {len(comments)}
 - **PR Description**: Updated with automated summary
 """
+        excluded_files = filter_result.format_markdown() if filter_result is not None else ''
+        if excluded_files:
+            final_summary += f"\n**Not reviewed** ({len(filter_result.excluded)} files):\n{excluded_files}\n"
 
         logger.info(f"Posting final summary for PR #{pr_local_id}")
         try:
-            self.yunxiao_client.create_global_comment(
+            await self.yunxiao_client.create_global_comment_async(
                 pr_local_id,
                 final_summary,
                 to_patch_set_id
             )
+            self._invalidate_comment_index()
             logger.info(f"Successfully posted final summary for PR #{pr_local_id}")
         except Exception as e:
             logger.error(f"Failed to post final summary: {e}")
@@ -880,62 +1258,125 @@ Git Diff:
         """Post an error comment if review fails."""
         logger.warning(f"Posting error comment for PR #{pr_local_id}: {error_message}")
         try:
-            self.yunxiao_client.create_global_comment(
+            await self.yunxiao_client.create_global_comment_async(
                 pr_local_id,
                 f"❌ **Review Error**: {error_message}",
                 patch_set_id
             )
+            self._invalidate_comment_index()
             logger.info(f"Successfully posted error comment for PR #{pr_local_id}")
         except Exception as e:
             logger.error(f"Failed to post error comment: {e}")
 
-    def _get_diff_content(self, pr: Dict[str, Any], target_branch: str, source_branch: str, from_commit: Optional[str] = None, to_commit: Optional[str] = None) -> str:
-        """Get diff content using Yunxiao API first, fallback to git if needed."""
+    async def _get_diff_content(self, pr: Dict[str, Any], target_branch: str, source_branch: str, from_commit: Optional[str] = None, to_commit: Optional[str] = None) -> DiffSpool:
+        """Get diff content from the YunXiao compare API or local git, as chosen by the diff source policy.
+
+        Both sources stream into a DiffSpool, which moves to a temporary file
+        once the diff exceeds YX_CC_DIFF_SPILL_MB.
+        """
 
         if from_commit and to_commit:
             # Incremental diff using commit SHAs
             logger.debug(f"Getting incremental diff for PR #{pr['localId']} from {from_commit} to {to_commit}")
+            sources = {'yunxiao': lambda: self._spool_async(self.yunxiao_client.iter_compare_diffs_async(
+                from_commit, to_commit, 'commit', 'commit'))}
+            if self.git_handler:
+                sources['git'] = lambda: self._local_git(target_branch, source_branch, self._spool,
+                                                         self.git_handler.iter_commit_range_diff(from_commit, to_commit))
             try:
-                diff_content = self.yunxiao_client.get_diff_content_from_compare(
-                    from_commit, to_commit, 'commit', 'commit'
-                )
+                diff_content = await self._fetch_diff(sources)
                 if diff_content:
                     logger.info(f"Retrieved incremental diff from commits, size: {len(diff_content)} characters")
                     return diff_content
+                diff_content.close()
             except Exception as e:
                 logger.warning(f"Could not get incremental diff from commits: {e}. Falling back to branch diff.")
 
         # Full diff
         logger.debug(f"Getting full diff content: {target_branch}..{source_branch}")
-
+        sources = {'yunxiao': lambda: self._spool_async(self.yunxiao_client.iter_compare_diffs_async(
+            target_branch, source_branch, 'branch', 'branch'))}
+        size_report = None
+        if self.git_handler:
+            sources['git'] = lambda: self._local_git(target_branch, source_branch, self._spool,
+                                                     self.git_handler.iter_branch_diff(target_branch, source_branch))
+            # Merge-base vs branch-tip diff sizes, computed alongside the fetch
+            size_report = asyncio.create_task(self._local_git(
+                target_branch, source_branch, self.git_handler.get_diff_size_report, target_branch, source_branch))
+        else:
+            logger.debug("No git handler available, using the YunXiao compare API only")
         try:
-            logger.debug(f"Using branch comparison API: {target_branch} -> {source_branch}")
-            diff_content = self.yunxiao_client.get_diff_content_from_compare(
-                target_branch, source_branch, 'branch', 'branch'
-            )
-
-            if diff_content:
-                logger.info(f"Retrieved diff from branch comparison, size: {len(diff_content)} characters")
-                return diff_content
+            diff_content = await self._fetch_diff(sources)
+        except BaseException:
+            if size_report:
+                size_report.cancel()
+            raise
+        logger.info(f"Retrieved branch diff, size: {len(diff_content)} characters")
+        if size_report:
+            await self._record_diff_size(size_report)
+        return diff_content
 
+    async def _record_diff_size(self, size_report: 'asyncio.Task') -> None:
+        """Store the merge-base size report; a missing local checkout only costs the report."""
+        try:
+            self.last_diff_size = await size_report
         except Exception as e:
-            logger.warning(f"Yunxiao API diff retrieval failed: {e}")
-            if not self.git_handler:
-                logger.error("No git handler available for fallback")
-                raise
-
-        # Fallback to git handler if available
-        if self.git_handler:
-            logger.debug("Falling back to git handler for diff")
-            try:
-                diff = self.git_handler.get_branch_diff(target_branch, source_branch)
-                logger.info(f"Retrieved diff using git fallback, size: {len(diff)} characters")
-                return diff
-            except Exception as e:
-                logger.error(f"Git fallback also failed: {e}")
-                raise
+            logger.debug(f"Diff size report unavailable: {e}")
+            return
+        if 'lines_saved' in self.last_diff_size:
+            tips, merge_base = self.last_diff_size['tips'], self.last_diff_size['merge_base_diff']
+            logger.info(f"Merge-base diff: {merge_base['files']} files, "
+                        f"{merge_base['insertions'] + merge_base['deletions']} changed lines "
+                        f"({tips['files']} files, {tips['insertions'] + tips['deletions']} lines between branch tips)")
+
+    def _spool(self, chunks: Iterable[str]) -> DiffSpool:
+        return DiffSpool.from_chunks(chunks, self.diff_spill_chars)
+
+    async def _spool_async(self, chunks: AsyncIterator[str]) -> DiffSpool:
+        spool = DiffSpool(self.diff_spill_chars)
+        try:
+            async for chunk in chunks:
+                spool.write(chunk)
+        except BaseException:
+            spool.close()  # Failed or cancelled (e.g. a losing hedge): drop the partial temp file
+            raise
+        return spool
+
+    async def _local_git(self, target_branch: str, source_branch: str, func: Callable[..., Any], *args) -> Any:
+        """Run a GitHandler call in a thread, after the review's targeted fetch when YX_CC_GIT_FETCH is on."""
+        if self.git_fetch:
+            if self._git_fetch_task is None:
+                self._git_fetch_task = asyncio.create_task(
+                    asyncio.to_thread(self.git_handler.fetch_branches, target_branch, source_branch))
+            # Shielded: one caller being cancelled must not cancel the fetch the others wait on
+            self.last_git_fetch = await asyncio.shield(self._git_fetch_task)
+        # Cancelling the await cannot stop the thread, so a result it still produces is closed when it lands
+        work = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            work.add_done_callback(self._close_late_result)
+            raise
 
-        raise ValueError("No method available to retrieve diff content")
+    @staticmethod
+    def _close_late_result(future: 'asyncio.Future') -> None:
+        """Close what an abandoned git read returned once its thread finishes."""
+        if not future.cancelled() and future.exception() is None:
+            close_diff(future.result())
+
+    async def _fetch_diff(self, sources: Dict[str, Callable[[], Any]]) -> DiffSpool:
+        """Fetch a diff through the diff source selector and record which source served it."""
+        start = time.monotonic()
+        diff_content, source = await self.diff_source.fetch(sources)
+        elapsed = time.monotonic() - start
+        logger.info(f"Diff served by {source} in {elapsed:.2f}s (policy: {self.diff_source.policy})")
+        self.last_diff_source = {
+            'source': source,
+            'policy': self.diff_source.policy,
+            'elapsed': round(elapsed, 3),
+            'latency': self.diff_source.tracker.snapshot(),
+        }
+        return diff_content
 
     def _convert_change_tree_to_diff(self, changes: Dict[str, Any]) -> str:
         """Convert Yunxiao change tree format to unified diff format."""
@@ -1073,7 +1514,7 @@ Git Diff:
 
 
 
-    async def _update_comment_generation_final(self, pr_local_id: int, comment_count: int):
+    async def _update_comment_generation_final(self, pr_local_id: int, posting_summary: PostingSummary):
         """Final update to comment generation phase after inline comments are posted."""
         try:
             phase_key = "comment generation"
@@ -1087,14 +1528,12 @@ Git Diff:
                 elapsed_str = f" _(completed in {elapsed:.1f}s)_"
             
             if comment_biz_id:
-                logger.debug(f"Final update to comment generation phase: {comment_count} comments posted")
-                self.yunxiao_client.update_pr_comment(
-                    pr_local_id,
-                    comment_biz_id,
-                    content=f"✅ **Comment Generation Complete**{elapsed_str}\\n\\n" +
-                           f"Successfully posted {comment_count} inline comments. " +
-                           "Please review all comments and address any issues marked as MUST_FIX or SHOULD_FIX."
-                )
+                logger.debug(f"Final update to comment generation phase: {posting_summary.posted} comments posted")
+                content = (f"✅ **Comment Generation Complete**{elapsed_str}\n\n" +
+                           f"{posting_summary.format_markdown()}\n\n" +
+                           "Please review all comments and address any issues marked as MUST_FIX or SHOULD_FIX.")
+                await self.yunxiao_client.update_pr_comment_async(pr_local_id, comment_biz_id, content=content)
+                self._record_comment_update(comment_biz_id, content)
                 logger.debug("Successfully updated final comment generation status")
         except Exception as e:
             logger.error(f"Failed to update final comment generation status: {e}")
@@ -1114,11 +1553,9 @@ Git Diff:
             
             if comment_biz_id:
                 logger.debug(f"Updating progress for {phase_name}: {progress_message}")
-                self.yunxiao_client.update_pr_comment(
-                    pr_local_id,
-                    comment_biz_id,
-                    content=f"🔄 **{phase_name} In Progress**{elapsed_str}\\n\\n{progress_message}"
-                )
+                content = f"🔄 **{phase_name} In Progress**{elapsed_str}\n\n{progress_message}"
+                await self.yunxiao_client.update_pr_comment_async(pr_local_id, comment_biz_id, content=content)
+                self._record_comment_update(comment_biz_id, content)
         except Exception as e:
             logger.error(f"Failed to update phase progress for {phase_name}: {e}")
 
@@ -1142,7 +1579,7 @@ Git Diff:
 ---
 _This description was automatically generated by the PR review system which developed by **Heng Li** with Claude Code._"""
 
-            result = self.yunxiao_client.update_pull_request(
+            result = await self.yunxiao_client.update_pull_request_async(
                 pr_local_id,
                 title=original_title,  # Keep the original title
                 description=updated_description
@@ -1,10 +1,10 @@
 """Module for reading TOML files as system and user prompts."""
 
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import tomli
 from loguru import logger
-from .utils import num_tokens_from_string
+from .utils import count_tokens_for_budget, num_tokens_from_string, truncate_to_tokens
 
 
 class PromptReader:
@@ -19,6 +19,9 @@ class PromptReader:
         # Cache for REVIEW.md content to avoid reading multiple times
         self._review_md_content = None
         self._review_md_checked = False
+
+        # Parsed prompt texts keyed by stage, revalidated against the file's mtime
+        self._prompt_text_cache: Dict[str, Tuple[int, str]] = {}
     
     def _find_and_read_review_md(self) -> Optional[str]:
         """Find and read REVIEW.md from current directory or home directory."""
@@ -51,46 +54,22 @@ class PromptReader:
                         # Fallback to binary read with error handling
                         content = review_path.read_bytes().decode('utf-8', errors='replace')
                     
-                    # Check token count
-                    token_count = num_tokens_from_string(content)
+                    # Check token count (exact only when the estimate is close to the limit)
                     max_tokens = 10000
-                    
+                    token_count = count_tokens_for_budget(content, max_tokens)
+
                     if token_count > max_tokens:
                         logger.warning(
-                            f"REVIEW.md exceeds {max_tokens} tokens ({token_count} tokens). "
+                            f"REVIEW.md exceeds {max_tokens} tokens (~{token_count} tokens). "
                             f"Content will be truncated. Found at: {review_path}"
                         )
-                        # Truncate content using actual chars-per-token ratio
-                        chars_per_token = len(content) / token_count if token_count else 4
-                        estimated_max_chars = int(max_tokens * chars_per_token)
+                        # Cut on a token boundary in a single encode pass, leaving room for the marker
                         marker = "\n\n[... content truncated due to token limit ...]"
-                        
-                        if estimated_max_chars < 0:
-                            estimated_max_chars = 0
-                        
-                        truncated_main = content[:estimated_max_chars]
-                        content = truncated_main + marker
-                        
-                        # Refine truncation if we still exceed token limit (iterative adjustment)
-                        for _ in range(5):
-                            current_tokens = num_tokens_from_string(content)
-                            if current_tokens <= max_tokens:
-                                break
-                            # Scale down proportionally
-                            allowed_fraction = max_tokens / current_tokens
-                            new_main_len = int(len(truncated_main) * allowed_fraction)
-                            if new_main_len <= 0:
-                                truncated_main = ""
-                            else:
-                                truncated_main = truncated_main[:new_main_len]
-                            content = truncated_main + marker
-                        
-                        # Verify truncated content is within limits
-                        truncated_tokens = num_tokens_from_string(content)
-                        logger.info(f"Truncated REVIEW.md to {truncated_tokens} tokens")
+                        content = truncate_to_tokens(content, max_tokens - num_tokens_from_string(marker)) + marker
+                        logger.info(f"Truncated REVIEW.md to at most {max_tokens} tokens")
                     else:
-                        logger.info(f"Found REVIEW.md with {token_count} tokens at: {review_path}")
-                    
+                        logger.info(f"Found REVIEW.md with ~{token_count} tokens at: {review_path}")
+
                     self._review_md_content = content
                     return content
                     
@@ -153,6 +132,52 @@ class PromptReader:
         except Exception as e:
             raise ValueError(f"Failed to read and parse TOML file {prompt_file}: {e}")
     
+    def read_prompt_text(self, stage: str) -> str:
+        """Read the prompt text of a stage file as-is, without REVIEW.md guidelines.
+
+        The parsed text is cached until the file changes, so a long-running process
+        parses each prompt once.
+        """
+        prompt_file = self.prompts_dir / f"{stage}.toml"
+        if not prompt_file.exists():
+            raise FileNotFoundError(f"System prompt file not found: {prompt_file}")
+        mtime = prompt_file.stat().st_mtime_ns
+        cached = self._prompt_text_cache.get(stage)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        content = None
+        for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']:
+            try:
+                content = prompt_file.read_text(encoding=encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        if content is None:
+            content = prompt_file.read_bytes().decode('utf-8', errors='replace')
+
+        try:
+            toml_data = tomli.loads(content)
+        except Exception as e:
+            raise ValueError(f"Failed to parse TOML file {prompt_file}: {e}")
+        if 'prompt' not in toml_data or 'system_prompt' not in toml_data['prompt']:
+            raise ValueError(f"Invalid TOML format in {prompt_file}: missing 'prompt.system_prompt' section")
+        text = toml_data['prompt']['system_prompt'].strip()
+        self._prompt_text_cache[stage] = (mtime, text)
+        return text
+
+    def read_shared_system_prompt(self) -> str:
+        """Read the system prompt shared by every phase, with REVIEW.md guidelines appended.
+
+        All phases send this exact text, so it forms a cacheable prompt prefix at the provider.
+        """
+        system_prompt = self.read_prompt_text('shared')
+        review_content = self._find_and_read_review_md()
+        if review_content:
+            system_prompt += f"\n\n## Additional Review Guidelines (from REVIEW.md)\n\n{review_content}"
+            logger.debug("Appended REVIEW.md content to shared system prompt")
+        return system_prompt
+
     def read_all_prompts(self) -> Dict[str, str]:
         """Read all available prompt files."""
         prompts = {}
@@ -0,0 +1,146 @@
+"""Per-file cache of comment suggestions, keyed by a hash of each file's hunks."""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from .diff_model import FileDiff, ParsedDiff
+from .llm_cache import LLMResponseCache
+from .utils import env_bool, env_float, env_int
+
+
+def _normalize_path(path: Any) -> str:
+    return str(path or '').strip().lstrip('/')
+
+
+class FileReviewCache:
+    """Stores the code suggestions generated for each file of a reviewed diff.
+
+    A file's key hashes its path, its hunks (headers included, so shifted line
+    numbers are a miss) and a context string covering the repository, PR,
+    prompts and model. On a new patchset of the same PR, files whose hunks are
+    unchanged reuse their stored suggestions and only the other files are sent
+    to the LLM. Each store also writes a marker for its context, so has_entries()
+    tells whether a review of the PR can be served from the cache at all.
+    Entries share the on-disk layout, TTL and LRU eviction of LLMResponseCache.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 128 * 1024 * 1024, ttl: float = 30 * 24 * 3600):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cache entries
+            max_bytes: Maximum total size of the cache directory
+            ttl: Entry lifetime in seconds (<= 0 disables expiry)
+        """
+        self._store = LLMResponseCache(cache_dir, max_bytes=max_bytes, ttl=ttl)
+
+    @staticmethod
+    def make_context(*parts: Optional[str]) -> str:
+        """Hash everything besides the file itself that scopes its suggestions (repository, PR, prompts, model)."""
+        hasher = hashlib.sha256()
+        for part in parts:
+            encoded = (part or '').encode('utf-8')
+            hasher.update(len(encoded).to_bytes(8, 'big'))
+            hasher.update(encoded)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def file_key(file_diff: FileDiff, context: str) -> str:
+        hasher = hashlib.sha256(context.encode('ascii'))
+        hasher.update(file_diff.path.encode('utf-8'))
+        for hunk in file_diff.hunks:
+            for line in hunk.raw_lines():
+                hasher.update(b'\n')
+                hasher.update(line.encode('utf-8'))
+        return hasher.hexdigest()
+
+    @staticmethod
+    def marker_key(context: str) -> str:
+        """Key of the entry recording that suggestions were stored under this context."""
+        return hashlib.sha256(b'stored\n' + context.encode('ascii')).hexdigest()
+
+    def has_entries(self, context: str) -> bool:
+        """Return whether a review under this context (i.e. of this PR) stored suggestions that are still cached."""
+        return self._store.contains(self.marker_key(context))
+
+    def partition(self, diff: ParsedDiff, context: str) -> Tuple[Dict[str, List[Dict[str, Any]]], List[FileDiff]]:
+        """Split a diff into files with stored suggestions and files still to review.
+
+        Returns:
+            (reused, pending): stored suggestions by file path, and the files to
+            send to the LLM, in diff order
+        """
+        reused: Dict[str, List[Dict[str, Any]]] = {}
+        pending: List[FileDiff] = []
+        for file_diff in diff:
+            cached = self._store.get(self.file_key(file_diff, context)) if file_diff.hunks else None
+            suggestions = None
+            if cached is not None:
+                try:
+                    suggestions = json.loads(cached)
+                except ValueError:
+                    pass
+            if isinstance(suggestions, list):
+                reused[file_diff.path] = suggestions
+            else:
+                pending.append(file_diff)
+        return reused, pending
+
+    def store(self, files: Iterable[FileDiff], suggestions: List[Dict[str, Any]], context: str) -> int:
+        """Store the suggestions of a review, grouped by file.
+
+        Every reviewed file is stored, including files without suggestions, so a
+        clean file is not reviewed again either.
+
+        Returns:
+            Number of files stored
+        """
+        by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for suggestion in suggestions:
+            if isinstance(suggestion, dict):
+                by_file.setdefault(_normalize_path(suggestion.get('relevant_file')), []).append(suggestion)
+
+        stored = 0
+        for file_diff in files:
+            if not file_diff.hunks:
+                continue
+            file_suggestions = by_file.get(file_diff.path, [])
+            self._store.put(self.file_key(file_diff, context), json.dumps(file_suggestions, ensure_ascii=False),
+                            {'path': file_diff.path, 'suggestions': len(file_suggestions)})
+            stored += 1
+        if stored:
+            self._store.put(self.marker_key(context), json.dumps(stored), {'files': stored})
+        return stored
+
+    def stats(self) -> Dict[str, int]:
+        return self._store.stats()
+
+
+_shared_cache: Optional[FileReviewCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_file_review_cache() -> Optional[FileReviewCache]:
+    """Return the process-wide file review cache, or None when YX_CC_REVIEW_CACHE is disabled."""
+    global _shared_cache
+    if not env_bool('YX_CC_REVIEW_CACHE', True):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            cache_dir = os.getenv('YX_CC_REVIEW_CACHE_DIR') or str(Path.home() / '.cache' / 'yx-cc' / 'reviews')
+            try:
+                _shared_cache = FileReviewCache(
+                    Path(cache_dir).expanduser(),
+                    max_bytes=env_int('YX_CC_REVIEW_CACHE_MAX_MB', 128) * 1024 * 1024,
+                    ttl=env_float('YX_CC_REVIEW_CACHE_TTL', 30 * 24 * 3600),
+                )
+                logger.debug(f"File review cache at: {cache_dir}")
+            except OSError as e:
+                logger.warning(f"File review cache disabled, cannot use {cache_dir}: {e}")
+                return None
+        return _shared_cache
@@ -0,0 +1,306 @@
+"""Long-running review daemon: accepts YunXiao merge-request webhooks and queues reviews."""
+
+import asyncio
+import hmac
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+from urllib.parse import unquote
+from loguru import logger
+
+from .batch_reviewer import BatchItemResult, BatchReviewer
+from .pr_reviewer import PRReviewer
+from .utils import get_encoding
+
+# Merge-request actions that (re)trigger a review; close/merge events are ignored
+REVIEW_ACTIONS = {'open', 'opened', 'reopen', 'reopened', 'update', 'updated', 'push'}
+
+MAX_BODY_BYTES = 1024 * 1024
+READ_TIMEOUT = 10.0
+
+_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+@dataclass
+class ReviewJob:
+    """A queued review request."""
+    pr_id: int
+    force_regenerate: bool = False
+    source: str = 'webhook'
+    received_at: float = field(default_factory=time.time)
+
+
+def _event_repositories(payload: Dict[str, Any]) -> Set[str]:
+    """IDs and paths of the repository a webhook payload names as the PR's target."""
+    attrs = payload.get('object_attributes') or {}
+    target = attrs.get('target') or {}
+    project = payload.get('project') or {}
+    repository = payload.get('repository') or {}
+    values = (attrs.get('target_project_id'), attrs.get('targetProjectId'), target.get('id'),
+              target.get('path_with_namespace'), project.get('id'), project.get('path_with_namespace'),
+              repository.get('id'))
+    return {str(value) for value in values if value not in (None, '')}
+
+
+def parse_merge_request_event(payload: Dict[str, Any],
+                              repository_id: Optional[str] = None) -> Tuple[Optional[ReviewJob], str]:
+    """Turn a YunXiao (Codeup) merge-request webhook payload into a review job.
+
+    Codeup sends GitLab-style payloads: 'object_kind' is 'merge_request' and the
+    PR is described by 'object_attributes' (local ID, action, state, branches).
+    Local IDs are per repository, so an event naming another repository than
+    repository_id is rejected; payloads that name none are accepted.
+
+    Args:
+        payload: Decoded webhook body
+        repository_id: The configured ALI_REPOSITORY_ID (ID or path); None skips the check
+
+    Returns:
+        (job, reason): job is None when the event should not trigger a review,
+        with reason saying why
+    """
+    kind = payload.get('object_kind') or payload.get('event_type')
+    if kind and kind != 'merge_request':
+        return None, f"ignored event kind '{kind}'"
+    if repository_id:
+        repositories = _event_repositories(payload)
+        if repositories and unquote(str(repository_id)) not in repositories:
+            return None, f"event for another repository ({', '.join(sorted(repositories))})"
+
+    attrs = payload.get('object_attributes') or {}
+    local_id = attrs.get('local_id') or attrs.get('localId') or attrs.get('iid')
+    if local_id is None:
+        return None, "payload has no merge request local ID"
+    try:
+        pr_id = int(local_id)
+    except (TypeError, ValueError):
+        return None, f"invalid merge request local ID '{local_id}'"
+
+    action = attrs.get('action')
+    if action is not None and action not in REVIEW_ACTIONS:
+        return None, f"ignored action '{action}'"
+    state = attrs.get('state')
+    if action is None and state not in (None, 'opened'):
+        return None, f"ignored state '{state}'"
+    return ReviewJob(pr_id=pr_id, source='webhook'), f"action '{action or state or 'unknown'}'"
+
+
+class ReviewServer:
+    """HTTP front end over a warm PRReviewer and an internal review queue.
+
+    Endpoints:
+        POST /webhook  YunXiao merge-request webhook payload
+        POST /review   Local trigger: {"pr_id": 123, "force_regenerate": false}
+        GET  /healthz  Queue and worker statistics
+
+    Reviews for the same PR never overlap: an event for a PR under review is
+    held and replayed once the running review finishes, and repeated events for
+    a PR still waiting in the queue are coalesced. A coalesced or deferred
+    event asking for force_regenerate carries the flag over to the job that runs.
+    """
+
+    def __init__(self, reviewer: PRReviewer, workers: int = 2, secret: Optional[str] = None):
+        """Initialize the server.
+
+        Args:
+            reviewer: Base reviewer whose clients, caches and prompts stay warm
+            workers: Number of reviews run concurrently
+            secret: Token expected in X-Codeup-Token, X-Gitlab-Token or a Bearer
+                Authorization header (None accepts unauthenticated requests)
+        """
+        self.batch = BatchReviewer(reviewer, concurrency=workers)
+        self.workers = max(1, workers)
+        self.secret = secret
+        self.repository_id = reviewer.yunxiao_client.repository_id
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # Jobs waiting in the queue by PR, so a coalesced event can update them
+        self._queued: Dict[int, ReviewJob] = {}
+        self._in_flight: Set[int] = set()
+        self._rerun: Dict[int, ReviewJob] = {}
+        self._worker_tasks = []
+        self.port: Optional[int] = None
+        self.stats = {'received': 0, 'ignored': 0, 'completed': 0, 'failed': 0}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=20)
+
+    def warm_up(self):
+        """Load the tokenizer and parse the prompts before the first request arrives."""
+        start = time.monotonic()
+        try:
+            get_encoding()
+        except Exception as e:
+            logger.warning(f"Tokenizer warm-up failed, exact counts will load lazily: {e}")
+        prompt_reader = self.batch.reviewer.prompt_reader
+        prompt_reader.read_shared_system_prompt()
+        for stage in ('summary', 'analysis', 'comment'):
+            prompt_reader.read_prompt_text(stage)
+        logger.info(f"Review server warmed up in {time.monotonic() - start:.2f}s")
+
+    def enqueue(self, job: ReviewJob) -> str:
+        """Queue a review, coalescing with pending work for the same PR.
+
+        Returns:
+            'queued', 'coalesced' (already waiting) or 'deferred' (runs after the current review)
+        """
+        queued = self._queued.get(job.pr_id)
+        if queued is not None:
+            queued.force_regenerate = queued.force_regenerate or job.force_regenerate
+            return 'coalesced'
+        if job.pr_id in self._in_flight:
+            previous = self._rerun.get(job.pr_id)
+            if previous is not None:
+                job.force_regenerate = job.force_regenerate or previous.force_regenerate
+            self._rerun[job.pr_id] = job
+            return 'deferred'
+        self._queued[job.pr_id] = job
+        self.queue.put_nowait(job)
+        return 'queued'
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job: ReviewJob = await self.queue.get()
+            self._queued.pop(job.pr_id, None)
+            self._in_flight.add(job.pr_id)
+            try:
+                logger.info(f"Worker {worker_id}: reviewing PR #{job.pr_id} ({job.source}, "
+                            f"waited {time.time() - job.received_at:.1f}s)")
+                item: BatchItemResult = await self.batch.review_one(job.pr_id, job.force_regenerate)
+                self.stats['failed' if item.status == 'failed' else 'completed'] += 1
+                self.recent.append({'pr_id': item.pr_id, 'status': item.status,
+                                    'duration': round(item.duration, 3), 'error': item.error})
+            finally:
+                self._in_flight.discard(job.pr_id)
+                self.queue.task_done()
+                rerun = self._rerun.pop(job.pr_id, None)
+                if rerun is not None:
+                    self.enqueue(rerun)
+
+    def _authorized(self, headers: Dict[str, str]) -> bool:
+        if not self.secret:
+            return True
+        token = headers.get('x-codeup-token') or headers.get('x-gitlab-token')
+        if token is None and headers.get('authorization', '').startswith('Bearer '):
+            token = headers['authorization'][len('Bearer '):]
+        return token is not None and hmac.compare_digest(token.encode(), self.secret.encode())
+
+    def _health(self) -> Dict[str, Any]:
+        return {
+            'status': 'ok',
+            'queued': self.queue.qsize(),
+            'in_flight': sorted(self._in_flight),
+            'workers': self.workers,
+            **self.stats,
+            'recent': list(self.recent),
+        }
+
+    async def handle_request(self, method: str, path: str, headers: Dict[str, str],
+                             body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Route one HTTP request and return (status code, JSON response body)."""
+        path = path.split('?', 1)[0]
+        if path == '/healthz':
+            return (200, self._health()) if method == 'GET' else (405, {'error': 'use GET'})
+        if path not in ('/webhook', '/review'):
+            return 404, {'error': f'unknown path {path}'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        if not self._authorized(headers):
+            return 401, {'error': 'invalid or missing token'}
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError as e:
+            return 400, {'error': f'invalid JSON: {e}'}
+        if not isinstance(payload, dict):
+            return 400, {'error': 'expected a JSON object'}
+
+        self.stats['received'] += 1
+        if path == '/webhook':
+            job, reason = parse_merge_request_event(payload, self.repository_id)
+            if job is None:
+                self.stats['ignored'] += 1
+                logger.info(f"Webhook ignored: {reason}")
+                return 200, {'queued': False, 'reason': reason}
+        else:
+            try:
+                job = ReviewJob(pr_id=int(payload['pr_id']), source='trigger',
+                                force_regenerate=bool(payload.get('force_regenerate', False)))
+            except (KeyError, TypeError, ValueError):
+                return 400, {'error': "expected {\"pr_id\": <int>}"}
+
+        outcome = self.enqueue(job)
+        logger.info(f"Review for PR #{job.pr_id} {outcome} ({job.source}), queue depth {self.queue.qsize()}")
+        return 202, {'queued': True, 'pr_id': job.pr_id, 'outcome': outcome, 'queue_depth': self.queue.qsize()}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        status, response = 500, {'error': 'internal error'}
+        try:
+            status, response = await asyncio.wait_for(self._read_and_route(reader), READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            status, response = 400, {'error': 'request timed out'}
+        except Exception as e:
+            logger.error(f"Review server request failed: {e}")
+        try:
+            payload = json.dumps(response, ensure_ascii=False).encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_and_route(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, Any]]:
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        parts = request_line.split(' ')
+        if len(parts) != 3:
+            return 400, {'error': 'malformed request line'}
+        method, path, _ = parts
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            return 400, {'error': 'invalid Content-Length'}
+        if length > MAX_BODY_BYTES:
+            return 413, {'error': f'body exceeds {MAX_BODY_BYTES} bytes'}
+        body = await reader.readexactly(length) if length > 0 else b''
+        return await self.handle_request(method, path, headers, body)
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080,
+                    ready: Optional[asyncio.Event] = None) -> None:
+        """Start the workers and serve HTTP until cancelled.
+
+        Args:
+            host: Interface to bind
+            port: TCP port (0 picks a free port, see self.port)
+            ready: Set once the socket is listening
+        """
+        if not self.secret:
+            logger.warning("YX_CC_WEBHOOK_SECRET is not set; webhook requests are not authenticated")
+        self._worker_tasks = [asyncio.create_task(self._worker(i), name=f"review-worker-{i}")
+                              for i in range(self.workers)]
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        logger.info(f"Review server listening on http://{host}:{self.port} with {self.workers} workers")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in self._worker_tasks:
+                task.cancel()
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+            logger.info("Review server stopped")
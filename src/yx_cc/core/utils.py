@@ -1,16 +1,109 @@
-import tiktoken
+import os
+import math
 import json
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import tiktoken
+
+# Calibrated against o200k_base on code diffs and mixed English/Chinese prose
+# (see benchmarks/bench_token_counting.py); both err towards over-counting.
+ASCII_CHARS_PER_TOKEN = 3.6
+NON_ASCII_TOKENS_PER_CHAR = 1.0
+# Estimates within this fraction of a budget fall back to an exact count
+TOKEN_ESTIMATE_MARGIN = 0.15
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = "gpt-4o") -> "tiktoken.Encoding":
+    """Return the process-wide tiktoken encoding for a model.
+
+    tiktoken is imported here rather than at module level because most budget
+    checks are settled by estimate_tokens and never need the encoder.
+    """
+    import tiktoken
+    return tiktoken.encoding_for_model(model_name)
+
 
 def num_tokens_from_string(text: str, model_name: str = "gpt-4o") -> int:
     """Return number of tokens in a text string for a specified model."""
-    encoding = tiktoken.encoding_for_model(model_name)
-    tokens = encoding.encode(text)
+    tokens = get_encoding(model_name).encode(text, disallowed_special=())
     return len(tokens)
 
 
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text in O(n) without tokenizing it.
+
+    ASCII characters (code, English) and other characters (mostly CJK) are
+    weighted separately because their token density differs by ~4x.
+    """
+    non_ascii = len(text) - len(text.encode('ascii', 'ignore'))
+    return estimate_tokens_from_counts(len(text) - non_ascii, non_ascii)
+
+
+def estimate_tokens_from_counts(ascii_chars: int, non_ascii_chars: int) -> int:
+    """Token estimate from character counts, for callers that tally them while scanning text."""
+    return math.ceil(ascii_chars / ASCII_CHARS_PER_TOKEN + non_ascii_chars * NON_ASCII_TOKENS_PER_CHAR)
+
+
+def count_tokens_for_budget(text: str, budget: int, model_name: str = "gpt-4o",
+                            estimate: Optional[int] = None) -> int:
+    """Return a token count good enough to compare against budget.
+
+    Uses the O(n) estimate when it is clearly above or below the budget and only
+    tokenizes the text exactly when the estimate falls within TOKEN_ESTIMATE_MARGIN.
+    A precomputed estimate (e.g. ParsedDiff.tokens) skips the scan.
+    """
+    if estimate is None:
+        estimate = estimate_tokens(text)
+    if estimate < budget * (1 - TOKEN_ESTIMATE_MARGIN) or estimate > budget * (1 + TOKEN_ESTIMATE_MARGIN):
+        return estimate
+    return num_tokens_from_string(text, model_name)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: str = "gpt-4o") -> str:
+    """Return the longest prefix of text that encodes to at most max_tokens tokens."""
+    encoding = get_encoding(model_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    # A cut inside a multi-byte character decodes to a replacement char; drop it
+    return encoding.decode(tokens[:max(0, max_tokens)]).rstrip('\ufffd')
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to default when unset or invalid."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float environment variable, falling back to default when unset or invalid."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable ('1', 'true', 'yes', 'on' are truthy)."""
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 def split_thinking_and_json(content: str) -> tuple[str, str]:
     """
     Split a combined model output into (thinking, raw_json_string).
@@ -1,13 +1,57 @@
-"""Integration modules for external services."""
+"""Integration modules for external services.
 
-from .claude_code_runner import ClaudeCodeRunner
-from .openai_runner import OpenAIRunner
-from .ali_yunxiao import AliYunXiaoClient
-from .git_handler import GitHandler
+Exports are resolved on first access so that importing the package does not
+load the Claude Code SDK or the OpenAI client unless that backend is used.
+"""
+
+import importlib
+import os
+from typing import Any, Optional
+
+_EXPORTS = {
+    "ClaudeCodeRunner": ".claude_code_runner",
+    "OpenAIRunner": ".openai_runner",
+    "AliYunXiaoClient": ".ali_yunxiao",
+    "GitHandler": ".git_handler",
+}
+
+# LLM backend name -> (module, runner class), imported only when selected
+LLM_BACKENDS = {
+    "openai": (".openai_runner", "OpenAIRunner"),
+    "claude_code": (".claude_code_runner", "ClaudeCodeRunner"),
+}
 
 __all__ = [
     "ClaudeCodeRunner",
     "OpenAIRunner",
     "AliYunXiaoClient",
-    "GitHandler"
-]
\ No newline at end of file
+    "GitHandler",
+    "LLM_BACKENDS",
+    "create_llm_runner",
+]
+
+
+def create_llm_runner(backend: Optional[str] = None, **kwargs) -> Any:
+    """Create the LLM runner for a backend, importing only that backend's library.
+
+    Args:
+        backend: 'openai' or 'claude_code' (defaults to YX_CC_LLM_BACKEND, then 'openai')
+        **kwargs: Passed to the runner constructor
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = backend or os.getenv('YX_CC_LLM_BACKEND', 'openai')
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}'; expected one of {sorted(LLM_BACKENDS)}")
+    module_name, class_name = LLM_BACKENDS[backend]
+    runner_class = getattr(importlib.import_module(module_name, __name__), class_name)
+    return runner_class(**kwargs)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,35 @@
 """Ali YunXiao API client for repository management and PR operations."""
 
 import os
-import requests
-from typing import Dict, Any, Optional, List
+import re
+import sys
+import time
+import asyncio
+import httpx
+from collections import deque
+from contextlib import aclosing
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Iterator, AsyncIterator, Awaitable, Callable, Deque
 import urllib.parse
 from loguru import logger
 
+from .yunxiao_transport import TransportConfig, get_async_client
+from .retry_policy import RetryPolicy, CircuitOpenError, get_circuit_breaker, parse_retry_after
+from .response_cache import CacheEntry, PERMANENT, default_ttl, get_response_cache
+from .json_stream import JsonArrayStream
+
+if TYPE_CHECKING:
+    import requests
+
+_FULL_SHA_RE = re.compile(r'^[0-9a-fA-F]{40}$')
+
+# Pagination defaults for the list endpoints (changeRequests, branches)
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_PREFETCH_PAGES = 2
+DEFAULT_MAX_PAGES = 50
+
+# Streamed responses up to this size are also stored in the response cache
+STREAM_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
 
 class AliYunXiaoClient:
     """Client for Ali YunXiao repository management API."""
@@ -39,6 +63,12 @@ class AliYunXiaoClient:
                 "Repository ID not found. Set ALI_REPOSITORY_ID environment variable."
             )
 
+        # Keep-alive session for the synchronous API (created on first use) and pool settings for the async one
+        self.transport_config = TransportConfig.from_env()
+        self._sync_session = None
+        self.retry_policy = RetryPolicy.from_env()
+        self.response_cache = get_response_cache()
+
         logger.info("Ali YunXiao client initialized successfully")
 
     def get_pull_requests(self, state: Optional[str] = None, page: int = 1, per_page: int = 10) -> List[Dict[str, Any]]:
@@ -79,7 +109,7 @@ class AliYunXiaoClient:
 
         endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}'
         try:
-            result = self._make_request('GET', endpoint)
+            result = self._make_request('GET', endpoint, cache_ttl=default_ttl())
             logger.info(f"Retrieved detailed PR information for #{local_id}")
             return result
         except Exception as e:
@@ -100,13 +130,34 @@ class AliYunXiaoClient:
 
         endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/compares'
         try:
-            result = self._make_request('GET', endpoint, params=params)
+            result = self._make_request('GET', endpoint, params=params, cache_ttl=self._compare_cache_ttl(from_ref, to_ref))
             logger.info(f"Retrieved branch comparison between {from_ref} and {to_ref}")
             return result
         except Exception as e:
             logger.error(f"Failed to get branch comparison between {from_ref} and {to_ref}: {e}")
             raise
 
+    @staticmethod
+    def _compare_cache_ttl(from_ref: str, to_ref: str) -> float:
+        """Compares between two full commit SHAs are immutable and cached permanently."""
+        if _FULL_SHA_RE.match(from_ref or '') and _FULL_SHA_RE.match(to_ref or ''):
+            return PERMANENT
+        return default_ttl()
+
+    @staticmethod
+    def _compare_diffs(compare_result: Dict[str, Any]) -> Iterator[str]:
+        """Yield the non-empty per-file diff texts of a compare response."""
+        for diff_item in compare_result.get('diffs') or []:
+            diff_text = diff_item.get('diff', '')
+            if diff_text:
+                yield diff_text
+
+    def iter_compare_diffs(self, from_ref: str, to_ref: str, source_type: str = 'branch', target_type: str = 'branch') -> Iterator[str]:
+        """Yield a comparison's diff one file at a time, each ending in a newline."""
+        compare_result = self.get_branch_compare(from_ref, to_ref, source_type, target_type)
+        for diff_text in self._compare_diffs(compare_result):
+            yield f"{diff_text}\n"
+
     def get_diff_content_from_compare(self, from_ref: str, to_ref: str, source_type: str = 'branch', target_type: str = 'branch') -> str:
         """Get diff content as a unified string from branch comparison."""
         logger.debug(f"Getting diff content from comparison: {from_ref} -> {to_ref}")
@@ -114,14 +165,8 @@ class AliYunXiaoClient:
         try:
             compare_result = self.get_branch_compare(from_ref, to_ref, source_type, target_type)
 
-            # Extract diff content from the diffs array
-            diff_content = ""
-            diffs = compare_result.get('diffs', [])
-
-            for diff_item in diffs:
-                diff_text = diff_item.get('diff', '')
-                if diff_text:
-                    diff_content += diff_text + "\n"
+            # One join over the diffs array: repeated += is quadratic for large PRs
+            diff_content = ''.join(f"{diff_text}\n" for diff_text in self._compare_diffs(compare_result))
 
             logger.info(f"Extracted diff content, size: {len(diff_content)} characters")
             return diff_content
@@ -134,7 +179,7 @@ class AliYunXiaoClient:
         """Get information about a specific branch."""
         encoded_branch = urllib.parse.quote(branch_name, safe='')
         endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/branches/{encoded_branch}'
-        return self._make_request('GET', endpoint)
+        return self._make_request('GET', endpoint, cache_ttl=default_ttl())
 
     def get_branch_head_commit(self, branch_name: str) -> Optional[str]:
         """Get the head commit SHA for a given branch."""
@@ -152,10 +197,16 @@ class AliYunXiaoClient:
             logger.error(f"Failed to get head commit for branch {branch_name}: {e}")
             return None
 
-    def create_pr_comment(self, local_id: int, comment_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a comment on a pull request."""
+    def create_pr_comment(self, local_id: int, comment_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create a comment on a pull request.
+
+        The POST is only retried on transient failures when idempotency_key is given.
+        YunXiao does not document honouring the Idempotency-Key header, so a retry
+        can create a second comment; pass one only when the caller can tolerate or
+        detect that (InlineCommentPoster checks the PR's comments instead).
+        """
         endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}/comments'
-        return self._make_request('POST', endpoint, data=comment_data)
+        return self._make_request('POST', endpoint, data=comment_data, idempotency_key=idempotency_key)
 
     def update_pr_comment(self, local_id: int, comment_biz_id: str, content: str = None, resolved: bool = None) -> Dict[str, Any]:
         """Update an existing PR comment."""
@@ -191,8 +242,71 @@ class AliYunXiaoClient:
         endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/branches'
         return self._make_request('GET', endpoint, params=params)
 
-    def _make_request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None) -> Any:
-        """Make authenticated request to Ali YunXiao API."""
+    @property
+    def _session(self) -> "requests.Session":
+        """Keep-alive session for the synchronous API, created on first use."""
+        if self._sync_session is None:
+            import requests
+            self._sync_session = requests.Session()
+        return self._sync_session
+
+    def _is_retryable(self, method: str, endpoint: str, idempotency_key: Optional[str]) -> bool:
+        """Decide whether a request may be safely re-sent after a transient failure.
+
+        GET and PUT are idempotent, and POST .../comments/list is a read. Other POSTs
+        are only retried when the caller attached an idempotency key.
+        """
+        if method in ('GET', 'PUT'):
+            return True
+        if method == 'POST' and endpoint.endswith('/comments/list'):
+            return True
+        return idempotency_key is not None
+
+    def _build_headers(self, idempotency_key: Optional[str]) -> Dict[str, str]:
+        """Build request headers, attaching the idempotency key when provided."""
+        headers = {
+            'Content-Type': 'application/json',
+            'x-yunxiao-token': self.token
+        }
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        return headers
+
+    def _cache_lookup(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], cache_ttl: Optional[float],
+                      headers: Dict[str, str]) -> tuple[Optional[str], Optional[CacheEntry]]:
+        """Look up a cacheable GET, adding If-None-Match to headers when a stale entry has an ETag.
+
+        Returns:
+            (cache_key, entry); cache_key is None when the request is not cacheable
+        """
+        if method != 'GET' or cache_ttl is None or self.response_cache is None:
+            return None, None
+        query = urllib.parse.urlencode(sorted((params or {}).items()))
+        cache_key = f"{self.domain}{endpoint}?{query}"
+        entry = self.response_cache.get(cache_key)
+        if entry is not None and not entry.is_fresh() and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        return cache_key, entry
+
+    def _cache_store(self, cache_key: Optional[str], result: Any, etag: Optional[str], cache_ttl: Optional[float], size: int) -> None:
+        """Store a successful GET response if it can be served again later."""
+        if cache_key is None:
+            return
+        self.response_cache.misses += 1
+        if cache_ttl > 0 or etag:
+            self.response_cache.put(cache_key, result, etag, cache_ttl, size=size)
+
+    def _make_request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None,
+                      idempotency_key: Optional[str] = None, cache_ttl: Optional[float] = None) -> Any:
+        """Make authenticated request to Ali YunXiao API.
+
+        Transient failures (connection errors, 429 and 5xx) are retried with
+        exponential backoff for idempotent requests, and every request goes through
+        the endpoint's circuit breaker. GETs with a cache_ttl are served from the
+        response cache while fresh and revalidated with If-None-Match once stale.
+        """
+        import requests  # Only the synchronous API needs it; the async paths use httpx
+
         url = f"https://{self.domain}{endpoint}"
 
         logger.debug(f"Making {method} request to: {endpoint}")
@@ -201,42 +315,79 @@ class AliYunXiaoClient:
         if data:
             logger.debug(f"Request data keys: {list(data.keys())}")
 
-        headers = {
-            'Content-Type': 'application/json',
-            'x-yunxiao-token': self.token
-        }
+        if method not in ('GET', 'POST', 'PUT'):
+            logger.error(f"Unsupported HTTP method: {method}")
+            raise ValueError(f"Unsupported HTTP method: {method}")
 
-        try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-            elif method == 'POST':
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-            elif method == 'PUT':
-                response = requests.put(url, headers=headers, json=data, timeout=30)
-            else:
-                logger.error(f"Unsupported HTTP method: {method}")
-                raise ValueError(f"Unsupported HTTP method: {method}")
+        headers = self._build_headers(idempotency_key)
+        cache_key, cached = self._cache_lookup(method, endpoint, params, cache_ttl, headers)
+        if cached is not None and cached.is_fresh():
+            self.response_cache.hits += 1
+            logger.debug(f"Serving {method} {endpoint} from response cache")
+            return cached.value
+
+        retryable = self._is_retryable(method, endpoint, idempotency_key)
+        breaker = get_circuit_breaker(method, endpoint)
+        policy = self.retry_policy
+
+        for attempt in range(1, policy.max_attempts + 1):
+            if not breaker.allow_request():
+                logger.error(f"Circuit open for {breaker.name}, not sending {method} {endpoint}")
+                raise CircuitOpenError(f"YunXiao API circuit open for {breaker.name}")
+
+            can_retry = retryable and attempt < policy.max_attempts
+            try:
+                if method == 'GET':
+                    response = self._session.get(url, headers=headers, params=params, timeout=self.transport_config.timeout)
+                else:
+                    response = self._session.request(method, url, headers=headers, json=data, timeout=self.transport_config.timeout)
+            except requests.RequestException as e:
+                breaker.record_failure()
+                if can_retry:
+                    delay = policy.compute_delay(attempt)
+                    logger.warning(f"YunXiao {method} {endpoint} failed ({e}), retrying in {delay:.1f}s (attempt {attempt}/{policy.max_attempts})")
+                    time.sleep(delay)
+                    continue
+                logger.error(f"YunXiao API request failed for {method} {endpoint}: {e}")
+                raise RuntimeError(f"YunXiao API request failed: {e}")
 
             logger.debug(f"Response status: {response.status_code}")
-            response.raise_for_status()
+            if response.status_code in policy.retry_statuses:
+                breaker.record_failure()
+                if can_retry:
+                    delay = policy.compute_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+                    logger.warning(f"YunXiao {method} {endpoint} returned {response.status_code}, retrying in {delay:.1f}s (attempt {attempt}/{policy.max_attempts})")
+                    time.sleep(delay)
+                    continue
+            else:
+                breaker.record_success()
+
+            if response.status_code == 304 and cached is not None:
+                self.response_cache.revalidations += 1
+                self.response_cache.refresh(cache_key, cached, cache_ttl)
+                logger.debug(f"{method} {endpoint} not modified, serving cached response")
+                return cached.value
+
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                logger.error(f"YunXiao API request failed for {method} {endpoint}: {e}")
+                logger.error(f"Response status: {response.status_code}")
+                logger.error(f"Response content: {response.text[:500]}")  # Log first 500 chars
+                raise RuntimeError(f"YunXiao API request failed: {e}")
 
             try:
                 result = response.json()
                 logger.debug(f"Request successful, response type: {type(result)}")
+                self._cache_store(cache_key, result, response.headers.get('ETag'), cache_ttl, len(response.content))
                 return result
             except ValueError as json_error:
                 logger.error(f"Failed to parse JSON response from {method} {endpoint}: {json_error}")
                 logger.error(f"Response content: {response.text[:500]}")  # Log first 500 chars
                 raise RuntimeError(f"Invalid JSON response from YunXiao API: {json_error}")
 
-        except requests.RequestException as e:
-            logger.error(f"YunXiao API request failed for {method} {endpoint}: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response content: {e.response.text[:500]}")  # Log first 500 chars
-            raise RuntimeError(f"YunXiao API request failed: {e}")
-
-    def create_global_comment(self, local_id: int, content: str, patch_set_biz_id: str, resolved: bool = False, draft: bool = False) -> Dict[str, Any]:
+    def create_global_comment(self, local_id: int, content: str, patch_set_biz_id: str, resolved: bool = False, draft: bool = False,
+                              idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Create a global comment on a pull request."""
         logger.debug(f"Creating global comment on PR #{local_id}, content length: {len(content)}")
 
@@ -249,7 +400,7 @@ class AliYunXiaoClient:
         }
 
         try:
-            result = self.create_pr_comment(local_id, data)
+            result = self.create_pr_comment(local_id, data, idempotency_key=idempotency_key)
             logger.info(f"Successfully created global comment on PR #{local_id}")
             return result
         except Exception as e:
@@ -257,7 +408,8 @@ class AliYunXiaoClient:
             raise
 
     def create_inline_comment(self, local_id: int, content: str, file_path: str, line_number: int,
-                             from_patch_set_id: str, to_patch_set_id: str, resolved: bool = False, draft: bool = False) -> Dict[str, Any]:
+                             from_patch_set_id: str, to_patch_set_id: str, resolved: bool = False, draft: bool = False,
+                             idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Create an inline comment on a specific line in a pull request."""
         logger.debug(f"Creating inline comment on PR #{local_id} at {file_path}:{line_number}")
 
@@ -274,7 +426,7 @@ class AliYunXiaoClient:
         }
 
         try:
-            result = self.create_pr_comment(local_id, data)
+            result = self.create_pr_comment(local_id, data, idempotency_key=idempotency_key)
             logger.info(f"Successfully created inline comment on PR #{local_id} at {file_path}:{line_number}")
             return result
         except Exception as e:
@@ -318,21 +470,542 @@ class AliYunXiaoClient:
             logger.error(f"Failed to list comments for PR #{local_id}: {e}")
             raise
 
-    def find_pull_request_by_branch(self, source_branch: str, target_branch: str = 'master') -> Optional[Dict[str, Any]]:
-        """Find pull request by source and target branch."""
+    def iter_pull_requests(self, state: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE,
+                           max_pages: Optional[int] = DEFAULT_MAX_PAGES) -> Iterator[Dict[str, Any]]:
+        """Iterate over pull requests across all pages, fetching one page at a time."""
+        for page in range(1, (max_pages or sys.maxsize) + 1):
+            items = self.get_pull_requests(state=state, page=page, per_page=per_page)
+            items = items if isinstance(items, list) else []
+            yield from items
+            if len(items) < per_page:
+                return
+
+    def find_pull_request_by_branch(self, source_branch: str, target_branch: str = 'master',
+                                    per_page: int = DEFAULT_PAGE_SIZE) -> Optional[Dict[str, Any]]:
+        """Find pull request by source and target branch, searching every page of open PRs."""
         logger.debug(f"Searching for PR: {source_branch} -> {target_branch}")
 
         try:
-            prs = self.get_pull_requests(state='opened')
-            logger.debug(f"Found {len(prs) if isinstance(prs, list) else 'unknown'} open PRs to search")
-
-            for pr in prs:
+            searched = 0
+            for pr in self.iter_pull_requests(state='opened', per_page=per_page):
+                searched += 1
                 if (pr.get('sourceBranch') == source_branch and
                     pr.get('targetBranch') == target_branch):
                     logger.info(f"Found matching PR #{pr.get('localId')}: {pr.get('title', 'Unknown title')}")
                     return pr
 
-            logger.warning(f"No PR found for {source_branch} -> {target_branch}")
+            logger.warning(f"No PR found for {source_branch} -> {target_branch} after searching {searched} open PRs")
+            return None
+
+        except Exception as e:
+            logger.error(f"Failed to find PR by branch: {e}")
+            raise
+
+    # ------------------------------------------------------------------
+    # Async API: awaitable counterparts sharing a pooled keep-alive client
+    # ------------------------------------------------------------------
+
+    async def _make_request_async(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None,
+                                  idempotency_key: Optional[str] = None, cache_ttl: Optional[float] = None) -> Any:
+        """Make authenticated request to Ali YunXiao API over the shared async pool.
+
+        Uses the same retry policy, circuit breakers and response cache as _make_request.
+        """
+        url = f"https://{self.domain}{endpoint}"
+
+        logger.debug(f"Making async {method} request to: {endpoint}")
+        if params:
+            logger.debug(f"Request params: {params}")
+        if data:
+            logger.debug(f"Request data keys: {list(data.keys())}")
+
+        if method not in ('GET', 'POST', 'PUT'):
+            logger.error(f"Unsupported HTTP method: {method}")
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        headers = self._build_headers(idempotency_key)
+        cache_key, cached = self._cache_lookup(method, endpoint, params, cache_ttl, headers)
+        if cached is not None and cached.is_fresh():
+            self.response_cache.hits += 1
+            logger.debug(f"Serving {method} {endpoint} from response cache")
+            return cached.value
+
+        retryable = self._is_retryable(method, endpoint, idempotency_key)
+        breaker = get_circuit_breaker(method, endpoint)
+        policy = self.retry_policy
+        client = get_async_client(self.transport_config)
+
+        for attempt in range(1, policy.max_attempts + 1):
+            if not breaker.allow_request():
+                logger.error(f"Circuit open for {breaker.name}, not sending {method} {endpoint}")
+                raise CircuitOpenError(f"YunXiao API circuit open for {breaker.name}")
+
+            can_retry = retryable and attempt < policy.max_attempts
+            try:
+                if method == 'GET':
+                    response = await client.get(url, headers=headers, params=params)
+                else:
+                    response = await client.request(method, url, headers=headers, json=data)
+            except httpx.RequestError as e:
+                breaker.record_failure()
+                if can_retry:
+                    delay = policy.compute_delay(attempt)
+                    logger.warning(f"YunXiao {method} {endpoint} failed ({e!r}), retrying in {delay:.1f}s (attempt {attempt}/{policy.max_attempts})")
+                    await asyncio.sleep(delay)
+                    continue
+                logger.error(f"YunXiao API request failed for {method} {endpoint}: {e!r}")
+                raise RuntimeError(f"YunXiao API request failed: {e!r}")
+
+            logger.debug(f"Response status: {response.status_code} ({response.http_version})")
+            if response.status_code in policy.retry_statuses:
+                breaker.record_failure()
+                if can_retry:
+                    delay = policy.compute_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+                    logger.warning(f"YunXiao {method} {endpoint} returned {response.status_code}, retrying in {delay:.1f}s (attempt {attempt}/{policy.max_attempts})")
+                    await asyncio.sleep(delay)
+                    continue
+            else:
+                breaker.record_success()
+
+            if response.status_code == 304 and cached is not None:
+                self.response_cache.revalidations += 1
+                self.response_cache.refresh(cache_key, cached, cache_ttl)
+                logger.debug(f"{method} {endpoint} not modified, serving cached response")
+                return cached.value
+
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(f"YunXiao API request failed for {method} {endpoint}: {e}")
+                logger.error(f"Response status: {response.status_code}")
+                logger.error(f"Response content: {response.text[:500]}")  # Log first 500 chars
+                raise RuntimeError(f"YunXiao API request failed: {e}")
+
+            try:
+                result = response.json()
+                logger.debug(f"Request successful, response type: {type(result)}")
+                self._cache_store(cache_key, result, response.headers.get('ETag'), cache_ttl, len(response.content))
+                return result
+            except ValueError as json_error:
+                logger.error(f"Failed to parse JSON response from {method} {endpoint}: {json_error}")
+                logger.error(f"Response content: {response.text[:500]}")  # Log first 500 chars
+                raise RuntimeError(f"Invalid JSON response from YunXiao API: {json_error}")
+
+    async def _stream_array_async(self, endpoint: str, params: Optional[Dict[str, Any]], array_key: str,
+                                  cache_ttl: Optional[float] = None) -> AsyncIterator[Any]:
+        """Stream a GET response and yield the items of one top-level array as they are decoded.
+
+        The body is decoded incrementally (see JsonArrayStream), so the full JSON
+        tree is never built. The retry policy and circuit breaker apply as in
+        _make_request_async, but only until the first item is yielded; a failure
+        after that raises. A fresh or revalidated cache entry is served from the
+        response cache, and a body under STREAM_CACHE_MAX_BYTES is cached like a
+        regular GET.
+        """
+        url = f"https://{self.domain}{endpoint}"
+        logger.debug(f"Making streamed GET request to: {endpoint}")
+
+        headers = self._build_headers(None)
+        cache_key, cached = self._cache_lookup('GET', endpoint, params, cache_ttl, headers)
+        if cached is not None and cached.is_fresh():
+            self.response_cache.hits += 1
+            logger.debug(f"Serving GET {endpoint} from response cache")
+            for item in cached.value.get(array_key) or []:
+                yield item
+            return
+
+        breaker = get_circuit_breaker('GET', endpoint)
+        policy = self.retry_policy
+        client = get_async_client(self.transport_config)
+        yielded = False
+
+        for attempt in range(1, policy.max_attempts + 1):
+            if not breaker.allow_request():
+                logger.error(f"Circuit open for {breaker.name}, not sending GET {endpoint}")
+                raise CircuitOpenError(f"YunXiao API circuit open for {breaker.name}")
+
+            can_retry = attempt < policy.max_attempts
+            try:
+                async with client.stream('GET', url, headers=headers, params=params) as response:
+                    logger.debug(f"Response status: {response.status_code} ({response.http_version})")
+                    if response.status_code in policy.retry_statuses:
+                        breaker.record_failure()
+                        if can_retry:
+                            delay = policy.compute_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+                            logger.warning(f"YunXiao GET {endpoint} returned {response.status_code}, retrying in {delay:.1f}s (attempt {attempt}/{policy.max_attempts})")
+                            await asyncio.sleep(delay)
+                            continue
+                    else:
+                        breaker.record_success()
+
+                    if response.status_code == 304 and cached is not None:
+                        self.response_cache.revalidations += 1
+                        self.response_cache.refresh(cache_key, cached, cache_ttl)
+                        logger.debug(f"GET {endpoint} not modified, serving cached response")
+                        for item in cached.value.get(array_key) or []:
+                            yield item
+                        return
+
+                    if response.is_error:
+                        body = (await response.aread()).decode('utf-8', errors='replace')
+                        logger.error(f"YunXiao API request failed for GET {endpoint}: {response.status_code}")
+                        logger.error(f"Response content: {body[:500]}")  # Log first 500 chars
+                        raise RuntimeError(f"YunXiao API request failed: {response.status_code} for {endpoint}")
+
+                    decoder = JsonArrayStream(array_key)
+                    kept: Optional[List[Any]] = [] if cache_key is not None else None
+                    size = 0
+                    try:
+                        async for chunk in response.aiter_bytes():
+                            size += len(chunk)
+                            if size > STREAM_CACHE_MAX_BYTES:
+                                kept = None
+                            for item in decoder.feed(chunk):
+                                if kept is not None:
+                                    kept.append(item)
+                                yielded = True
+                                yield item
+                        for item in decoder.close():
+                            if kept is not None:
+                                kept.append(item)
+                            yielded = True
+                            yield item
+                    except ValueError as json_error:
+                        logger.error(f"Failed to parse JSON response from GET {endpoint}: {json_error}")
+                        raise RuntimeError(f"Invalid JSON response from YunXiao API: {json_error}")
+
+                    logger.debug(f"Streamed {decoder.items} items of '{array_key}' ({size} bytes)")
+                    if kept is not None:
+                        self._cache_store(cache_key, {**decoder.members, array_key: kept},
+                                          response.headers.get('ETag'), cache_ttl, size)
+                    return
+            except httpx.RequestError as e:
+                breaker.record_failure()
+                if can_retry and not yielded:
+                    delay = policy.compute_delay(attempt)
+                    logger.warning(f"YunXiao GET {endpoint} failed ({e!r}), retrying in {delay:.1f}s (attempt {attempt}/{policy.max_attempts})")
+                    await asyncio.sleep(delay)
+                    continue
+                logger.error(f"YunXiao API request failed for GET {endpoint}: {e!r}")
+                raise RuntimeError(f"YunXiao API request failed: {e!r}")
+
+    async def get_pull_requests_async(self, state: Optional[str] = None, page: int = 1, per_page: int = 10) -> List[Dict[str, Any]]:
+        """Async counterpart of get_pull_requests."""
+        logger.debug(f"Getting pull requests: state={state}, page={page}, per_page={per_page}")
+
+        params = {
+            'page': page,
+            'perPage': per_page,
+            'projectIds': self.repository_id
+        }
+        if state:
+            params['state'] = state
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/changeRequests'
+
+        try:
+            result = await self._make_request_async('GET', endpoint, params=params)
+            logger.info(f"Retrieved {len(result) if isinstance(result, list) else 'unknown'} pull requests")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to get pull requests: {e}")
+            raise
+
+    async def get_pull_request_changes_async(self, local_id: int, from_patch_set_id: str, to_patch_set_id: str) -> Dict[str, Any]:
+        """Async counterpart of get_pull_request_changes."""
+        params = {
+            'fromPatchSetId': from_patch_set_id,
+            'toPatchSetId': to_patch_set_id
+        }
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}/diffs/changeTree'
+        return await self._make_request_async('GET', endpoint, params=params)
+
+    async def get_specific_pull_request_async(self, local_id: int) -> Dict[str, Any]:
+        """Async counterpart of get_specific_pull_request."""
+        logger.debug(f"Getting detailed PR information for local ID: {local_id}")
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}'
+        try:
+            result = await self._make_request_async('GET', endpoint, cache_ttl=default_ttl())
+            logger.info(f"Retrieved detailed PR information for #{local_id}")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to get detailed PR information for #{local_id}: {e}")
+            raise
+
+    async def get_branch_compare_async(self, from_ref: str, to_ref: str, source_type: str = 'branch', target_type: str = 'branch', straight: bool = False) -> Dict[str, Any]:
+        """Async counterpart of get_branch_compare."""
+        logger.debug(f"Getting branch comparison: {from_ref} -> {to_ref}")
+
+        params = {
+            'from': from_ref,
+            'to': to_ref,
+            'sourceType': source_type,
+            'targetType': target_type,
+            'straight': str(straight).lower()
+        }
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/compares'
+        try:
+            result = await self._make_request_async('GET', endpoint, params=params, cache_ttl=self._compare_cache_ttl(from_ref, to_ref))
+            logger.info(f"Retrieved branch comparison between {from_ref} and {to_ref}")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to get branch comparison between {from_ref} and {to_ref}: {e}")
+            raise
+
+    async def iter_compare_diffs_async(self, from_ref: str, to_ref: str, source_type: str = 'branch',
+                                       target_type: str = 'branch') -> AsyncIterator[str]:
+        """Async counterpart of iter_compare_diffs.
+
+        The response is streamed: each entry of the diffs array is decoded and
+        yielded as it arrives, without building the whole compare result.
+        """
+        logger.debug(f"Streaming branch comparison: {from_ref} -> {to_ref}")
+        params = {
+            'from': from_ref,
+            'to': to_ref,
+            'sourceType': source_type,
+            'targetType': target_type,
+            'straight': 'false'
+        }
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/compares'
+        files = 0
+        async for diff_item in self._stream_array_async(endpoint, params, 'diffs',
+                                                        cache_ttl=self._compare_cache_ttl(from_ref, to_ref)):
+            diff_text = diff_item.get('diff', '') if isinstance(diff_item, dict) else ''
+            if diff_text:
+                files += 1
+                yield f"{diff_text}\n"
+        logger.info(f"Streamed comparison between {from_ref} and {to_ref}: {files} file diffs")
+
+    async def get_diff_content_from_compare_async(self, from_ref: str, to_ref: str, source_type: str = 'branch', target_type: str = 'branch') -> str:
+        """Async counterpart of get_diff_content_from_compare."""
+        logger.debug(f"Getting diff content from comparison: {from_ref} -> {to_ref}")
+
+        try:
+            # Streamed file by file, then one join: repeated += is quadratic for large PRs
+            diff_content = ''.join([diff_text async for diff_text in self.iter_compare_diffs_async(
+                from_ref, to_ref, source_type, target_type)])
+
+            logger.info(f"Extracted diff content, size: {len(diff_content)} characters")
+            return diff_content
+
+        except Exception as e:
+            logger.error(f"Failed to get diff content from comparison: {e}")
+            raise
+
+    async def get_branch_info_async(self, branch_name: str) -> Dict[str, Any]:
+        """Async counterpart of get_branch_info."""
+        encoded_branch = urllib.parse.quote(branch_name, safe='')
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/branches/{encoded_branch}'
+        return await self._make_request_async('GET', endpoint, cache_ttl=default_ttl())
+
+    async def get_branch_head_commit_async(self, branch_name: str) -> Optional[str]:
+        """Async counterpart of get_branch_head_commit."""
+        logger.debug(f"Getting head commit for branch: {branch_name}")
+        try:
+            branch_info = await self.get_branch_info_async(branch_name)
+            commit_sha = branch_info.get('commit', {}).get('id')
+            if commit_sha:
+                logger.info(f"Found head commit for branch {branch_name}: {commit_sha}")
+                return commit_sha
+            else:
+                logger.warning(f"Could not find head commit for branch {branch_name} in branch info: {branch_info}")
+                return None
+        except Exception as e:
+            logger.error(f"Failed to get head commit for branch {branch_name}: {e}")
+            return None
+
+    async def create_pr_comment_async(self, local_id: int, comment_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of create_pr_comment."""
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}/comments'
+        return await self._make_request_async('POST', endpoint, data=comment_data, idempotency_key=idempotency_key)
+
+    async def update_pr_comment_async(self, local_id: int, comment_biz_id: str, content: str = None, resolved: bool = None) -> Dict[str, Any]:
+        """Async counterpart of update_pr_comment."""
+        data = {}
+        if content is not None:
+            data['content'] = content
+        if resolved is not None:
+            data['resolved'] = resolved
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}/comments/{comment_biz_id}'
+        return await self._make_request_async('PUT', endpoint, data=data)
+
+    async def update_pull_request_async(self, local_id: int, title: str = None, description: str = None) -> Dict[str, Any]:
+        """Async counterpart of update_pull_request."""
+        data = {}
+        if title is not None:
+            data['title'] = title
+        if description is not None:
+            data['description'] = description
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}'
+        return await self._make_request_async('PUT', endpoint, data=data)
+
+    async def get_branches_async(self, page: int = 1, per_page: int = 10, search: str = None) -> List[Dict[str, Any]]:
+        """Async counterpart of get_branches."""
+        params = {
+            'page': page,
+            'perPage': per_page
+        }
+        if search:
+            params['search'] = search
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/branches'
+        return await self._make_request_async('GET', endpoint, params=params)
+
+    async def create_global_comment_async(self, local_id: int, content: str, patch_set_biz_id: str, resolved: bool = False, draft: bool = False,
+                                          idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of create_global_comment."""
+        logger.debug(f"Creating global comment on PR #{local_id}, content length: {len(content)}")
+
+        data = {
+            'comment_type': 'GLOBAL_COMMENT',
+            'content': content,
+            'patchset_biz_id': patch_set_biz_id,
+            'resolved': resolved,
+            'draft': draft
+        }
+
+        try:
+            result = await self.create_pr_comment_async(local_id, data, idempotency_key=idempotency_key)
+            logger.info(f"Successfully created global comment on PR #{local_id}")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to create global comment on PR #{local_id}: {e}")
+            raise
+
+    async def create_inline_comment_async(self, local_id: int, content: str, file_path: str, line_number: int,
+                                          from_patch_set_id: str, to_patch_set_id: str, resolved: bool = False, draft: bool = False,
+                                          idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of create_inline_comment."""
+        logger.debug(f"Creating inline comment on PR #{local_id} at {file_path}:{line_number}")
+
+        data = {
+            'comment_type': 'INLINE_COMMENT',
+            'content': content,
+            'file_path': file_path,
+            'line_number': line_number,
+            'from_patchset_biz_id': from_patch_set_id,
+            'to_patchset_biz_id': to_patch_set_id,
+            'patchset_biz_id': to_patch_set_id,  # Usually the target patch set
+            'resolved': resolved,
+            'draft': draft
+        }
+
+        try:
+            result = await self.create_pr_comment_async(local_id, data, idempotency_key=idempotency_key)
+            logger.info(f"Successfully created inline comment on PR #{local_id} at {file_path}:{line_number}")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to create inline comment on PR #{local_id} at {file_path}:{line_number}: {e}")
+            raise
+
+    async def list_merge_request_comments_async(self, local_id: int, comment_type: Optional[str] = None,
+                                                file_path: Optional[str] = None, resolved: Optional[bool] = None,
+                                                state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Async counterpart of list_merge_request_comments."""
+        logger.debug(f"Listing comments for PR #{local_id}")
+
+        data = {}
+        if comment_type:
+            data['comment_type'] = comment_type
+        if file_path:
+            data['file_path'] = file_path
+        if resolved is not None:
+            data['resolved'] = resolved
+        if state:
+            data['state'] = state
+
+        endpoint = f'/oapi/v1/codeup/organizations/{self.organization_id}/repositories/{self.repository_id}/changeRequests/{local_id}/comments/list'
+
+        try:
+            result = await self._make_request_async('POST', endpoint, data=data)
+            logger.info(f"Retrieved {len(result) if isinstance(result, list) else 'unknown'} comments for PR #{local_id}")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to list comments for PR #{local_id}: {e}")
+            raise
+
+    async def _iter_pages_async(self, fetch_page: Callable[[int], Awaitable[Any]], per_page: int,
+                                prefetch: int, max_pages: Optional[int]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield items page by page while keeping up to `prefetch` further pages in flight.
+
+        Iteration ends at the first short page (fewer than per_page items) or after
+        max_pages pages. Pages still in flight when the consumer stops are cancelled.
+        """
+        pending: Deque[asyncio.Task] = deque()
+        next_page = 1
+        last_page = max_pages or sys.maxsize
+
+        def schedule() -> None:
+            nonlocal next_page
+            while len(pending) <= prefetch and next_page <= last_page:
+                pending.append(asyncio.create_task(fetch_page(next_page)))
+                next_page += 1
+
+        try:
+            schedule()
+            while pending:
+                items = await pending.popleft()
+                items = items if isinstance(items, list) else []
+                for item in items:
+                    yield item
+                if len(items) < per_page:
+                    return
+                schedule()
+        finally:
+            for task in pending:
+                task.cancel()
+            # Drain cancelled/failed prefetches so their exceptions are not reported as unretrieved
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def iter_pull_requests_async(self, state: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE,
+                                 prefetch: int = DEFAULT_PREFETCH_PAGES,
+                                 max_pages: Optional[int] = DEFAULT_MAX_PAGES) -> AsyncIterator[Dict[str, Any]]:
+        """Stream pull requests across all pages, prefetching the next pages concurrently.
+
+        Args:
+            state: Filter by PR state ('opened', 'merged', 'closed')
+            per_page: Page size requested from the API
+            prefetch: Number of pages fetched ahead of the one being consumed
+            max_pages: Upper bound on pages walked (None for unbounded)
+        """
+        return self._iter_pages_async(
+            lambda page: self.get_pull_requests_async(state=state, page=page, per_page=per_page),
+            per_page, prefetch, max_pages
+        )
+
+    def iter_branches_async(self, search: str = None, per_page: int = DEFAULT_PAGE_SIZE,
+                            prefetch: int = DEFAULT_PREFETCH_PAGES,
+                            max_pages: Optional[int] = DEFAULT_MAX_PAGES) -> AsyncIterator[Dict[str, Any]]:
+        """Stream branches across all pages, prefetching the next pages concurrently."""
+        return self._iter_pages_async(
+            lambda page: self.get_branches_async(page=page, per_page=per_page, search=search),
+            per_page, prefetch, max_pages
+        )
+
+    async def find_pull_request_by_branch_async(self, source_branch: str, target_branch: str = 'master',
+                                                per_page: int = DEFAULT_PAGE_SIZE,
+                                                prefetch: int = DEFAULT_PREFETCH_PAGES) -> Optional[Dict[str, Any]]:
+        """Async counterpart of find_pull_request_by_branch; stops paging at the first match."""
+        logger.debug(f"Searching for PR: {source_branch} -> {target_branch}")
+
+        try:
+            searched = 0
+            async with aclosing(self.iter_pull_requests_async(state='opened', per_page=per_page, prefetch=prefetch)) as prs:
+                async for pr in prs:
+                    searched += 1
+                    if (pr.get('sourceBranch') == source_branch and
+                        pr.get('targetBranch') == target_branch):
+                        logger.info(f"Found matching PR #{pr.get('localId')}: {pr.get('title', 'Unknown title')}")
+                        return pr
+
+            logger.warning(f"No PR found for {source_branch} -> {target_branch} after searching {searched} open PRs")
             return None
 
         except Exception as e:
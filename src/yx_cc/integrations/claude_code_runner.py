@@ -4,7 +4,9 @@ from claude_code_sdk import ClaudeSDKClient, ClaudeCodeOptions
 import asyncio
 from typing import Optional, Dict, Any, Literal
 from loguru import logger
-from ..core.utils import num_tokens_from_string, JsonDumper
+from ..core.utils import count_tokens_for_budget, estimate_tokens, JsonDumper
+from ..core.llm_stream import StreamHandler, StreamMeter
+from ..core.llm_cache import LLMResponseCache, get_llm_cache
 
 
 
@@ -22,24 +24,45 @@ class ClaudeCodeRunner:
         self.json_dumper = JsonDumper()
         logger.debug("JSON dumper initialized for Claude Code runner")
 
-    def run(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None) -> str:
+        # Persistent response cache (None when YX_CC_LLM_CACHE is disabled)
+        self.llm_cache = get_llm_cache()
+
+    def run(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None,
+            bypass_cache: bool = False) -> str:
         """Run a synchronous Claude Code SDK call."""
-        return asyncio.run(self.run_async(system_prompt, prompt, max_turns))
+        return asyncio.run(self.run_async(system_prompt, prompt, max_turns, bypass_cache))
+
+    async def run_async(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None,
+                        bypass_cache: bool = False, stream_handler: Optional[StreamHandler] = None) -> str:
+        """Run an asynchronous Claude Code SDK call.
 
-    async def run_async(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None) -> str:
-        """Run an asynchronous Claude Code SDK call."""
+        Identical requests are answered from the LLM response cache. With
+        bypass_cache the SDK is always called and the cached entry is replaced.
+        stream_handler receives each text block as it arrives and the call's
+        metrics when it completes.
+        """
         turns = max_turns if max_turns is not None else self.max_turns
-        
-        num_system_prompt_tokens = num_tokens_from_string(system_prompt)
-        num_user_prompt_tokens = num_tokens_from_string(prompt)
+
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key = LLMResponseCache.make_key(
+                'claude_code', None, None, system_prompt, prompt,
+                permission_mode=self.permission_mode, max_turns=turns
+            )
+            if not bypass_cache:
+                cached = self.llm_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Claude response served from cache, response length: {len(cached)} characters")
+                    return cached
 
         logger.debug(f"Starting Claude Code SDK call with max_turns={turns}")
-        logger.debug(f"System prompt length: {num_system_prompt_tokens} tokens")
-        logger.debug(f"User prompt length: {num_user_prompt_tokens} tokens")
-        
-        # Limit prompt length under 30K 
-        if num_system_prompt_tokens + num_user_prompt_tokens > self.max_tokens: 
-            raise ValueError(f"Combined prompt length exceeds maximum limit of {self.max_tokens} tokens, current token length is {num_system_prompt_tokens + num_user_prompt_tokens}")
+        logger.debug(f"System prompt length: ~{estimate_tokens(system_prompt)} tokens")
+        logger.debug(f"User prompt length: ~{estimate_tokens(prompt)} tokens")
+
+        # Limit prompt length to max_tokens; tokenizes exactly only when close to the limit
+        num_prompt_tokens = count_tokens_for_budget(system_prompt + "\n" + prompt, self.max_tokens)
+        if num_prompt_tokens > self.max_tokens:
+            raise ValueError(f"Combined prompt length exceeds maximum limit of {self.max_tokens} tokens, current token length is {num_prompt_tokens}")
 
         try:
             async with ClaudeSDKClient(
@@ -50,6 +73,7 @@ class ClaudeCodeRunner:
                 )
             ) as client:
                 logger.debug("Claude SDK client initialized, sending query")
+                meter = StreamMeter()
                 await client.query(prompt)
 
                 chunks = []
@@ -63,10 +87,36 @@ class ClaudeCodeRunner:
                     if hasattr(message, 'content'):
                         for block in getattr(message, 'content', []) or []:
                             if hasattr(block, 'text') and isinstance(block.text, str):
+                                meter.mark()
                                 chunks.append(block.text)
+                                if stream_handler is not None:
+                                    await stream_handler.on_delta(block.text)
+
+                    usage = getattr(message, 'usage', None)
+                    if isinstance(usage, dict):
+                        # The final result message reports input split into fresh, cache-read and cache-write tokens
+                        cached = usage.get('cache_read_input_tokens') or 0
+                        meter.record_usage(
+                            prompt_tokens=(usage.get('input_tokens') or 0) + cached
+                                          + (usage.get('cache_creation_input_tokens') or 0),
+                            cached_tokens=cached,
+                            output_tokens=usage.get('output_tokens')
+                        )
 
                 result = ''.join(chunks).strip()
-                logger.info(f"Claude SDK call completed successfully, response length: {len(result)} characters")
+                metrics = meter.finish(result)
+                if stream_handler is not None:
+                    stream_handler.on_complete(metrics)
+                ttft = f"{metrics.ttft:.2f}s" if metrics.ttft is not None else "n/a"
+                logger.info(
+                    f"Claude SDK call completed successfully, response length: {len(result)} characters "
+                    f"(TTFT {ttft}, {metrics.tokens_per_second:.1f} tokens/s, {metrics.duration:.1f}s total, "
+                    f"cached prompt tokens {metrics.cached_tokens if metrics.cached_tokens is not None else 'n/a'}"
+                    f"/{metrics.prompt_tokens if metrics.prompt_tokens is not None else 'n/a'})"
+                )
+
+                if cache_key is not None and result:
+                    self.llm_cache.put(cache_key, result, {'provider': 'claude_code'})
 
                 # Dump Claude response to JSON file
                 try:
@@ -77,7 +127,8 @@ class ClaudeCodeRunner:
                         'max_turns': turns,
                         'response': result,
                         'response_length': len(result),
-                        'message_count': message_count
+                        'message_count': message_count,
+                        'metrics': metrics.to_dict()
                     }
                     json_file_path = self.json_dumper.dump_results("claude_response", claude_data)
                     logger.debug(f"Claude response dumped to: {json_file_path}")
@@ -90,10 +141,11 @@ class ClaudeCodeRunner:
             logger.error(f"Claude Code SDK call failed: {e}")
             raise
 
-    def run_with_context(self, system_prompt: str, prompt: str, context: Dict[str, Any], max_turns: Optional[int] = None) -> str:
+    def run_with_context(self, system_prompt: str, prompt: str, context: Dict[str, Any], max_turns: Optional[int] = None,
+                         bypass_cache: bool = False) -> str:
         """Run with additional context information."""
         enhanced_prompt = self._build_prompt_with_context(prompt, context)
-        return self.run(system_prompt, enhanced_prompt, max_turns)
+        return self.run(system_prompt, enhanced_prompt, max_turns, bypass_cache)
 
     def _build_prompt_with_context(self, prompt: str, context: Dict[str, Any]) -> str:
         """Build prompt with context information."""
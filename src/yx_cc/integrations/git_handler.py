@@ -1,46 +1,168 @@
 """Git operations handler for retrieving commit information and diffs."""
 
+import re
+import codecs
+import os
 import subprocess
 import json
-from datetime import datetime
-from typing import Dict, List, Any
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Set, Tuple
 from loguru import logger
 
+from .git_object_reader import GitObjectReader
+from ..core.utils import env_bool, env_int
+
+# Rename and copy statuses carry a similarity score and two paths
+_RENAME_STATUS_RE = re.compile(r'^[RC]\d+$')
+# Deepening rounds (doubling the step each time) before fetch_branches unshallows
+MAX_DEEPEN_ROUNDS = 5
+_SHORTSTAT_RE = re.compile(r"(\d+) files? changed(?:, (\d+) insertions?\(\+\))?(?:, (\d+) deletions?\(-\))?")
+
+
+def _format_git_date(timestamp: str, offset: str) -> str:
+    """Format a raw commit timestamp like git's default date format."""
+    sign = -1 if offset.startswith('-') else 1
+    tz = timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5])))
+    dt = datetime.fromtimestamp(int(timestamp), tz)
+    return f"{dt:%a %b} {dt.day} {dt:%H:%M:%S %Y} {offset}"
+
 
 class GitHandler:
-    """Handles Git operations for code review."""
-    
+    """Handles Git operations for code review.
+
+    Object lookups (file contents, commit metadata) go through one persistent
+    `git cat-file --batch` reader with a blob LRU cache instead of a `git show`
+    process per call; call close() to stop it.
+
+    Branch diffs are taken from the merge base of the two branches (what
+    `git diff base...target` shows), so commits that landed on the base branch
+    after the PR branched off don't appear as reverse changes. Merge bases are
+    cached by the resolved commit IDs of both branches.
+
+    fetch_branches() fetches just the two branches of a PR: shallow clones are
+    deepened only until the merge base arrives, and with a blob filter the
+    clone becomes partial, with file contents fetched in batches on demand.
+    Fetches are serialized: concurrent `git fetch`es in one repository race on
+    shallow.lock and the ref locks.
+    """
+
+    def __init__(self, repo_dir: Optional[str] = None):
+        """Initialize the handler.
+
+        Args:
+            repo_dir: Repository working directory (None uses the current directory)
+        """
+        self.repo_dir = repo_dir
+        self._object_reader: Optional[GitObjectReader] = None
+        self._reader_lock = threading.Lock()
+        self.merge_base_diff = env_bool('YX_CC_DIFF_MERGE_BASE', True)
+        self._merge_bases: Dict[Tuple[str, str], str] = {}
+        # Guards the merge base cache and the prefetched blob set, shared by concurrent reviews
+        self._state_lock = threading.Lock()
+        self.fetch_depth = env_int('YX_CC_GIT_FETCH_DEPTH', 50)
+        self.fetch_filter = os.getenv('YX_CC_GIT_FETCH_FILTER', '').strip()
+        # Reentrant: fetch_branches() holds it across its fetch_origin() rounds
+        self._fetch_lock = threading.RLock()
+        self._partial_clone: Optional[bool] = None
+        self._prefetched: Set[str] = set()
+
+    @property
+    def object_reader(self) -> GitObjectReader:
+        """The shared cat-file reader, started on first use."""
+        with self._reader_lock:
+            if self._object_reader is None:
+                self._object_reader = GitObjectReader(
+                    self.repo_dir, max_cache_bytes=env_int('YX_CC_GIT_BLOB_CACHE_MB', 64) * 1024 * 1024)
+            return self._object_reader
+
+    def close(self) -> None:
+        """Stop the cat-file reader processes."""
+        with self._reader_lock:
+            if self._object_reader is not None:
+                self._object_reader.close()
+
     def get_commit_info(self, commit_id: str) -> Dict[str, Any]:
         """Get detailed commit information."""
         logger.debug(f"Getting commit info for: {commit_id}")
 
         try:
-            # Get commit metadata
-            cmd = [
-                'git', 'show', '--format=fuller', '--name-status',
-                '--no-patch', commit_id
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            commit = self.object_reader.read(f"{commit_id}^{{commit}}")
+        except RuntimeError as e:
+            logger.error(f"Failed to get commit info for {commit_id}: {e}")
+            raise ValueError(f"Failed to get commit info for {commit_id}: {e}")
+        if commit is None:
+            logger.error(f"Failed to get commit info for {commit_id}: commit not found")
+            raise ValueError(f"Failed to get commit info for {commit_id}: commit not found")
 
-            # Parse commit info
-            lines = result.stdout.strip().split('\n')
-            commit_info = self._parse_commit_output(lines)
-            commit_info['commit_id'] = commit_id
+        commit_info = self._parse_raw_commit(commit.text())[0]
+        commit_info['files'] = self._name_status(commit_id)
+        commit_info['commit_id'] = commit_id
 
-            logger.debug(f"Retrieved commit info for {commit_id}: {commit_info.get('message', 'No message')[:50]}...")
-            return commit_info
+        logger.debug(f"Retrieved commit info for {commit_id}: {commit_info.get('message', 'No message')[:50]}...")
+        return commit_info
+
+    @staticmethod
+    def _parse_raw_commit(raw: str) -> Tuple[Dict[str, Any], Optional[str], List[str]]:
+        """Parse a raw commit object into (info, tree ID, parent IDs)."""
+        headers, _, message = raw.partition('\n\n')
+        info: Dict[str, Any] = {}
+        tree = None
+        parents = []
+        for line in headers.split('\n'):
+            if line.startswith(' '):
+                continue  # Continuation of a multi-line header such as gpgsig
+            key, _, value = line.partition(' ')
+            if key == 'tree':
+                tree = value
+            elif key == 'parent':
+                parents.append(value)
+            elif key in ('author', 'committer'):
+                # "<name> <<email>> <timestamp> <tz>"
+                ident, timestamp, offset = value.rsplit(' ', 2)
+                date = _format_git_date(timestamp, offset)
+                if key == 'author':
+                    info['author'] = ident
+                    info['date'] = date
+                else:
+                    info['committer'] = ident
+                    info['commit_date'] = date
+        info['message'] = message.strip()
+        return info, tree, parents
+
+    def _name_status(self, commit_id: str) -> List[Dict[str, str]]:
+        """Changed files of a commit, as `git show --name-status` lists them.
 
+        One `git diff-tree` call detects renames with edits (R<score>), type
+        changes (T), root commits and merges (combined statuses such as 'MM').
+        Renames and copies get 'old<TAB>new' filenames.
+        """
+        cmd = ['git', 'diff-tree', '-r', '-M', '--cc', '--root', '--no-commit-id', '--name-status', '-z', commit_id]
+        try:
+            result = subprocess.run(cmd, capture_output=True, check=True, cwd=self.repo_dir)
         except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to get commit info for {commit_id}: {e}")
-            raise ValueError(f"Failed to get commit info for {commit_id}: {e}")
-    
+            raise ValueError(f"Failed to list files of {commit_id}: {e.stderr.decode('utf-8', errors='replace').strip()}")
+        fields = result.stdout.decode('utf-8', errors='replace').split('\0')
+        files = []
+        i = 0
+        while i + 1 < len(fields):
+            status = fields[i]
+            if _RENAME_STATUS_RE.match(status) and i + 2 < len(fields):
+                files.append({'status': status, 'filename': f"{fields[i + 1]}\t{fields[i + 2]}"})
+                i += 3
+            else:
+                files.append({'status': status, 'filename': fields[i + 1]})
+                i += 2
+        return files
+
     def get_commit_diff(self, commit_id: str) -> str:
         """Get the diff content for a commit."""
         logger.debug(f"Getting diff for commit: {commit_id}")
 
         try:
             cmd = ['git', 'show', '--format=', commit_id]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8', errors='replace')
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8', errors='replace', cwd=self.repo_dir)
             diff_content = result.stdout
             logger.debug(f"Retrieved commit diff for {commit_id}, size: {len(diff_content)} characters")
             return diff_content
@@ -52,7 +174,7 @@ class GitHandler:
             logger.warning(f"Unicode decode error for commit {commit_id}, trying fallback: {e}")
             # Fallback: try with binary mode and manual decoding
             try:
-                result = subprocess.run(cmd, capture_output=True, check=True)
+                result = subprocess.run(cmd, capture_output=True, check=True, cwd=self.repo_dir)
                 diff_content = result.stdout.decode('utf-8', errors='replace')
                 logger.debug(f"Retrieved commit diff with fallback for {commit_id}, size: {len(diff_content)} characters")
                 return diff_content
@@ -63,51 +185,21 @@ class GitHandler:
     def get_file_diff(self, commit_id: str, file_path: str) -> str:
         """Get diff for a specific file."""
         try:
-            cmd = ['git', 'show', f'{commit_id}:{file_path}']
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return result.stdout
-            
-        except subprocess.CalledProcessError as e:
+            return self.get_file_content_at_commit(commit_id, file_path)
+        except ValueError as e:
             return f"Error getting file content: {e}"
     
     def get_current_timestamp(self) -> str:
         """Get current timestamp for metadata."""
         return datetime.now().isoformat()
     
-    def _parse_commit_output(self, lines: List[str]) -> Dict[str, Any]:
-        """Parse git show output into structured data."""
-        commit_info = {}
-        files = []
-        
-        for line in lines:
-            if line.startswith('Author:'):
-                commit_info['author'] = line.split(':', 1)[1].strip()
-            elif line.startswith('Date:'):
-                commit_info['date'] = line.split(':', 1)[1].strip()
-            elif line.startswith('CommitDate:'):
-                commit_info['commit_date'] = line.split(':', 1)[1].strip()
-            elif line.startswith('    '):  # Commit message lines
-                if 'message' not in commit_info:
-                    commit_info['message'] = ''
-                commit_info['message'] += line[4:] + '\n'
-            elif '\t' in line and any(line.startswith(status) for status in ['A', 'M', 'D', 'R', 'C']):
-                # File status line
-                status, filename = line.split('\t', 1)
-                files.append({'status': status, 'filename': filename})
-        
-        if 'message' in commit_info:
-            commit_info['message'] = commit_info['message'].strip()
-        
-        commit_info['files'] = files
-        return commit_info
-    
     def get_current_branch(self) -> str:
         """Get current branch name using Git command."""
         logger.debug("Getting current branch from Git")
         try:
             result = subprocess.run(
                 ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                capture_output=True, text=True, check=True
+                capture_output=True, text=True, check=True, cwd=self.repo_dir
             )
             branch = result.stdout.strip()
             logger.info(f"Current branch from Git: {branch}")
@@ -119,7 +211,6 @@ class GitHandler:
     def get_current_branch_from_env(self) -> str:
         """Get current branch name from CI environment variable."""
         logger.debug("Getting current branch from CI environment")
-        import os
         branch = os.getenv('CI_COMMIT_REF_NAME')
         if not branch:
             logger.warning("CI_COMMIT_REF_NAME environment variable not set")
@@ -127,57 +218,279 @@ class GitHandler:
         logger.info(f"Current branch from environment: {branch}")
         return branch
     
-    def fetch_origin(self) -> bool:
-        """Fetch latest changes from origin remote."""
-        logger.info("Fetching latest changes from origin")
+    def fetch_origin(self, branches: Optional[Iterable[str]] = None, options: Iterable[str] = ()) -> bool:
+        """Fetch latest changes from origin remote.
+
+        Args:
+            branches: Only fetch these branches (into refs/remotes/origin/*, without
+                tags); None fetches everything
+            options: Extra `git fetch` options, e.g. '--depth=50'
+        """
+        cmd = ['git', 'fetch', *options, 'origin']
+        if branches is not None:
+            cmd[2:2] = ['--no-tags']
+            cmd += [f'+refs/heads/{b}:refs/remotes/origin/{b}' for b in dict.fromkeys(branches)]
+        logger.info(f"Fetching from origin: {' '.join(cmd[2:])}")
         try:
-            result = subprocess.run(
-                ['git', 'fetch', 'origin'],
-                capture_output=True, text=True, check=True
-            )
+            with self._fetch_lock:
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True, text=True, check=True, cwd=self.repo_dir
+                )
             logger.info("Successfully fetched from origin")
             return True
         except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to fetch from origin: {e}")
-            raise ValueError(f"Failed to fetch from origin: {e}")
-    
-    def get_branch_diff(self, base_branch: str, target_branch: str) -> str:
-        """Get diff between two branches."""
-        logger.debug(f"Getting diff between branches: origin/{base_branch}..origin/{target_branch}")
+            logger.error(f"Failed to fetch from origin: {e.stderr.strip() or e}")
+            raise ValueError(f"Failed to fetch from origin: {e.stderr.strip() or e}")
+
+    def is_shallow(self) -> bool:
+        result = subprocess.run(['git', 'rev-parse', '--is-shallow-repository'],
+                                capture_output=True, text=True, cwd=self.repo_dir)
+        return result.stdout.strip() == 'true'
+
+    def is_partial_clone(self) -> bool:
+        """Whether origin is a promisor remote, i.e. objects left out by a filter are fetched on demand."""
+        if self._partial_clone is None:
+            result = subprocess.run(['git', 'config', '--get', 'remote.origin.promisor'],
+                                    capture_output=True, text=True, cwd=self.repo_dir)
+            self._partial_clone = result.stdout.strip() == 'true'
+        return self._partial_clone
+
+    def fetch_branches(self, base_branch: str, target_branch: str) -> Dict[str, Any]:
+        """Fetch only the two branches of a PR, with just enough history for their merge base.
+
+        A full clone fetches both branch heads and nothing else. A shallow clone
+        fetches them YX_CC_GIT_FETCH_DEPTH commits deep, then deepens both
+        (doubling the step) until they share a merge base, and unshallows as a
+        last resort. YX_CC_GIT_FETCH_FILTER (e.g. 'blob:none') makes the clone
+        partial: file contents are only fetched when read. Concurrent calls
+        (batch reviewers, serve workers) run one after another.
+
+        Returns:
+            Fetch report: branches, shallow, filter, rounds (fetch commands run),
+            merge_base and elapsed seconds
+        """
+        start = time.monotonic()
+        branches = [base_branch, target_branch]
+        base_ref, target_ref = f'origin/{base_branch}', f'origin/{target_branch}'
+        options = [f'--filter={self.fetch_filter}'] if self.fetch_filter else []
+        with self._fetch_lock:
+            shallow = self.is_shallow()
+            self.fetch_origin(branches, options + ([f'--depth={self.fetch_depth}'] if shallow else []))
+            rounds = 1
+            merge_base = self.get_merge_base(base_ref, target_ref)
+            step = self.fetch_depth
+            while merge_base is None and shallow:
+                if rounds > MAX_DEEPEN_ROUNDS:
+                    logger.info(f"No merge base after {rounds} fetches, fetching the full history")
+                    self.fetch_origin(branches, options + ['--unshallow'])
+                    shallow = False
+                else:
+                    logger.debug(f"No merge base between {base_ref} and {target_ref} yet, deepening by {step}")
+                    self.fetch_origin(branches, options + [f'--deepen={step}'])
+                    shallow = self.is_shallow()
+                    step *= 2
+                rounds += 1
+                merge_base = self.get_merge_base(base_ref, target_ref)
+            # A filtered fetch turns the clone partial
+            self._partial_clone = None
+            shallow = self.is_shallow()
+
+        report = {
+            'branches': branches,
+            'shallow': shallow,
+            'filter': self.fetch_filter or None,
+            'rounds': rounds,
+            'merge_base': merge_base,
+            'elapsed': round(time.monotonic() - start, 3),
+        }
+        logger.info(f"Fetched {base_branch} and {target_branch} in {report['elapsed']:.2f}s "
+                    f"({rounds} fetch{'es' if rounds > 1 else ''}, merge base {merge_base or 'not found'})")
+        return report
 
+    def prefetch_blobs(self, commit_id: str, file_paths: Iterable[str]) -> int:
+        """Fetch the missing contents of files at a commit in one request (partial clones only).
+
+        Without this every missing blob costs its own lazy fetch when read.
+
+        Returns:
+            Number of blobs fetched
+        """
+        file_paths = list(file_paths)
+        if not file_paths or not self.is_partial_clone():
+            return 0
+        with self._fetch_lock:
+            # --missing=print lists absent objects as '?<oid>' without fetching them
+            result = subprocess.run(
+                ['git', 'rev-list', '--objects', '--no-walk', '--missing=print', commit_id, '--', *file_paths],
+                capture_output=True, text=True, cwd=self.repo_dir)
+            missing = [line[1:].strip() for line in result.stdout.splitlines() if line.startswith('?')]
+            with self._state_lock:
+                missing = [oid for oid in missing if oid not in self._prefetched]
+            if not missing:
+                return 0
+            # The request git makes for a lazy fetch, with every missing object at once
+            cmd = ['git', '-c', 'fetch.negotiationAlgorithm=noop', 'fetch', 'origin', '--no-tags',
+                   '--no-write-fetch-head', '--recurse-submodules=no', '--filter=blob:none', '--stdin']
+            try:
+                subprocess.run(cmd, input='\n'.join(missing) + '\n', capture_output=True, text=True,
+                               check=True, cwd=self.repo_dir)
+            except subprocess.CalledProcessError as e:
+                # Reads still work, one lazy fetch per blob
+                logger.warning(f"Blob prefetch failed: {e.stderr.strip() or e}")
+                return 0
+            with self._state_lock:
+                self._prefetched.update(missing)
+        logger.debug(f"Prefetched {len(missing)} blobs at {commit_id}")
+        return len(missing)
+
+    def resolve_commits(self, *revs: str) -> List[str]:
+        """Resolve revisions (branches, tags, abbreviated IDs) to full commit IDs."""
         try:
-            cmd = ['git', 'diff', f'origin/{base_branch}..origin/{target_branch}']
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8', errors='replace')
-            diff_content = result.stdout
-            logger.info(f"Successfully retrieved branch diff, size: {len(diff_content)} characters")
-            return diff_content
+            result = subprocess.run(['git', 'rev-parse'] + [f'{rev}^{{commit}}' for rev in revs],
+                                    capture_output=True, text=True, check=True, cwd=self.repo_dir)
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"Failed to resolve {', '.join(revs)}: {e.stderr.strip() or e}")
+        return result.stdout.split()
+
+    def get_merge_base(self, base_ref: str, target_ref: str) -> Optional[str]:
+        """Get the best common ancestor of two revisions.
+
+        Results are cached by the resolved commit IDs, so repeated lookups for
+        the same branch heads cost one `git rev-parse` only. A missing merge
+        base is not cached, as fetching more history can still reveal it.
 
+        Args:
+            base_ref: Base revision, e.g. 'origin/main'
+            target_ref: Target revision, e.g. 'origin/feature'
+
+        Returns:
+            Merge base commit ID, or None when the two histories share no commit
+            in this clone (unrelated branches, or a shallow clone cut above it)
+        """
+        key = tuple(self.resolve_commits(base_ref, target_ref))
+        with self._state_lock:
+            if key in self._merge_bases:
+                return self._merge_bases[key]
+        result = subprocess.run(['git', 'merge-base', *key], capture_output=True, text=True, cwd=self.repo_dir)
+        # Exit status 1 without output means there is no common ancestor
+        if result.returncode not in (0, 1):
+            raise ValueError(f"Failed to find merge base of {base_ref} and {target_ref}: {result.stderr.strip()}")
+        merge_base = result.stdout.strip() or None
+        if merge_base:
+            with self._state_lock:
+                self._merge_bases[key] = merge_base
+            logger.debug(f"Merge base of {base_ref} and {target_ref}: {merge_base}")
+        return merge_base
+
+    def _branch_range(self, base_branch: str, target_branch: str) -> str:
+        """Revision range for a branch comparison: merge base to target, or the two tips as a fallback."""
+        base_ref, target_ref = f'origin/{base_branch}', f'origin/{target_branch}'
+        if self.merge_base_diff:
+            merge_base = self.get_merge_base(base_ref, target_ref)
+            if merge_base:
+                return f'{merge_base}..{target_ref}'
+            logger.warning(f"No merge base between {base_ref} and {target_ref} in this clone, diffing branch tips")
+        return f'{base_ref}..{target_ref}'
+
+    def get_branch_diff(self, base_branch: str, target_branch: str) -> str:
+        """Get diff of the target branch against its merge base with the base branch."""
+        diff_content = ''.join(self.iter_branch_diff(base_branch, target_branch))
+        logger.info(f"Successfully retrieved branch diff, size: {len(diff_content)} characters")
+        return diff_content
+
+    def iter_branch_diff(self, base_branch: str, target_branch: str) -> Iterator[str]:
+        """Stream the diff of get_branch_diff as text chunks, without buffering git's output."""
+        try:
+            rev_range = self._branch_range(base_branch, target_branch)
+            logger.debug(f"Getting diff between branches {base_branch} and {target_branch}: {rev_range}")
+            yield from self._iter_diff(rev_range)
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to get diff between {base_branch} and {target_branch}: {e}")
             raise ValueError(f"Failed to get diff between {base_branch} and {target_branch}: {e}")
-        except UnicodeDecodeError as e:
-            logger.warning(f"Unicode decode error, trying fallback: {e}")
-            # Fallback: try with binary mode and manual decoding
-            try:
-                result = subprocess.run(cmd, capture_output=True, check=True)
-                diff_content = result.stdout.decode('utf-8', errors='replace')
-                logger.info(f"Successfully retrieved branch diff with fallback, size: {len(diff_content)} characters")
-                return diff_content
-            except Exception as fallback_e:
-                logger.error(f"Fallback also failed: {fallback_e}")
-                raise ValueError(f"Failed to decode diff output: {e}, fallback failed: {fallback_e}")
-    
+
+    def get_commit_range_diff(self, from_commit: str, to_commit: str) -> str:
+        """Get diff between two commits."""
+        diff_content = ''.join(self.iter_commit_range_diff(from_commit, to_commit))
+        logger.info(f"Successfully retrieved commit range diff, size: {len(diff_content)} characters")
+        return diff_content
+
+    def iter_commit_range_diff(self, from_commit: str, to_commit: str) -> Iterator[str]:
+        """Stream the diff between two commits as text chunks."""
+        logger.debug(f"Getting diff between commits: {from_commit}..{to_commit}")
+        try:
+            yield from self._iter_diff(f'{from_commit}..{to_commit}')
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Failed to get diff between {from_commit} and {to_commit}: {e}")
+            raise ValueError(f"Failed to get diff between {from_commit} and {to_commit}: {e}")
+
+    def _iter_diff(self, rev_range: str, chunk_bytes: int = 1024 * 1024) -> Iterator[str]:
+        """Run `git diff <rev_range>` and yield its output in decoded chunks, replacing undecodable bytes.
+
+        Raises:
+            subprocess.CalledProcessError: When git exits with an error, after the output is consumed
+        """
+        cmd = ['git', 'diff', rev_range]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=self.repo_dir)
+        # Incremental decoding keeps multi-byte characters split across reads intact
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        try:
+            for block in iter(lambda: proc.stdout.read(chunk_bytes), b''):
+                text = decoder.decode(block)
+                if text:
+                    yield text
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+        finally:
+            # Also reached when the consumer stops early: closing stdout ends git with SIGPIPE
+            proc.stdout.close()
+            stderr = proc.stderr.read()
+            proc.stderr.close()
+            returncode = proc.wait()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr.decode('utf-8', errors='replace'))
+
+    def get_diff_size_report(self, base_branch: str, target_branch: str) -> Dict[str, Any]:
+        """Compare the size of the merge-base diff with the diff between the branch tips.
+
+        Returns:
+            Dict with the merge base, the files/insertions/deletions of both
+            diffs, and how many changed lines the merge-base diff leaves out
+        """
+        base_ref, target_ref = f'origin/{base_branch}', f'origin/{target_branch}'
+        merge_base = self.get_merge_base(base_ref, target_ref)
+        tips = self._shortstat(f'{base_ref}..{target_ref}')
+        report: Dict[str, Any] = {'merge_base': merge_base, 'tips': tips}
+        if merge_base:
+            merge_base_stat = self._shortstat(f'{merge_base}..{target_ref}')
+            report['merge_base_diff'] = merge_base_stat
+            report['lines_saved'] = (tips['insertions'] + tips['deletions']
+                                     - merge_base_stat['insertions'] - merge_base_stat['deletions'])
+        return report
+
+    def _shortstat(self, rev_range: str) -> Dict[str, int]:
+        cmd = ['git', 'diff', '--shortstat', rev_range]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=self.repo_dir)
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"Failed to get diff stats for {rev_range}: {e}")
+        match = _SHORTSTAT_RE.search(result.stdout)
+        counts = [int(group or 0) for group in match.groups()] if match else [0, 0, 0]
+        return dict(zip(('files', 'insertions', 'deletions'), counts))
+
     def get_branch_diff_summary(self, base_branch: str, target_branch: str) -> Dict[str, Any]:
         """Get summary of changes between two branches."""
         try:
+            rev_range = self._branch_range(base_branch, target_branch)
             # Get file stats
-            cmd = ['git', 'diff', '--stat', f'origin/{base_branch}..origin/{target_branch}']
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            cmd = ['git', 'diff', '--stat', rev_range]
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=self.repo_dir)
             stat_output = result.stdout
             
             # Get list of changed files with their status
-            cmd = ['git', 'diff', '--name-status', f'origin/{base_branch}..origin/{target_branch}']
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            cmd = ['git', 'diff', '--name-status', rev_range]
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=self.repo_dir)
             
             files = []
             for line in result.stdout.strip().split('\n'):
@@ -201,17 +514,32 @@ class GitHandler:
     def get_file_content_at_commit(self, commit_id: str, file_path: str) -> str:
         """Get file content at a specific commit."""
         try:
-            cmd = ['git', 'show', f'{commit_id}:{file_path}']
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return result.stdout
-        except subprocess.CalledProcessError as e:
+            blob = self.object_reader.read(f'{commit_id}:{file_path}')
+        except RuntimeError as e:
             raise ValueError(f"Failed to get file content for {file_path} at {commit_id}: {e}")
+        if blob is None or blob.type != 'blob':
+            raise ValueError(f"Failed to get file content for {file_path} at {commit_id}: no such file")
+        return blob.text()
+
+    def get_files_at_commit(self, commit_id: str, file_paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Get the contents of many files at a commit in one pipelined cat-file round.
+
+        Returns:
+            File path -> content, or None for paths that don't exist at the commit
+        """
+        file_paths = list(file_paths)
+        self.prefetch_blobs(commit_id, file_paths)
+        blobs = self.object_reader.read_many(f'{commit_id}:{path}' for path in file_paths)
+        return {path: blob.text() if blob is not None and blob.type == 'blob' else None
+                for path, blob in zip(file_paths, blobs)}
 
     def get_commit_list(self, base_branch: str, target_branch: str) -> List[Dict[str, Any]]:
         """Get list of commits between two branches."""
         try:
+            # For git log a two-dot range already stops at the merge base: it lists
+            # commits reachable from target but not from base
             cmd = ['git', 'log', '--format=%H|%an|%ae|%ad|%s', f'origin/{base_branch}..origin/{target_branch}']
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=self.repo_dir)
 
             commits = []
             for line in result.stdout.strip().split('\n'):
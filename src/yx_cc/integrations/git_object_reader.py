@@ -0,0 +1,215 @@
+"""Long-lived `git cat-file --batch` reader serving many object lookups over one pipe."""
+
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import IO, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+# Revisions that always name the same object: a full object ID, optionally with ':<path>'
+_IMMUTABLE_REV_RE = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})(?::|$)")
+MAX_REV_ALIASES = 100_000
+
+
+@dataclass
+class GitObject:
+    """A git object read through cat-file. data is None for --batch-check lookups."""
+    oid: str
+    type: str
+    size: int
+    data: Optional[bytes] = None
+
+    def text(self) -> str:
+        return (self.data or b'').decode('utf-8', errors='replace')
+
+
+class _BatchProcess:
+    """One `git cat-file` process in --batch or --batch-check mode with binary framing.
+
+    Each request is '<rev>\\n'; each response is '<oid> <type> <size>\\n' followed,
+    in --batch mode, by <size> bytes of content and a '\\n', or a single
+    '<rev> missing\\n' / '<rev> ambiguous\\n' line.
+    """
+
+    def __init__(self, mode: str, repo_dir: Optional[str]):
+        self.mode = mode
+        self.repo_dir = repo_dir
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _ensure_started(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ['git', 'cat-file', f'--{self.mode}'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                cwd=self.repo_dir
+            )
+            logger.debug(f"Started git cat-file --{self.mode} (pid {self._proc.pid})")
+        return self._proc
+
+    def _read_response(self, stdout: IO[bytes], rev: str) -> Optional[GitObject]:
+        header = stdout.readline()
+        if not header:
+            raise BrokenPipeError(f"git cat-file --{self.mode} exited")
+        parts = header.rstrip(b'\n').decode('utf-8', errors='replace').rsplit(' ', 2)
+        if len(parts) != 3 or parts[2] in ('missing', 'ambiguous') or not parts[2].isdigit():
+            logger.debug(f"git cat-file: {rev} not found ({header.strip()!r})")
+            return None
+        oid, obj_type, size = parts[0], parts[1], int(parts[2])
+        data = None
+        if self.mode == 'batch':
+            data = stdout.read(size)
+            stdout.read(1)  # Trailing LF after the content
+        return GitObject(oid, obj_type, size, data)
+
+    def request(self, revs: List[str]) -> List[Optional[GitObject]]:
+        """Look up revs in one round of pipelined requests; restarts the process once if it died."""
+        for attempt in range(2):
+            proc = self._ensure_started()
+            try:
+                payload = b''.join(rev.encode('utf-8') + b'\n' for rev in revs)
+                # Write from a thread so a large batch can't deadlock on a full stdout pipe
+                writer = threading.Thread(target=self._write, args=(proc.stdin, payload), daemon=True)
+                writer.start()
+                results = [self._read_response(proc.stdout, rev) for rev in revs]
+                writer.join()
+                return results
+            except (BrokenPipeError, OSError) as e:
+                self.close()
+                if attempt:
+                    raise RuntimeError(f"git cat-file --{self.mode} failed: {e}") from e
+                logger.warning(f"git cat-file --{self.mode} died, restarting: {e}")
+        return []
+
+    @staticmethod
+    def _write(stdin: IO[bytes], payload: bytes) -> None:
+        try:
+            stdin.write(payload)
+            stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass  # Surfaces as EOF on the reading side
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+
+class GitObjectReader:
+    """Reads blobs, trees and commits through persistent `git cat-file` processes.
+
+    One --batch process serves content and one --batch-check process serves
+    type/size lookups, so fetching context for many files costs two processes
+    in total rather than one per file. Objects are immutable, so content is kept
+    in an LRU cache keyed by object ID (bounded by max_cache_bytes), and
+    revisions anchored at a full commit ID map straight to their cached object.
+    Thread-safe: requests are serialised per process.
+    """
+
+    def __init__(self, repo_dir: Optional[str] = None, max_cache_bytes: int = 64 * 1024 * 1024):
+        """Initialize the reader; processes start on first use.
+
+        Args:
+            repo_dir: Repository working directory (None uses the current directory)
+            max_cache_bytes: Maximum total size of cached object contents (0 disables caching)
+        """
+        self._batch = _BatchProcess('batch', repo_dir)
+        self._check = _BatchProcess('batch-check', repo_dir)
+        self._batch_lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self.max_cache_bytes = max_cache_bytes
+        self._cache: 'OrderedDict[str, GitObject]' = OrderedDict()
+        self._cache_bytes = 0
+        self._rev_to_oid: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, rev: str) -> Optional[GitObject]:
+        oid = self._rev_to_oid.get(rev, rev)
+        obj = self._cache.get(oid)
+        if obj is not None:
+            self._cache.move_to_end(oid)
+        return obj
+
+    def _remember(self, rev: str, obj: GitObject) -> None:
+        if _IMMUTABLE_REV_RE.match(rev):
+            if len(self._rev_to_oid) >= MAX_REV_ALIASES:
+                self._rev_to_oid.clear()
+            self._rev_to_oid[rev] = obj.oid
+        if obj.oid in self._cache or obj.size > self.max_cache_bytes:
+            return
+        self._cache[obj.oid] = obj
+        self._cache_bytes += obj.size
+        while self._cache_bytes > self.max_cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.size
+
+    def read_many(self, revs: Iterable[str]) -> List[Optional[GitObject]]:
+        """Read several objects, pipelining the cache misses through the --batch process.
+
+        Args:
+            revs: Anything cat-file accepts: object IDs, '<commit>:<path>', 'HEAD^{tree}', ...
+
+        Returns:
+            One GitObject (or None when missing) per rev, in order
+        """
+        revs = list(revs)
+        results: List[Optional[GitObject]] = [None] * len(revs)
+        misses: List[Tuple[int, str]] = []
+        with self._batch_lock:
+            for i, rev in enumerate(revs):
+                if '\n' in rev:
+                    continue  # Can't be framed on the request pipe
+                obj = self._cached(rev)
+                if obj is not None:
+                    results[i] = obj
+                    self.hits += 1
+                else:
+                    misses.append((i, rev))
+            if misses:
+                self.misses += len(misses)
+                for (i, rev), obj in zip(misses, self._batch.request([rev for _, rev in misses])):
+                    results[i] = obj
+                    if obj is not None:
+                        self._remember(rev, obj)
+        return results
+
+    def read(self, rev: str) -> Optional[GitObject]:
+        """Read one object's type, size and content, or None when it does not exist."""
+        return self.read_many([rev])[0]
+
+    def info_many(self, revs: Iterable[str]) -> List[Optional[GitObject]]:
+        """Look up object IDs, types and sizes without reading content (--batch-check)."""
+        revs = list(revs)
+        valid = [rev for rev in revs if '\n' not in rev]
+        with self._check_lock:
+            found = dict(zip(valid, self._check.request(valid))) if valid else {}
+        return [found.get(rev) for rev in revs]
+
+    def info(self, rev: str) -> Optional[GitObject]:
+        return self.info_many([rev])[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._batch_lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache),
+                    'bytes': self._cache_bytes}
+
+    def close(self) -> None:
+        """Stop the cat-file processes; the next lookup starts them again."""
+        with self._batch_lock:
+            self._batch.close()
+        with self._check_lock:
+            self._check.close()
+
+    def __enter__(self) -> 'GitObjectReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
@@ -0,0 +1,149 @@
+"""Incremental decoding of a JSON object whose bulk is one large array (e.g. the compare API's diffs)."""
+
+import codecs
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_WS_RE = re.compile(r'[ \t\n\r]*')
+# Smallest amount of new text to wait for before retrying an incomplete value
+MIN_RETRY_CHARS = 64 * 1024
+
+
+class JsonArrayStream:
+    """Decodes a JSON object fed in chunks, handing out the items of one of its arrays as each completes.
+
+    Values are decoded with JSONDecoder.raw_decode (the C scanner) once their
+    text has fully arrived, so only the value in progress is buffered and the
+    array's items are never held together. The object's other members are
+    decoded whole and kept in `members`. An incomplete value is retried only
+    after the unparsed text has doubled, which keeps the work linear even for
+    a single huge item arriving in many chunks.
+    """
+
+    def __init__(self, array_key: str):
+        """Initialize the decoder.
+
+        Args:
+            array_key: Top-level key of the array whose items are streamed
+        """
+        self.array_key = array_key
+        self.members: Dict[str, Any] = {}
+        self.items = 0
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._buf = ''
+        self._pos = 0
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._retry_chars = 0
+        self._state = 'start'
+        self._key: Optional[str] = None
+        self._error: Optional[ValueError] = None
+
+    def feed(self, data: bytes) -> List[Any]:
+        """Add the next chunk of the body; returns the array items it completed, in order."""
+        text = self._utf8.decode(data)
+        if text:
+            self._pending.append(text)
+            self._pending_chars += len(text)
+        if len(self._buf) - self._pos + self._pending_chars < self._retry_chars:
+            return []
+        return self._parse()
+
+    def close(self) -> List[Any]:
+        """Finish decoding; returns the remaining items.
+
+        Raises:
+            ValueError: If the body was not one complete JSON object
+        """
+        tail = self._utf8.decode(b'', final=True)
+        if tail:
+            self._pending.append(tail)
+        items = self._parse()
+        if self._state != 'done':
+            detail = f": {self._error}" if self._error else ''
+            raise ValueError(f"Incomplete JSON object (stopped while expecting {self._state}){detail}")
+        return items
+
+    def _decode(self, buf: str, pos: int) -> Tuple[Any, int]:
+        """Decode the value at pos; end is -1 while its text is incomplete."""
+        try:
+            value, end = self._decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            self._error = e
+            return None, -1
+        if end == len(buf) and buf[pos] in '-0123456789':
+            return None, -1  # The number may continue in the next chunk
+        return value, end
+
+    def _parse(self) -> List[Any]:
+        # Compact: drop consumed text and take in the pending chunks with one join
+        self._buf = self._buf[self._pos:] + ''.join(self._pending)
+        self._pos = 0
+        self._pending = []
+        self._pending_chars = 0
+        self._retry_chars = 0
+
+        items: List[Any] = []
+        buf = self._buf
+        while True:
+            pos = _WS_RE.match(buf, self._pos).end()
+            self._pos = pos
+            if pos >= len(buf):
+                return items
+            char = buf[pos]
+            state = self._state
+            end = pos + 1
+
+            if state == 'start':
+                self._expect(char, '{')
+                self._state = 'first key'
+            elif state in ('first key', 'key'):
+                if char == '}' and state == 'first key':
+                    self._state = 'done'
+                else:
+                    self._expect(char, '"')
+                    self._key, end = self._decode(buf, pos)
+                    self._state = 'colon'
+            elif state == 'colon':
+                self._expect(char, ':')
+                self._state = 'value'
+            elif state == 'value':
+                if self._key == self.array_key and char == '[':
+                    self._state = 'first item'
+                else:
+                    value, end = self._decode(buf, pos)
+                    if end >= 0:
+                        self.members[self._key] = value
+                    self._state = 'member separator'
+            elif state == 'member separator':
+                self._expect(char, ',}')
+                self._state = 'key' if char == ',' else 'done'
+            elif state in ('first item', 'item'):
+                if char == ']' and state == 'first item':
+                    self._state = 'member separator'
+                else:
+                    item, end = self._decode(buf, pos)
+                    if end >= 0:
+                        items.append(item)
+                        self.items += 1
+                    self._state = 'item separator'
+            elif state == 'item separator':
+                self._expect(char, ',]')
+                self._state = 'item' if char == ',' else 'member separator'
+            else:
+                raise ValueError(f"Extra data after JSON object at char {pos}")
+
+            if end < 0:
+                # Incomplete value: undo the transition and wait for more text
+                self._state = state
+                remaining = len(buf) - pos
+                self._retry_chars = max(2 * remaining, remaining + MIN_RETRY_CHARS)
+                return items
+            self._pos = end
+
+    def _expect(self, char: str, allowed: str) -> None:
+        if char not in allowed:
+            raise ValueError(f"Expecting {' or '.join(repr(c) for c in allowed)} while reading "
+                             f"{self._state}, got {char!r}")
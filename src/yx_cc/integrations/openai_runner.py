@@ -2,9 +2,11 @@
 
 import os
 import asyncio
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 from loguru import logger
-from ..core.utils import num_tokens_from_string, JsonDumper
+from ..core.utils import count_tokens_for_budget, estimate_tokens, env_bool, JsonDumper
+from ..core.llm_stream import StreamHandler, StreamMeter
+from ..core.llm_cache import LLMResponseCache, get_llm_cache
 
 try:
     from openai import AsyncOpenAI
@@ -47,22 +49,44 @@ class OpenAIRunner:
         self.json_dumper = JsonDumper()
         logger.debug("JSON dumper initialized for OpenAI runner")
 
-    def run(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None) -> str:
-        """Run a synchronous OpenAI API call."""
-        return asyncio.run(self.run_async(system_prompt, prompt, max_turns))
+        # Persistent response cache (None when YX_CC_LLM_CACHE is disabled)
+        self.llm_cache = get_llm_cache()
 
-    async def run_async(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None) -> str:
-        """Run an asynchronous OpenAI API call."""
-        
-        num_system_prompt_tokens = num_tokens_from_string(system_prompt)
-        num_user_prompt_tokens = num_tokens_from_string(prompt)
+        # Stream completions so progress and time-to-first-token are visible while generating
+        self.stream = env_bool('OPENAI_STREAM', True)
+        # Ask for a final usage chunk (prompt-cache hits); some compatible endpoints reject stream_options
+        self.stream_usage = env_bool('OPENAI_STREAM_USAGE', True)
 
-        logger.debug(f"System prompt length: {num_system_prompt_tokens} tokens")
-        logger.debug(f"User prompt length: {num_user_prompt_tokens} tokens")
-        
-        # Limit prompt length under 50K tokens
-        if num_system_prompt_tokens + num_user_prompt_tokens > self.max_tokens: 
-            raise ValueError(f"Combined prompt length exceeds maximum limit of {self.max_tokens} tokens, current token length is {num_system_prompt_tokens + num_user_prompt_tokens}")
+    def run(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None,
+            bypass_cache: bool = False) -> str:
+        """Run a synchronous OpenAI API call."""
+        return asyncio.run(self.run_async(system_prompt, prompt, max_turns, bypass_cache))
+
+    async def run_async(self, system_prompt: str, prompt: str, max_turns: Optional[int] = None,
+                        bypass_cache: bool = False, stream_handler: Optional[StreamHandler] = None) -> str:
+        """Run an asynchronous OpenAI API call.
+
+        Identical requests are answered from the LLM response cache. With
+        bypass_cache the provider is always called and the cached entry is replaced.
+        When streaming, stream_handler receives each delta as it arrives and the
+        call's metrics (time-to-first-token, tokens/s) when it completes.
+        """
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key = LLMResponseCache.make_key('openai', self.model, self.temperature, system_prompt, prompt)
+            if not bypass_cache:
+                cached = self.llm_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"OpenAI response served from cache, response length: {len(cached)} characters")
+                    return cached
+
+        logger.debug(f"System prompt length: ~{estimate_tokens(system_prompt)} tokens")
+        logger.debug(f"User prompt length: ~{estimate_tokens(prompt)} tokens")
+
+        # Limit prompt length to max_tokens; tokenizes exactly only when close to the limit
+        num_prompt_tokens = count_tokens_for_budget(system_prompt + "\n" + prompt, self.max_tokens)
+        if num_prompt_tokens > self.max_tokens:
+            raise ValueError(f"Combined prompt length exceeds maximum limit of {self.max_tokens} tokens, current token length is {num_prompt_tokens}")
 
         try:
             # Prepare messages for conversation
@@ -74,27 +98,44 @@ class OpenAIRunner:
             logger.debug("OpenAI client initialized, sending query")
 
             response_chunks = []
-            
-                
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                stream=False  # For simplicity, not streaming initially
-            )
-            
-            if response.choices and response.choices[0].message.content:
-                content = response.choices[0].message.content
+            meter = StreamMeter()
+
+            if self.stream:
+                content = await self._stream_completion(messages, meter, stream_handler)
+            else:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    stream=False
+                )
+                content = response.choices[0].message.content if response.choices else None
+                meter.mark()
+                self._record_usage(meter, response.usage)
+
+            if content:
                 response_chunks.append(content)
-                
+
                 # Add assistant response to conversation for potential next turn
                 messages.append({"role": "assistant", "content": content})
 
             else:
-                logger.warning(f"No content received in turn {turn + 1}")
+                logger.warning("No content received in OpenAI response")
 
             result = ''.join(response_chunks).strip()
-            logger.info(f"OpenAI API call completed successfully, response length: {len(result)} characters")
+            metrics = meter.finish(result)
+            if stream_handler is not None:
+                stream_handler.on_complete(metrics)
+            ttft = f"{metrics.ttft:.2f}s" if metrics.ttft is not None else "n/a"
+            logger.info(
+                f"OpenAI API call completed successfully, response length: {len(result)} characters "
+                f"(TTFT {ttft}, {metrics.tokens_per_second:.1f} tokens/s, {metrics.duration:.1f}s total, "
+                f"cached prompt tokens {metrics.cached_tokens if metrics.cached_tokens is not None else 'n/a'}"
+                f"/{metrics.prompt_tokens if metrics.prompt_tokens is not None else 'n/a'})"
+            )
+
+            if cache_key is not None and result:
+                self.llm_cache.put(cache_key, result, {'provider': 'openai', 'model': self.model})
 
             # Dump OpenAI response to JSON file
             try:
@@ -105,7 +146,8 @@ class OpenAIRunner:
                     'temperature': self.temperature,
                     'response': result,
                     'response_length': len(result),
-                    'turns_used': len(response_chunks)
+                    'turns_used': len(response_chunks),
+                    'metrics': metrics.to_dict()
                 }
                 json_file_path = self.json_dumper.dump_results("openai_response", openai_data)
                 logger.debug(f"OpenAI response dumped to: {json_file_path}")
@@ -118,10 +160,49 @@ class OpenAIRunner:
             logger.error(f"OpenAI API call failed: {e}")
             raise
 
-    def run_with_context(self, system_prompt: str, prompt: str, context: Dict[str, Any], max_turns: Optional[int] = None) -> str:
+    async def _stream_completion(self, messages: List[Dict[str, str]], meter: StreamMeter,
+                                 stream_handler: Optional[StreamHandler]) -> str:
+        """Consume a streamed chat completion, forwarding each delta to the handler."""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            stream=True,
+            **({'stream_options': {'include_usage': True}} if self.stream_usage else {})
+        )
+        parts = []
+        async for chunk in stream:
+            if getattr(chunk, 'usage', None) is not None:
+                # With include_usage the final chunk carries the usage and no choices
+                self._record_usage(meter, chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            meter.mark()
+            parts.append(delta)
+            if stream_handler is not None:
+                await stream_handler.on_delta(delta)
+        return ''.join(parts)
+
+    @staticmethod
+    def _record_usage(meter: StreamMeter, usage: Any) -> None:
+        """Record prompt, cached and completion tokens from a response's usage block."""
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        meter.record_usage(
+            prompt_tokens=getattr(usage, 'prompt_tokens', None),
+            cached_tokens=getattr(details, 'cached_tokens', None) if details is not None else None,
+            output_tokens=getattr(usage, 'completion_tokens', None)
+        )
+
+    def run_with_context(self, system_prompt: str, prompt: str, context: Dict[str, Any], max_turns: Optional[int] = None,
+                         bypass_cache: bool = False) -> str:
         """Run with additional context information."""
         enhanced_prompt = self._build_prompt_with_context(prompt, context)
-        return self.run(system_prompt, enhanced_prompt, max_turns)
+        return self.run(system_prompt, enhanced_prompt, max_turns, bypass_cache)
 
     def _build_prompt_with_context(self, prompt: str, context: Dict[str, Any]) -> str:
         """Build prompt with context information."""
@@ -0,0 +1,210 @@
+"""TTL + LRU response cache with ETag revalidation for YunXiao metadata endpoints."""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+from loguru import logger
+
+from ..core.utils import env_bool, env_float, env_int
+
+# TTL marker for responses that can never change (e.g. commit-to-commit compares)
+PERMANENT = math.inf
+
+
+@dataclass
+class CacheEntry:
+    """A cached JSON response. Values are shared between callers and must be treated as read-only."""
+    value: Any
+    etag: Optional[str]
+    expires_at: float  # wall-clock seconds; math.inf for permanent entries
+    size: int
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of JSON responses, in memory with an optional disk tier."""
+
+    def __init__(self, max_entries: int = 256, max_memory_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[Path] = None, max_disk_bytes: int = 256 * 1024 * 1024):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of in-memory entries
+            max_memory_bytes: Maximum total payload size held in memory
+            disk_dir: Directory for the persistent tier (None keeps the cache in memory only)
+            max_disk_bytes: Maximum total size of the disk tier
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            logger.debug(f"Response cache disk tier at: {self.disk_dir}")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key (fresh or stale), or None if absent."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            with self._lock:
+                self._store_memory(key, entry)
+        return entry
+
+    def put(self, key: str, value: Any, etag: Optional[str], ttl: float, size: Optional[int] = None) -> None:
+        """Store a response with the given TTL in seconds (PERMANENT never expires)."""
+        payload = None
+        if size is None or self.disk_dir:
+            payload = json.dumps(value, ensure_ascii=False)
+            size = len(payload)
+        entry = CacheEntry(value=value, etag=etag, expires_at=time.time() + ttl, size=size)
+        with self._lock:
+            self._store_memory(key, entry)
+        if self.disk_dir:
+            self._write_disk(key, entry, payload)
+
+    def refresh(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        """Extend a stale entry's lifetime after a 304 Not Modified revalidation."""
+        entry.expires_at = time.time() + ttl
+        if self.disk_dir:
+            self._write_disk(key, entry, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters."""
+        return {
+            'hits': self.hits,
+            'revalidations': self.revalidations,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'memory_bytes': self._memory_bytes
+        }
+
+    def _store_memory(self, key: str, entry: CacheEntry) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old.size
+        if entry.size > self.max_memory_bytes:
+            return
+        self._entries[key] = entry
+        self._memory_bytes += entry.size
+        while len(self._entries) > self.max_entries or self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            if record.get('key') != key:
+                return None
+            os.utime(path)  # Mark as recently used for disk LRU eviction
+            expires_at = record.get('expires_at')
+            return CacheEntry(
+                value=record['value'],
+                etag=record.get('etag'),
+                expires_at=math.inf if expires_at is None else expires_at,
+                size=path.stat().st_size
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable response cache file {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: CacheEntry, payload: Optional[str]) -> None:
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            if payload is None:
+                payload = json.dumps(entry.value, ensure_ascii=False)
+            expires_at = None if math.isinf(entry.expires_at) else entry.expires_at
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write('{"key": ')
+                f.write(json.dumps(key))
+                f.write(', "etag": ')
+                f.write(json.dumps(entry.etag))
+                f.write(', "expires_at": ')
+                f.write(json.dumps(expires_at))
+                f.write(', "value": ')
+                f.write(payload)
+                f.write('}')
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except Exception as e:
+            logger.warning(f"Failed to write response cache file {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _evict_disk(self) -> None:
+        files = []
+        total = 0
+        for path in self.disk_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_disk_bytes:
+            return
+        for _, size, path in sorted(files):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when ALI_YUNXIAO_CACHE is disabled."""
+    global _shared_cache
+    if not env_bool('ALI_YUNXIAO_CACHE', True):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            disk_dir = os.getenv('ALI_YUNXIAO_CACHE_DIR')
+            _shared_cache = ResponseCache(
+                max_entries=env_int('ALI_YUNXIAO_CACHE_MAX_ENTRIES', 256),
+                max_memory_bytes=env_int('ALI_YUNXIAO_CACHE_MAX_MEMORY_MB', 64) * 1024 * 1024,
+                disk_dir=Path(disk_dir).expanduser() if disk_dir else None,
+                max_disk_bytes=env_int('ALI_YUNXIAO_CACHE_MAX_DISK_MB', 256) * 1024 * 1024,
+            )
+        return _shared_cache
+
+
+def default_ttl() -> float:
+    """TTL in seconds for mutable metadata (PR details, branch heads, branch compares).
+
+    Defaults to 0: such responses are always revalidated with If-None-Match, so a new
+    push is never masked, while unchanged payloads are not downloaded again.
+    """
+    return env_float('ALI_YUNXIAO_CACHE_TTL', 0.0)
@@ -0,0 +1,163 @@
+"""Retry policy with exponential backoff and per-endpoint circuit breakers for YunXiao calls."""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Optional
+from loguru import logger
+
+from ..core.utils import env_float, env_int
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without sending a request while an endpoint's circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring Retry-After when present."""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build the policy from ALI_YUNXIAO_* environment variables."""
+        return cls(
+            max_attempts=max(1, env_int('ALI_YUNXIAO_MAX_RETRIES', 3) + 1),
+            base_delay=env_float('ALI_YUNXIAO_RETRY_BASE_DELAY', 0.5),
+            max_delay=env_float('ALI_YUNXIAO_RETRY_MAX_DELAY', 10.0),
+        )
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return how long to wait before the next attempt.
+
+        Args:
+            attempt: 1-based number of the attempt that just failed
+            retry_after: Server-provided delay in seconds, if any
+
+        Returns:
+            Delay in seconds, capped at max_delay
+        """
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_delay)
+        backoff = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, backoff)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize the breaker.
+
+        Args:
+            name: Endpoint key, used in logs
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before letting one probe through
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: let exactly one probe through until it reports back
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Record a healthy response and close the circuit."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit breaker for {self.name} closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a transient failure, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"Circuit breaker for {self.name} opened after {self._failures} consecutive failures; "
+                        f"failing fast for {self.reset_timeout:.0f}s"
+                    )
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+# Path segments that follow these literals are identifiers, not part of the endpoint shape
+_ID_PARENTS = {'organizations', 'repositories', 'changeRequests', 'branches', 'comments'}
+_LITERAL_CHILDREN = {'list'}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def endpoint_key(method: str, endpoint: str) -> str:
+    """Collapse identifiers in an endpoint path so one breaker covers one API operation."""
+    parts = endpoint.split('/')
+    for i in range(1, len(parts)):
+        if parts[i - 1] in _ID_PARENTS and parts[i] not in _LITERAL_CHILDREN:
+            parts[i] = '{id}'
+    return f"{method} {'/'.join(parts)}"
+
+
+def get_circuit_breaker(method: str, endpoint: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for an endpoint."""
+    key = endpoint_key(method, endpoint)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                key,
+                failure_threshold=env_int('ALI_YUNXIAO_BREAKER_THRESHOLD', 5),
+                reset_timeout=env_float('ALI_YUNXIAO_BREAKER_RESET', 30.0),
+            )
+            _breakers[key] = breaker
+        return breaker
@@ -0,0 +1,97 @@
+"""Shared, connection-pooled async HTTP transport for the Ali YunXiao API."""
+
+import asyncio
+import importlib.util
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional
+from loguru import logger
+
+import httpx
+
+from ..core.utils import env_bool, env_float, env_int
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Connection pool settings for the YunXiao transport."""
+    http2: bool = False
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """Build configuration from ALI_YUNXIAO_* environment variables."""
+        return cls(
+            http2=env_bool('ALI_YUNXIAO_HTTP2', False),
+            max_connections=env_int('ALI_YUNXIAO_MAX_CONNECTIONS', 20),
+            max_keepalive_connections=env_int('ALI_YUNXIAO_MAX_KEEPALIVE', 10),
+            keepalive_expiry=env_float('ALI_YUNXIAO_KEEPALIVE_EXPIRY', 30.0),
+            timeout=env_float('ALI_YUNXIAO_TIMEOUT', 30.0),
+        )
+
+
+# One pool per (event loop, config). httpx connections are bound to the loop that
+# opened them, so a client must never be shared across asyncio.run() invocations.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[TransportConfig, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http2_available() -> bool:
+    """Check whether the optional 'h2' package is installed."""
+    return importlib.util.find_spec('h2') is not None
+
+
+def get_async_client(config: Optional[TransportConfig] = None) -> httpx.AsyncClient:
+    """Return the shared pooled AsyncClient for the running event loop.
+
+    Args:
+        config: Pool configuration (defaults to TransportConfig.from_env())
+
+    Returns:
+        A keep-alive, gzip-enabled httpx.AsyncClient shared by all callers on this loop
+    """
+    config = config or TransportConfig.from_env()
+    loop = asyncio.get_running_loop()
+    loop_clients = _clients.setdefault(loop, {})
+
+    client = loop_clients.get(config)
+    if client is not None and not client.is_closed:
+        return client
+
+    http2 = config.http2
+    if http2 and not _http2_available():
+        logger.warning("ALI_YUNXIAO_HTTP2 is enabled but 'h2' is not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    client = httpx.AsyncClient(
+        http2=http2,
+        limits=limits,
+        timeout=httpx.Timeout(config.timeout),
+        headers={'Accept-Encoding': 'gzip'},
+    )
+    loop_clients[config] = client
+    logger.debug(
+        f"Created pooled YunXiao HTTP client (http2={http2}, max_connections={config.max_connections}, "
+        f"max_keepalive={config.max_keepalive_connections})"
+    )
+    return client
+
+
+async def close_async_clients() -> None:
+    """Close every pooled client opened on the running event loop."""
+    loop = asyncio.get_running_loop()
+    loop_clients = _clients.pop(loop, {})
+    for client in loop_clients.values():
+        if not client.is_closed:
+            await client.aclose()
+    if loop_clients:
+        logger.debug(f"Closed {len(loop_clients)} pooled YunXiao HTTP client(s)")
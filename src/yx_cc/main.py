@@ -1,12 +1,19 @@
 """Main CLI entry point for YX-CC PR review tool."""
 
+import os
 import sys
 import asyncio
+from typing import TYPE_CHECKING
 
-from .core.pr_reviewer import PRReviewer
 from .core.output_formatter import OutputFormatter
+from .core.utils import env_int
 from dotenv import load_dotenv
 
+# The reviewer, its HTTP clients and the LLM SDKs are imported by the commands that
+# use them, so `--help` and argument errors return without loading them
+if TYPE_CHECKING:
+    from .core.batch_reviewer import BatchSummary
+
 def main():
     """Main CLI entry point."""
     # Load environment variables from .env file
@@ -26,17 +33,46 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='YX-CC PR Review Tool')
+    parser.add_argument('command', nargs='?', choices=['review', 'serve'], default='review',
+                       help="'review' runs one review and exits (default); "
+                            "'serve' runs a webhook server that queues reviews")
     parser.add_argument('--target-branch', default='master', help='Target branch to compare against')
     parser.add_argument('--pr-id', type=int, help='Specific PR local ID to review')
     parser.add_argument('--modes', nargs='+', choices=['summary', 'analysis', 'comments'],
                        default=['summary', 'analysis', 'comments'],
                        help='Review modes to run (default: all phases)')
     parser.add_argument('--force-regenerate', action='store_true',
-                       help='Force regeneration of phases even if existing results found')
+                       help='Force regeneration of phases even if existing results found '
+                            '(also bypasses the LLM response cache)')
+    parser.add_argument('--batch', nargs='*', type=int, metavar='PR_ID',
+                       help='Review several PRs concurrently: the given PR local IDs, '
+                            'or all open PRs targeting --target-branch when no ID is given')
+    parser.add_argument('--batch-concurrency', type=int, default=env_int('YX_CC_BATCH_CONCURRENCY', 4),
+                       help='Maximum PRs reviewed at the same time in batch mode (default: 4)')
+    parser.add_argument('--host', default=os.getenv('YX_CC_SERVE_HOST', '127.0.0.1'),
+                       help='Interface the review server binds (serve only, default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=env_int('YX_CC_SERVE_PORT', 8080),
+                       help='Port the review server listens on (serve only, default: 8080)')
+    parser.add_argument('--workers', type=int, default=env_int('YX_CC_SERVE_WORKERS', 2),
+                       help='Reviews run concurrently by the server (serve only, default: 2)')
 
     args = parser.parse_args()
     
     try:
+        if args.command == 'serve':
+            try:
+                asyncio.run(run_review_server(args))
+            except KeyboardInterrupt:
+                pass
+            return
+
+        if args.batch is not None:
+            summary = asyncio.run(run_batch_review(args))
+            print_batch_result(summary)
+            if summary.failed:
+                sys.exit(1)
+            return
+
         # PR review using YunXiao + Claude Code SDK
         result = asyncio.run(run_pr_review(args))
         print_pr_result(result)
@@ -48,12 +84,63 @@ def main():
 
 async def run_pr_review(args):
     """Run PR review asynchronously."""
+    from .core.pr_reviewer import PRReviewer
+    from .integrations.yunxiao_transport import close_async_clients
+
     pr_reviewer = PRReviewer(modes=args.modes)
 
-    if args.pr_id:
-        return await pr_reviewer.review_specific_pr(args.pr_id, args.force_regenerate)
-    else:
-        return await pr_reviewer.review_current_pr(args.target_branch, args.force_regenerate)
+    try:
+        if args.pr_id:
+            return await pr_reviewer.review_specific_pr(args.pr_id, args.force_regenerate)
+        else:
+            return await pr_reviewer.review_current_pr(args.target_branch, args.force_regenerate)
+    finally:
+        # Release pooled keep-alive connections before the event loop shuts down
+        await close_async_clients()
+
+
+async def run_batch_review(args) -> "BatchSummary":
+    """Review many PRs concurrently, sharing one set of clients and caches."""
+    from .core.pr_reviewer import PRReviewer
+    from .core.batch_reviewer import BatchReviewer
+    from .integrations.yunxiao_transport import close_async_clients
+
+    batch_reviewer = BatchReviewer(PRReviewer(modes=args.modes), concurrency=args.batch_concurrency)
+
+    try:
+        pr_ids = args.batch or await batch_reviewer.find_open_prs(args.target_branch)
+        return await batch_reviewer.run(pr_ids, args.force_regenerate)
+    finally:
+        await close_async_clients()
+
+
+async def run_review_server(args):
+    """Serve webhook-triggered reviews with warm clients until interrupted."""
+    from .core.pr_reviewer import PRReviewer
+    from .core.review_server import ReviewServer
+    from .integrations.yunxiao_transport import close_async_clients
+
+    server = ReviewServer(PRReviewer(modes=args.modes), workers=args.workers,
+                          secret=os.getenv('YX_CC_WEBHOOK_SECRET'))
+    server.warm_up()
+
+    try:
+        await server.serve(args.host, args.port)
+    finally:
+        await close_async_clients()
+
+
+def print_batch_result(summary: "BatchSummary"):
+    """Print one line per PR of a batch review."""
+    print(f"📦 Batch Review: {len(summary.items)} PRs in {summary.duration:.1f}s, {len(summary.failed)} failed")
+    for item in summary.items:
+        icon = "❌" if item.status == 'failed' else "✅"
+        line = f"{icon} PR #{item.pr_id}: {item.status} ({item.duration:.1f}s)"
+        if item.error:
+            line += f" - {item.error}"
+        elif item.result and item.result.get('pr_title'):
+            line += f" - {item.result['pr_title']}"
+        print(line)
 
 
 def print_pr_result(result: dict):
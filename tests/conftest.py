@@ -0,0 +1,50 @@
+"""Shared fixtures."""
+
+import subprocess
+
+import pytest
+
+
+def git(repo, *args, **kwargs):
+    """Run git in repo and return its stdout."""
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True, **kwargs).stdout
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """A repository with a root commit, a commit with an edited rename, a type change, a
+    deletion and a non-ASCII file name, and a merge commit resolving a conflict."""
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    git(repo, 'init', '-q', '-b', 'master')
+    git(repo, 'config', 'user.email', 'dev@example.com')
+    git(repo, 'config', 'user.name', 'Dev')
+
+    (repo / 'a.txt').write_text(''.join(f"{i}\n" for i in range(1, 101)))
+    (repo / 'link').symlink_to('a.txt')
+    (repo / 'd').mkdir()
+    (repo / 'd' / 'x').write_text('x\n')
+    (repo / 'data.bin').write_bytes(b'\x00\x01\n\xff' * 10)
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'root')
+
+    git(repo, 'mv', 'a.txt', 'b.txt')
+    (repo / 'b.txt').write_text((repo / 'b.txt').read_text().replace('50\n', 'fifty\n'))
+    (repo / 'link').unlink()
+    (repo / 'link').write_text('file\n')
+    git(repo, 'rm', '-q', 'd/x')
+    (repo / 'ü.txt').write_text('n\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'rename and retype')
+
+    git(repo, 'checkout', '-qb', 'side', 'HEAD~1')
+    (repo / 'd' / 'x').write_text('side\n')
+    (repo / 'side.txt').write_text('side\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'side')
+    git(repo, 'checkout', '-q', 'master')
+    subprocess.run(['git', 'merge', '-q', 'side', '-m', 'merge'], cwd=repo, capture_output=True)
+    (repo / 'd' / 'x').write_text('resolved\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'merge side')
+    return repo
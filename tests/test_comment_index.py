@@ -0,0 +1,153 @@
+"""Tests for the PR comment snapshot and inline comment de-duplication."""
+
+import asyncio
+
+from yx_cc.core.comment_index import PRCommentIndex, comment_fingerprint, normalize_comment_content
+from yx_cc.core.comment_poster import InlineCommentPoster
+
+BOT = {'userId': 'bot-1', 'username': 'yx-cc-bot'}
+HUMAN = {'userId': 'u-9', 'username': 'reviewer'}
+
+PHASE_COMMENT = {
+    'comment_type': 'GLOBAL_COMMENT', 'comment_biz_id': 'g1', 'author': BOT,
+    'content': '✅ **Comment Generation Complete**\n\nPosted 2 inline comments.',
+    'related_patchset': {'versionNo': 3, 'commitId': 'c' * 40},
+}
+
+
+def _inline(biz_id, path, line, content, author):
+    return {'comment_type': 'INLINE_COMMENT', 'comment_biz_id': biz_id, 'filePath': path,
+            'line_number': line, 'content': content, 'author': author}
+
+
+EXISTING = [
+    PHASE_COMMENT,
+    _inline('b1', '/src/app.py', 2, '**bug**: **S**\n c', BOT),
+    _inline('b2', '/src/a.py', 10, '**bug**: **Null check missing on user input** handle None before use', BOT),
+    # Human comments written in the bot's "**Label**: " style
+    _inline('h1', '/src/h.py', 5, '**Note**: **Null check missing on user input** handle None before use', HUMAN),
+    _inline('h2', '/src/h.py', 20, '**bug**: **S**\n c', HUMAN),
+]
+
+
+class FakeClient:
+    """Records the comment calls an InlineCommentPoster makes."""
+
+    def __init__(self, comments):
+        self.comments = list(comments)
+        self.created = []
+        self.updated = []
+
+    async def create_inline_comment_async(self, pr_local_id, body, file_path, line_number, *patch_sets):
+        comment = _inline(f'n{len(self.created) + 1}', file_path, line_number, body, BOT)
+        self.created.append(comment)
+        self.comments.append(comment)
+        return dict(comment)
+
+    async def update_pr_comment_async(self, pr_local_id, comment_biz_id, content=None):
+        self.updated.append(comment_biz_id)
+
+    async def list_merge_request_comments_async(self, pr_local_id):
+        return list(self.comments)
+
+
+def _post(index, comments, bot_user_id=None):
+    client = FakeClient(EXISTING)
+    poster = InlineCommentPoster(client, existing=index, bot_user_id=bot_user_id, rate_per_second=0)
+    summary = asyncio.run(poster.post_all(7, comments, 'p1', 'p2'))
+    return client, summary
+
+
+def test_indexes_phase_results_and_patchsets():
+    index = PRCommentIndex(7, EXISTING + [{'comment_type': 'GLOBAL_COMMENT', 'is_deleted': True}])
+
+    assert len(index.comments) == len(EXISTING)
+    assert index.phase_result('Comment Generation') == 'Posted 2 inline comments.'
+    assert index.last_reviewed_commit() == ('c' * 40, 3)
+    assert [c['comment_biz_id'] for c in index.comments_for_file('src/h.py')] == ['h1', 'h2']
+
+
+def test_bot_account_is_inferred_from_phase_comments():
+    assert PRCommentIndex(7, EXISTING).bot_user_id() == 'bot-1'
+    assert PRCommentIndex(7, EXISTING[1:]).bot_user_id() is None
+
+
+def test_only_the_bots_inline_comments_are_indexed():
+    index = PRCommentIndex(7, EXISTING)
+
+    assert sorted(index.bot_inline_comments()) == ['src/a.py', 'src/app.py']
+    assert [r.comment_biz_id for r in index.bot_inline_comments('u-9')['src/h.py']] == ['h1', 'h2']
+    assert list(index.bot_inline_comments('u-9')) == ['src/h.py']
+    # Without a known bot account nothing counts as the reviewer's
+    assert PRCommentIndex(7, EXISTING[1:]).bot_inline_comments() == {}
+
+
+def test_exact_duplicate_of_a_bot_comment():
+    index = PRCommentIndex(7, EXISTING)
+    match, record = index.match_inline_comment('src/app.py', 2, '**bug**: **s**\nc')
+
+    assert match == 'duplicate' and record.comment_biz_id == 'b1'
+    assert index.find_inline_comment('src/app.py', comment_fingerprint('/src/app.py', 2, '**bug**: **s** c')) is record
+
+
+def test_near_duplicate_of_a_bot_comment_within_a_few_lines():
+    index = PRCommentIndex(7, EXISTING)
+    body = '**bug**: **Null check missing on user input** handle None before using it'
+
+    match, record = index.match_inline_comment('src/a.py', 11, body)
+    assert match == 'similar' and record.comment_biz_id == 'b2'
+    assert index.match_inline_comment('src/a.py', 30, body) == (None, None)
+    assert index.match_inline_comment('src/a.py', 11, body, similarity=1.01) == (None, None)
+
+
+def test_human_comments_never_match():
+    index = PRCommentIndex(7, EXISTING)
+
+    assert index.match_inline_comment('src/h.py', 20, '**bug**: **S**\n c') == (None, None)
+    assert index.match_inline_comment(
+        'src/h.py', 6, '**bug**: **Null check missing on user input** handle None before using it') == (None, None)
+
+
+def test_poster_skips_and_updates_only_bot_comments():
+    comments = [
+        {'file': 'src/app.py', 'line': 2, 'type': 'bug', 'content': '**s**\nc'},
+        {'file': 'src/a.py', 'line': 11, 'type': 'bug',
+         'content': '**Null check missing on user input** handle None before using it'},
+        {'file': 'src/h.py', 'line': 6, 'type': 'bug',
+         'content': '**Null check missing on user input** handle None before using it'},
+        {'file': 'src/h.py', 'line': 20, 'type': 'bug', 'content': '**s**\nc'},
+        {'file': 'src/app.py', 'line': 2, 'type': 'bug', 'content': '**S**\n c'},
+    ]
+    client, summary = _post(PRCommentIndex(7, EXISTING), comments)
+
+    assert [(r.status, r.comment_biz_id) for r in summary.results] == [
+        ('duplicate', 'b1'), ('updated', 'b2'), ('posted', 'n1'), ('posted', 'n2'), ('duplicate', None)]
+    assert client.updated == ['b2']
+    assert [(c['filePath'], c['line_number']) for c in client.created] == [('src/h.py', 6), ('src/h.py', 20)]
+
+
+def test_poster_with_unknown_bot_account_posts_everything():
+    comments = [{'file': 'src/app.py', 'line': 2, 'type': 'bug', 'content': '**s**\nc'}]
+    client, summary = _post(PRCommentIndex(7, EXISTING[1:]), comments)
+
+    assert summary.posted == 1 and client.updated == []
+    assert summary.results[0].comment_biz_id == 'n1'
+
+
+def test_update_content_reindexes_phase_markers():
+    progress = {'comment_type': 'GLOBAL_COMMENT', 'comment_biz_id': 'g2', 'author': BOT,
+                'content': '🔄 **Review Phase Started**: Change Analysis'}
+    index = PRCommentIndex(7, [progress])
+
+    assert index.phase_result('Change Analysis') is None
+    assert index.update_content('g2', '✅ **Change Analysis Complete**\n\nLooks fine.')
+    assert index.phase_result('Change Analysis') == 'Looks fine.'
+    assert index.update_content('g2', '🔄 **Change Analysis In Progress**')
+    assert index.phase_result('Change Analysis') is None
+    assert not index.update_content('missing', 'x')
+    assert not index.stale
+
+
+def test_normalized_content_ignores_label_markdown_and_case():
+    assert normalize_comment_content('**bug**: **Fix `This`**\n  now') == 'fix this now'
+    assert comment_fingerprint('/a.py', 3, '**x**: Same') == comment_fingerprint('a.py', 3, 'same')
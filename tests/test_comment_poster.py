@@ -0,0 +1,155 @@
+"""Tests for the token bucket and the concurrent inline comment poster."""
+
+import asyncio
+
+import pytest
+
+from yx_cc.core import comment_poster
+from yx_cc.core.comment_index import PRCommentIndex
+from yx_cc.core.comment_poster import InlineCommentPoster, TokenBucket, parse_line_number
+
+BOT = {'userId': 'bot-1'}
+
+
+class Clock:
+    """Fake monotonic clock that asyncio.sleep advances."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(comment_poster.time, 'monotonic', clock)
+    monkeypatch.setattr(comment_poster.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_paces_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    async def acquire(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(acquire(5))
+    assert clock.sleeps == [0.5, 0.5]
+    clock.now += 10  # Refills up to the capacity only
+    asyncio.run(acquire(4))
+    assert clock.sleeps == [0.5, 0.5, 0.5]
+
+
+def test_bucket_without_a_rate_never_waits(clock):
+    bucket = TokenBucket(rate=0)
+
+    async def acquire_all():
+        await asyncio.gather(*(bucket.acquire() for _ in range(20)))
+
+    asyncio.run(acquire_all())
+
+    assert clock.sleeps == []
+
+
+@pytest.mark.parametrize('line, expected', [(12, 12), ('22-30', 22), (' 7 ', 7), ('L3', None)])
+def test_line_numbers(line, expected):
+    assert parse_line_number(line) == expected
+
+
+class FakeClient:
+    """Creates inline comments, failing the calls listed in fail."""
+
+    def __init__(self, fail=None, stored_despite_error=(), list_error=None):
+        self.fail = dict(fail or {})  # file -> number of calls to fail
+        self.stored_despite_error = set(stored_despite_error)
+        self.list_error = list_error
+        self.comments = []
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_inline_comment_async(self, pr_local_id, body, file_path, line_number, *patch_sets):
+        self.calls.append(file_path)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            comment = {'comment_type': 'INLINE_COMMENT', 'comment_biz_id': f'n{len(self.calls)}',
+                       'filePath': file_path, 'line_number': line_number, 'content': body, 'author': BOT}
+            if self.fail.get(file_path):
+                self.fail[file_path] -= 1
+                if file_path in self.stored_despite_error:
+                    self.comments.append(comment)
+                raise RuntimeError('YunXiao API request failed: 504')
+            self.comments.append(comment)
+            return dict(comment)
+        finally:
+            self.in_flight -= 1
+
+    async def list_merge_request_comments_async(self, pr_local_id):
+        if self.list_error:
+            raise self.list_error
+        return list(self.comments)
+
+
+def _comments(*files):
+    return [{'file': f, 'line': i, 'type': 'bug', 'content': f'issue {i}'} for i, f in enumerate(files, 1)]
+
+
+def _post(client, comments, **kwargs):
+    poster = InlineCommentPoster(client, rate_per_second=0, existing=PRCommentIndex(7, []), **kwargs)
+    return asyncio.run(poster.post_all(7, comments, 'p1', 'p2'))
+
+
+def test_posts_concurrently_within_the_limit_and_keeps_the_order():
+    client = FakeClient()
+    progress = []
+
+    async def on_progress(done, total):
+        progress.append((done, total))
+
+    comments = _comments(*[f'f{i}.py' for i in range(9)]) + [{'file': 'x.py', 'line': 'L3'}, {'file': '', 'line': 1}]
+    summary = _post(client, comments, max_concurrency=3, progress_callback=on_progress, progress_interval=4)
+
+    assert client.max_in_flight == 3
+    assert [r.index for r in summary.results] == list(range(1, 12))
+    assert summary.posted == 9 and summary.skipped == 2
+    assert progress == [(4, 11), (8, 11), (11, 11)]
+
+
+def test_failed_posts_stored_by_the_server_are_not_sent_again():
+    client = FakeClient(fail={'a.py': 1, 'b.py': 1}, stored_despite_error=['a.py'])
+    summary = _post(client, _comments('a.py', 'b.py', 'c.py'), max_concurrency=1)
+
+    assert [r.status for r in summary.results] == ['posted', 'posted', 'posted']
+    # a.py landed despite the error; only b.py is re-sent
+    assert client.calls == ['a.py', 'b.py', 'c.py', 'b.py']
+    assert summary.results[0].comment_biz_id == 'n1'
+    assert sorted(c['filePath'] for c in client.comments) == ['a.py', 'b.py', 'c.py']
+
+
+def test_a_post_failing_twice_is_reported():
+    client = FakeClient(fail={'a.py': 2})
+    summary = _post(client, _comments('a.py', 'b.py'))
+
+    assert [r.status for r in summary.results] == ['failed', 'posted']
+    assert client.calls.count('a.py') == 2
+    assert '504' in summary.results[0].error
+
+
+@pytest.mark.parametrize('kwargs, client', [
+    ({'retry_failed': False}, FakeClient(fail={'a.py': 1})),
+    ({}, FakeClient(fail={'a.py': 1}, list_error=RuntimeError('list failed'))),
+])
+def test_no_retry_without_a_fresh_listing_or_when_disabled(kwargs, client):
+    summary = _post(client, _comments('a.py'), **kwargs)
+
+    assert summary.failed == 1 and client.calls == ['a.py']
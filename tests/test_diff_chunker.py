@@ -0,0 +1,143 @@
+"""Tests for token-budgeted diff chunking and the reduction of per-chunk results."""
+
+import asyncio
+import json
+
+import pytest
+
+from yx_cc.core.diff_chunker import (chunk_diff, fit_diff_to_budget, merge_analysis_results,
+                                     merge_comment_results)
+from yx_cc.core.diff_model import parse_diff
+from yx_cc.core.pr_reviewer import PRReviewer
+from yx_cc.core.utils import estimate_tokens
+
+
+def _file(path, hunks):
+    lines = [f"diff --git a/{path} b/{path}", f"--- a/{path}", f"+++ b/{path}"]
+    for start, body in hunks:
+        old = sum(1 for line in body if line[0] in '- ')
+        new = sum(1 for line in body if line[0] in '+ ')
+        lines += [f"@@ -{start},{old} +{start},{new} @@ def f():"] + body
+    return '\n'.join(lines)
+
+
+SMALL = _file('a.py', [(1, [' x', '-y = 1', '+y = 2'])])
+WIDE = _file('b.py', [(1, ['+' + 'a' * 60] * 3), (100, ['+' + 'b' * 60] * 3)])
+LONG_HUNK = _file('c.py', [(10, [' keep %d' % i if i % 3 else '-gone %d' % i for i in range(60)])])
+
+
+def _tokens(chunk):
+    return sum(f.tokens + 1 for f in parse_diff(chunk))
+
+
+def test_small_files_are_packed_together_in_order():
+    chunks = chunk_diff(SMALL + '\n' + SMALL.replace('a.py', 'd.py'), 1000)
+
+    assert len(chunks) == 1
+    assert [f.path for f in parse_diff(chunks[0])] == ['a.py', 'd.py']
+
+
+def test_oversized_file_is_split_at_hunks_with_its_header_repeated():
+    budget = parse_diff(WIDE).files[0].tokens - 10
+    chunks = chunk_diff(WIDE, budget)
+
+    assert len(chunks) == 2
+    for chunk in chunks:
+        assert chunk.startswith('diff --git a/b.py b/b.py\n--- a/b.py\n+++ b/b.py\n@@ ')
+        assert _tokens(chunk) <= budget
+    assert [h.new_start for c in chunks for h in parse_diff(c).files[0].hunks] == [1, 100]
+
+
+def test_oversized_hunk_is_split_with_recomputed_line_numbers():
+    original = parse_diff(LONG_HUNK).files[0]
+    chunks = chunk_diff(LONG_HUNK, 80)
+
+    assert len(chunks) > 2
+    pieces = [h for c in chunks for h in parse_diff(c).files[0].hunks]
+    # Every line keeps its old and new line number
+    numbered = [(line.text, line.old_no, line.new_no) for h in pieces for line in h.lines]
+    assert numbered == [(line.text, line.old_no, line.new_no) for line in original.hunks[0].lines]
+    for hunk in pieces:
+        assert hunk.old_count == sum(1 for line in hunk.lines if line.kind in '- ')
+        assert hunk.new_count == sum(1 for line in hunk.lines if line.kind in '+ ')
+
+
+def test_fit_to_budget_lists_the_files_left_out():
+    text = fit_diff_to_budget(SMALL + '\n' + WIDE + '\n' + SMALL.replace('a.py', 'd.py'), 40)
+
+    assert text.startswith(SMALL)
+    assert text.endswith('2 more files changed: b.py, d.py')
+
+
+def _analysis(score, effort, issues):
+    return json.dumps({'review': {'score': score, 'estimated_effort_to_review': effort,
+                                  'key_issues_to_review': issues, 'todo_sections': 'No'}})
+
+
+def test_analysis_merge_weights_scores_by_chunk_tokens():
+    merged = json.loads(merge_analysis_results(
+        [_analysis(90, 2, ['a']), 'not json', _analysis(60, 4, ['b'])], [300, 50, 100]))['review']
+
+    assert merged == {'key_issues_to_review': ['a', 'b'], 'score': 82,
+                      'estimated_effort_to_review': 4, 'todo_sections': 'No'}
+    # Nothing parseable: the raw results are passed through
+    assert merge_analysis_results(['x', 'y']) == 'x\n\ny'
+
+
+def test_comment_merge_drops_duplicates_across_chunks():
+    one = {'relevant_file': 'a.py', 'line_number': 2, 'one_sentence_summary': 's'}
+    other = dict(one, line_number=3)
+    merged = merge_comment_results([json.dumps({'code_suggestions': [one, other]}),
+                                    json.dumps({'code_suggestions': [dict(one, line_number='2')]})])
+
+    assert json.loads(merged)['code_suggestions'] == [one, other]
+
+
+class FlakyRunner:
+    """Fails the LLM call for chunks whose diff mentions a marker."""
+    max_tokens = 10 ** 6
+
+    def __init__(self, fail_marker):
+        self.fail_marker = fail_marker
+        self.prompts = []
+
+    async def run_async(self, system_prompt, prompt, **kwargs):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0)
+        if self.fail_marker in prompt:
+            raise RuntimeError('chunk call failed')
+        return json.dumps({'marker': prompt.count('diff --git')})
+
+
+def _run_over_diff(diff_content, fail_marker):
+    reviewer = PRReviewer.__new__(PRReviewer)
+    reviewer.claude_runner = FlakyRunner(fail_marker)
+    reviewer.chunk_token_budget = 40
+    reviewer.chunk_concurrency = 2
+    reviewer._parsed_diffs = {}
+    merged = []
+
+    def merge(results, weights):
+        merged.append((results, weights))
+        return 'merged'
+
+    result = asyncio.run(reviewer._run_over_diff('Test', 'system', lambda diff: diff, diff_content, merge))
+    return reviewer.claude_runner, result, merged
+
+
+def test_failed_chunks_are_left_out_of_the_merge():
+    diff_content = '\n'.join(SMALL.replace('a.py', f'f{i}.py') for i in range(4))
+    runner, result, merged = _run_over_diff(diff_content, 'f2.py')
+
+    assert result == 'merged' and len(runner.prompts) == 4
+    results, weights = merged[0]
+    assert len(results) == 3
+    # Weights are token estimates of the chunks that succeeded
+    chunks = [p for p in runner.prompts if 'f2.py' not in p]
+    assert sorted(weights) == sorted(estimate_tokens(p.split('\n', 1)[1]) for p in chunks)
+
+
+def test_phase_fails_when_every_chunk_fails():
+    diff_content = '\n'.join(SMALL.replace('a.py', f'f{i}.py') for i in range(4))
+    with pytest.raises(RuntimeError, match='chunk call failed'):
+        _run_over_diff(diff_content, 'diff --git')
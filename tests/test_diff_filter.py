@@ -0,0 +1,104 @@
+"""Tests for diff filtering, file classification and risk ranking."""
+
+import pytest
+
+from yx_cc.core.diff_filter import DiffFilter, classify_file
+from yx_cc.core.diff_model import parse_diff
+
+
+def _file(path, added=1, removed=0, first_line=10, body=None, deleted=False):
+    if body is None:
+        body = [f'-old {i}' for i in range(removed)] + [f'+new {i}' for i in range(added)]
+    old = sum(1 for line in body if line[0] in '- ')
+    new = sum(1 for line in body if line[0] in '+ ')
+    header = [f"diff --git a/{path} b/{path}"]
+    if deleted:
+        header += ["deleted file mode 100644", f"--- a/{path}", "+++ /dev/null"]
+        first_line, new = 0, 0
+    else:
+        header += [f"--- a/{path}", f"+++ b/{path}"]
+    return '\n'.join(header + [f"@@ -{first_line},{old} +{first_line},{new} @@"] + body)
+
+
+def _diff(*files):
+    return parse_diff('\n'.join(files) + '\n')
+
+
+@pytest.mark.parametrize('path, category', [
+    ('src/app.py', 'source'), ('tests/helpers.py', 'test'), ('pkg/test_app.py', 'test'),
+    ('pkg/app_test.go', 'test'), ('web/a.spec.tsx', 'test'), ('src/FooTest.java', 'test'),
+    ('src/Testing.java', 'source'), ('src/attestation.py', 'source'), ('src/contest.py', 'source'),
+    ('README.md', 'docs'), ('docs/guide.html', 'docs'), ('LICENSE', 'docs'),
+    ('pyproject.toml', 'config'), ('.env.example', 'config'), ('Dockerfile', 'config'),
+])
+def test_classify_file(path, category):
+    assert classify_file(path) == category
+
+
+@pytest.mark.parametrize('text, reason', [
+    (_file('yarn.lock'), 'lockfile'),
+    (_file('web/node_modules/x/index.js'), 'matches **/node_modules/**'),
+    (_file('api/service_pb2.py'), 'matches *_pb2.py'),
+    ("diff --git a/logo.png b/logo.png\nBinary files a/logo.png and b/logo.png differ", 'binary'),
+    (_file('static/app.js', body=['+' + 'x' * 2500]), 'minified'),
+    (_file('src/models.go', first_line=1, body=['+// Code generated by sqlc. DO NOT EDIT.', '+package db']),
+     'generated'),
+])
+def test_exclusions(text, reason):
+    result = DiffFilter().apply(parse_diff(text))
+
+    assert len(result.diff) == 0
+    assert [(e.path, e.reason) for e in result.excluded] == [(parse_diff(text).files[0].path, reason)]
+
+
+def test_generated_marker_below_the_top_of_the_file_is_kept():
+    text = _file('src/gen.py', first_line=40, body=['+# this is not auto-generated'])
+
+    assert DiffFilter().exclusion_reason(parse_diff(text).files[0]) is None
+
+
+def test_extra_globs_and_disabled_detectors():
+    diff = _diff(_file('yarn.lock'), _file('src/a.py'), _file('migrations/0001.py'))
+    result = DiffFilter(DiffFilter.parse_globs('migrations/**,\n *.sql'), detect_generated=False).apply(diff)
+
+    assert [f.path for f in result.diff] == ['yarn.lock', 'src/a.py']
+    assert [(e.path, e.reason) for e in result.excluded] == [('migrations/0001.py', 'matches migrations/**')]
+
+
+def test_files_are_ranked_by_category_and_churn():
+    diff = _diff(_file('README.md', 40), _file('tests/test_a.py', 4), _file('src/small.py', 1),
+                 _file('src/big.py', 30, 10), _file('setup.cfg', 2), _file('src/gone.py', 0, 30, deleted=True))
+    result = DiffFilter().apply(diff)
+
+    # A one-line source change outranks a long docs change; deletions count half
+    assert [f.path for f in result.diff] == [
+        'src/big.py', 'src/gone.py', 'src/small.py', 'README.md', 'setup.cfg', 'tests/test_a.py']
+    assert result.excluded == []
+    assert result.diff.text().startswith('diff --git a/src/big.py b/src/big.py\n')
+
+
+def test_diff_already_in_priority_order_keeps_its_text():
+    diff = _diff(_file('src/a.py', 10), _file('src/b.py', 1))
+    result = DiffFilter().apply(diff)
+
+    assert result.diff is diff
+
+
+def test_token_budget_skips_files_that_do_not_fit_but_admits_smaller_ones():
+    diff = _diff(_file('src/big.py', 200), _file('src/mid.py', 120), _file('src/small.py', 3))
+    big, mid, small = (f.tokens + 1 for f in diff)
+    result = DiffFilter(token_budget=big + small + 1).apply(diff)
+
+    assert [f.path for f in result.diff] == ['src/big.py', 'src/small.py']
+    assert [(e.path, e.reason) for e in result.excluded] == [('src/mid.py', 'over token budget')]
+    assert result.tokens == big + small
+
+
+def test_top_ranked_file_is_admitted_even_over_budget():
+    diff = _diff(_file('src/big.py', 200), _file('src/small.py', 1))
+    result = DiffFilter(token_budget=10).apply(diff)
+
+    assert [f.path for f in result.diff] == ['src/big.py']
+    assert result.to_dict()['excluded'] == [
+        {'path': 'src/small.py', 'reason': 'over token budget', 'tokens': diff.files[1].tokens}]
+    assert result.format_markdown() == '- `src/small.py` (over token budget)'
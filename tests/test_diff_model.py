@@ -0,0 +1,196 @@
+"""Tests for the unified diff model and parser."""
+
+import pytest
+
+from yx_cc.core.diff_model import ADDED, DELETED, MODIFIED, RENAMED, DiffParser, ParsedDiff, parse_diff
+
+MODIFIED_FILE = [
+    "diff --git a/src/app.py b/src/app.py",
+    "index 83db48f..bf269f4 100644",
+    "--- a/src/app.py",
+    "+++ b/src/app.py",
+    "@@ -1,3 +1,4 @@ def main():",
+    " import os",
+    "+import sys",
+    " def main():",
+    "     pass",
+]
+
+RENAMED_FILE = [
+    "diff --git a/old/util.py b/new/util.py",
+    "similarity index 90%",
+    "rename from old/util.py",
+    "rename to new/util.py",
+    "index 1111111..2222222 100644",
+    "--- a/old/util.py",
+    "+++ b/new/util.py",
+    "@@ -10,2 +10,2 @@",
+    "-x = 1",
+    "+x = 2",
+    " y = 3",
+]
+
+PURE_RENAME = [
+    "diff --git a/docs/a.md b/docs/b.md",
+    "similarity index 100%",
+    "rename from docs/a.md",
+    "rename to docs/b.md",
+]
+
+BINARY_FILE = [
+    "diff --git a/img/logo.png b/img/logo.png",
+    "index 3333333..4444444 100644",
+    "Binary files a/img/logo.png and b/img/logo.png differ",
+]
+
+DELETED_FILE = [
+    "diff --git a/src/gone.py b/src/gone.py",
+    "deleted file mode 100644",
+    "index 5555555..0000000",
+    "--- a/src/gone.py",
+    "+++ /dev/null",
+    "@@ -1,3 +0,0 @@",
+    "--- not a header",
+    "-+++ not a header either",
+    "-last = True",
+]
+
+NO_NEWLINE_FILE = [
+    "diff --git a/setup.cfg b/setup.cfg",
+    "index 6666666..7777777 100644",
+    "--- a/setup.cfg",
+    "+++ b/setup.cfg",
+    "@@ -1,2 +1,2 @@",
+    " [metadata]",
+    "-name = old",
+    "\\ No newline at end of file",
+    "+name = new",
+    "\\ No newline at end of file",
+]
+
+ADDED_FILE = [
+    "diff --git a/src/new.py b/src/new.py",
+    "new file mode 100644",
+    "index 0000000..8888888",
+    "--- /dev/null",
+    "+++ b/src/new.py",
+    "@@ -0,0 +1,2 @@",
+    "+print('ünïcødé 字')",
+    "+",
+]
+
+ALL_FILES = [MODIFIED_FILE, RENAMED_FILE, PURE_RENAME, BINARY_FILE, DELETED_FILE, NO_NEWLINE_FILE, ADDED_FILE]
+
+
+def _diff_text(*files, trailing='\n'):
+    return '\n'.join(line for lines in files for line in lines) + trailing
+
+
+@pytest.mark.parametrize('trailing', ['', '\n'])
+def test_round_trip_from_lines(trailing):
+    text = _diff_text(*ALL_FILES, trailing=trailing)
+    parsed = parse_diff(text.split('\n'))
+
+    assert parsed.source is None
+    assert parsed.text() == text
+    assert [f.path for f in parsed] == [
+        'src/app.py', 'new/util.py', 'docs/b.md', 'img/logo.png', 'src/gone.py', 'setup.cfg', 'src/new.py']
+
+
+@pytest.mark.parametrize('lines', ALL_FILES)
+def test_each_file_round_trips(lines):
+    parsed = parse_diff(lines)
+
+    assert len(parsed) == 1
+    assert parsed.files[0].text() == '\n'.join(lines)
+
+
+def test_round_trip_from_text_keeps_source():
+    text = _diff_text(*ALL_FILES)
+    parsed = parse_diff(text)
+
+    assert parsed.text() is text
+    assert ParsedDiff(parsed.files).text() == text
+
+
+def test_file_status_and_paths():
+    parsed = parse_diff(_diff_text(*ALL_FILES))
+
+    renamed = parsed.file('new/util.py')
+    assert renamed.status == RENAMED and renamed.is_rename
+    assert renamed.old_path == 'old/util.py'
+    assert renamed.similarity == 90
+    assert parsed.file('old/util.py') is renamed
+
+    pure_rename = parsed.file('docs/b.md')
+    assert pure_rename.status == RENAMED and pure_rename.hunks == []
+
+    binary = parsed.file('img/logo.png')
+    assert binary.status == MODIFIED and binary.is_binary and binary.hunks == []
+
+    deleted = parsed.file('src/gone.py')
+    assert deleted.status == DELETED
+    assert deleted.new_path is None and deleted.path == 'src/gone.py'
+
+    added = parsed.file('src/new.py')
+    assert added.status == ADDED and added.old_path is None
+
+
+def test_removed_lines_that_look_like_headers_stay_in_the_hunk():
+    deleted = parse_diff(DELETED_FILE).files[0]
+
+    assert deleted.deletions == 3 and deleted.additions == 0
+    assert [line.old_no for line in deleted.hunks[0].lines] == [1, 2, 3]
+
+
+def test_no_newline_markers_are_not_counted_as_lines():
+    parsed = parse_diff(NO_NEWLINE_FILE).files[0]
+    lines = parsed.hunks[0].lines
+
+    assert parsed.additions == 1 and parsed.deletions == 1
+    assert [line.kind for line in lines] == [' ', '-', '\\', '+', '\\']
+    assert parsed.new_line(2).text == '+name = new'
+    assert parsed.new_line(3) is None
+
+
+def test_new_line_numbers_follow_the_hunk():
+    app = parse_diff(MODIFIED_FILE).files[0]
+
+    assert app.new_line(2).kind == '+'
+    assert app.new_line(3).old_no == 2
+    assert app.hunks[0].section == ' def main():'
+
+
+def test_yunxiao_compare_format_without_git_headers():
+    lines = [
+        "--- a/src/a.py",
+        "+++ b/src/a.py",
+        "@@ -1,2 +1,1 @@",
+        "--- removed",
+        " kept",
+        "--- /dev/null",
+        "+++ b/src/b.py",
+        "@@ -0,0 +1 @@",
+        "+new",
+    ]
+    parsed = parse_diff(lines)
+
+    assert [f.path for f in parsed] == ['src/a.py', 'src/b.py']
+    assert parsed.files[0].deletions == 1
+    assert parsed.files[1].status == ADDED
+    assert parsed.text() == '\n'.join(lines)
+
+
+def test_head_lines_keeps_statistics_of_the_whole_file():
+    lines = MODIFIED_FILE[:5] + [f"+line {i}" for i in range(50)]
+    lines[4] = "@@ -1,0 +1,50 @@"
+    full = parse_diff(lines).files[0]
+
+    parser = DiffParser(head_lines=5)
+    for offset, line in enumerate(lines):
+        parser.feed(line, offset)
+    head = parser.close().files[0]
+
+    assert len(head.hunks[0].lines) == 5
+    assert (head.additions, head.added_chars, head.tokens) == (full.additions, full.added_chars, full.tokens)
+    assert head.offset == 0
@@ -0,0 +1,143 @@
+"""Tests for diff source selection, hedging and the latency tracker."""
+
+import asyncio
+import math
+
+import pytest
+
+from yx_cc.core.diff_source import DiffSourceSelector, LatencyTracker
+
+
+class Diff:
+    """A diff result that records whether it was closed, like a DiffSpool."""
+
+    def __init__(self, text):
+        self.text = text
+        self.closed = False
+
+    def __bool__(self):
+        return bool(self.text)
+
+    def __len__(self):
+        return len(self.text)
+
+    def close(self):
+        self.closed = True
+
+
+class Sources:
+    """Fake sources that record when they start and what they return."""
+
+    def __init__(self):
+        self.started = []
+        self.made = {}
+        self.cancelled = []
+
+    def add(self, name, text='', delay=0.0, error=None, ignore_cancel=False):
+        async def fetch():
+            self.started.append(name)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled.append(name)
+                if not ignore_cancel:
+                    raise
+            if error:
+                raise error
+            self.made[name] = Diff(text)
+            return self.made[name]
+        return fetch
+
+
+def _fetch(policy, sources, **kwargs):
+    selector = DiffSourceSelector(policy, tracker=kwargs.pop('tracker', None) or LatencyTracker(), **kwargs)
+    return asyncio.run(selector.fetch(sources))
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError, match='Unknown diff source policy'):
+        DiffSourceSelector('fastest')
+
+
+def test_sequential_policy_only_falls_back_on_failure_or_an_empty_diff():
+    s = Sources()
+    diff, name = _fetch('yunxiao', {'git': s.add('git', 'G'), 'yunxiao': s.add('yunxiao', 'Y')})
+    assert (diff.text, name, s.started) == ('Y', 'yunxiao', ['yunxiao'])
+
+    s = Sources()
+    diff, name = _fetch('yunxiao', {'git': s.add('git', 'G'), 'yunxiao': s.add('yunxiao', error=RuntimeError('503'))})
+    assert (diff.text, name, s.started) == ('G', 'git', ['yunxiao', 'git'])
+
+    s = Sources()
+    diff, name = _fetch('local', {'yunxiao': s.add('yunxiao', 'Y'), 'git': s.add('git', '')})
+    assert (diff.text, name, s.started) == ('Y', 'yunxiao', ['git', 'yunxiao'])
+    assert s.made['git'].closed
+
+
+def test_hedge_cancels_the_slower_source():
+    s = Sources()
+    diff, name = _fetch('hedge', {'git': s.add('git', 'G', delay=0.01), 'yunxiao': s.add('yunxiao', 'Y', delay=5)})
+
+    assert (diff.text, name) == ('G', 'git')
+    assert s.started == ['git', 'yunxiao'] and s.cancelled == ['yunxiao'] and 'yunxiao' not in s.made
+    assert not diff.closed
+
+
+def test_hedge_closes_losers_that_still_return_a_diff():
+    # Finishing together, and finishing despite the cancellation (e.g. a git read in a thread)
+    s = Sources()
+    diff, _ = _fetch('hedge', {'a': s.add('a', 'A', delay=0.01), 'b': s.add('b', 'B', delay=0.01)})
+    assert [d.closed for d in s.made.values()] == [d is not diff for d in s.made.values()]
+
+    s = Sources()
+    diff, name = _fetch('hedge', {'a': s.add('a', 'A', delay=0.01), 'b': s.add('b', 'B', delay=5, ignore_cancel=True)})
+    assert name == 'a' and s.made['b'].closed and not diff.closed
+
+
+def test_empty_diff_loses_to_a_later_non_empty_one():
+    s = Sources()
+    diff, name = _fetch('hedge', {'a': s.add('a', '', delay=0.01), 'b': s.add('b', 'B', delay=0.05)})
+
+    assert name == 'b' and s.made['a'].closed
+
+
+def test_empty_when_every_source_is_empty_and_the_last_error_when_none_answers():
+    s = Sources()
+    diff, name = _fetch('hedge', {'a': s.add('a', ''), 'b': s.add('b', error=RuntimeError('down'))})
+    assert (diff.text, name) == ('', 'a') and not diff.closed
+
+    s = Sources()
+    with pytest.raises(RuntimeError, match='second'):
+        _fetch('yunxiao', {'yunxiao': s.add('yunxiao', error=RuntimeError('first')),
+                           'git': s.add('git', error=RuntimeError('second'))})
+
+
+def test_auto_starts_the_fastest_source_and_hedges_when_it_runs_long():
+    tracker = LatencyTracker()
+    tracker.record('yunxiao', 0.01, ok=True)
+    s = Sources()
+    diff, name = _fetch('auto', {'git': s.add('git', 'G'), 'yunxiao': s.add('yunxiao', 'Y')}, tracker=tracker)
+    assert (name, s.started) == ('yunxiao', ['yunxiao'])
+
+    # Unmeasured sources: the preferred one leads, the backup starts after hedge_delay
+    s = Sources()
+    diff, name = _fetch('auto', {'yunxiao': s.add('yunxiao', 'Y', delay=0.02), 'git': s.add('git', 'G', delay=5)},
+                        hedge_delay=0.01)
+    assert (name, s.started, s.cancelled) == ('yunxiao', ['git', 'yunxiao'], ['git'])
+
+
+def test_latency_tracker_ewma_and_failures():
+    tracker = LatencyTracker(alpha=0.5)
+    assert tracker.expected('git') == math.inf
+
+    tracker.record('git', 1.0, ok=True)
+    tracker.record('git', 3.0, ok=True)
+    assert tracker.expected('git') == 2.0
+
+    tracker.record('git', 9.0, ok=False)
+    assert tracker.expected('git') == 2.0
+    tracker.record('git', 9.0, ok=False)
+    assert tracker.expected('git') == math.inf  # Repeated failures demote the source
+    tracker.record('git', 1.0, ok=True)
+    assert tracker.expected('git') == 1.5
+    assert tracker.snapshot()['git'] == {'ewma': 1.5, 'last': 1.0, 'successes': 3, 'failures': 2}
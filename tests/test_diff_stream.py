@@ -0,0 +1,125 @@
+"""Tests for the bounded-memory diff spool and the two-pass spooled filter."""
+
+import random
+
+import pytest
+
+from yx_cc.core.diff_filter import DiffFilter
+from yx_cc.core.diff_model import parse_diff
+from yx_cc.core.diff_stream import DiffSpool, filter_spooled_diff
+
+
+def _random_file(rng, index, yunxiao):
+    path = rng.choice(['src/a%d.py', 'docs/r%d.md', 'tests/test_%d.py', 'gen/g%d.pb.go', 'src/ünï%d.py']) % index
+    if rng.random() < 0.05:
+        path = 'yarn.lock'
+    lines = [] if yunxiao else [f"diff --git a/{path} b/{path}"]
+    kind = rng.random()
+    if kind < 0.1 and not yunxiao:
+        return lines + ["index 1..2", f"Binary files a/{path} and b/{path} differ"]
+    if kind < 0.2 and not yunxiao:
+        return lines + ["similarity index 100%", f"rename from old/{path}", f"rename to {path}"]
+    if kind < 0.3:
+        lines += [] if yunxiao else ["deleted file mode 100644"]
+        return lines + [f"--- a/{path}", "+++ /dev/null", "@@ -1,2 +0,0 @@", "--- not a header", "-x"]
+
+    lines += [f"--- a/{path}", f"+++ b/{path}"]
+    start = 1
+    for _ in range(rng.randint(1, 3)):
+        body = []
+        old = new = 0
+        for _ in range(rng.randint(1, 30)):
+            prefix = rng.choice('+- ')
+            body.append(prefix + rng.choice(
+                ['x = 1', 'ünïcødé 字', '// Code generated by x', 'y' * rng.choice([5, 400]), '+++ fake', '--- fake']))
+            old += prefix != '+'
+            new += prefix != '-'
+        lines.append(f"@@ -{start},{old} +{start},{new} @@ def f():")
+        lines += body
+        if rng.random() < 0.2:
+            lines.append("\\ No newline at end of file")
+        start += 50
+    if rng.random() < 0.2:
+        lines.append('')
+    return lines
+
+
+def _random_diff(seed):
+    rng = random.Random(seed)
+    yunxiao = rng.random() < 0.4
+    lines = [line for i in range(rng.randint(1, 25)) for line in _random_file(rng, i, yunxiao)]
+    return rng, '\n'.join(lines) + rng.choice(['', '\n'])
+
+
+def _spool(text, spill_chars, chunk=97):
+    return DiffSpool.from_chunks([text[i:i + chunk] for i in range(0, len(text), chunk)], spill_chars)
+
+
+def _summary(result):
+    return [f.path for f in result.diff], [(e.path, e.reason, e.tokens) for e in result.excluded], result.tokens
+
+
+@pytest.mark.parametrize('spill_chars', [0, 50, 10 ** 9])
+@pytest.mark.parametrize('seed', range(60))
+def test_spooled_filter_matches_filtering_the_parsed_text(seed, spill_chars):
+    rng, text = _random_diff(seed)
+    diff_filter = DiffFilter(token_budget=rng.choice([0, 200, 2000]))
+    expected = diff_filter.apply(parse_diff(text))
+
+    spool = _spool(text, spill_chars)
+    try:
+        result = filter_spooled_diff(spool, diff_filter)
+    finally:
+        spool.close()
+
+    assert _summary(result) == _summary(expected)
+    assert [f.text() for f in result.diff] == [f.text() for f in expected.diff]
+    assert result.diff.text().rstrip('\n') == expected.diff.text().rstrip('\n')
+
+
+def test_spooled_filter_with_every_file_excluded():
+    text = "diff --git a/yarn.lock b/yarn.lock\n--- a/yarn.lock\n+++ b/yarn.lock\n@@ -1 +1 @@\n-a\n+b\n"
+    spool = _spool(text, 0)
+    try:
+        result = filter_spooled_diff(spool, DiffFilter())
+    finally:
+        spool.close()
+
+    assert len(result.diff) == 0 and result.diff.text() == ''
+    assert [(e.path, e.reason) for e in result.excluded] == [('yarn.lock', 'lockfile')]
+
+
+@pytest.mark.parametrize('spill_chars', [0, 10 ** 9])
+def test_line_spans_and_read_back(spill_chars):
+    text = "first\nsecond ünï 字\n\nlast"
+    spool = _spool(text, spill_chars, chunk=3)
+    try:
+        spans = list(spool.line_spans())
+        assert [line for _, line in spans] == text.split('\n')
+        assert spool.text() == text
+        if spool.spilled:
+            # Offsets are byte positions in the spill file
+            assert spool.size == len(text.encode('utf-8'))
+            start, line = spans[1]
+            assert spool.read(start, start + len(line.encode('utf-8'))) == line
+    finally:
+        spool.close()
+
+
+def test_spill_threshold_and_close():
+    spool = _spool('x' * 100, 50)
+    assert spool.spilled
+    spool.close()
+    assert not spool.spilled
+
+    small = _spool('x' * 10, 50)
+    assert not small.spilled
+    small.close()
+
+
+def test_whitespace_only_spool_is_empty():
+    spool = _spool(' \n\n', 0)
+    try:
+        assert not spool
+    finally:
+        spool.close()
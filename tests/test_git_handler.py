@@ -0,0 +1,106 @@
+"""Tests for GitHandler's commit lookups and branch fetches."""
+
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import git
+from yx_cc.integrations.git_handler import GitHandler
+
+
+@pytest.fixture
+def handler(git_repo):
+    handler = GitHandler(str(git_repo))
+    yield handler
+    handler.close()
+
+
+def _git_show_files(repo, rev):
+    files = []
+    for line in git(repo, '-c', 'core.quotePath=false', 'show', '--name-status', '--format=', rev).splitlines():
+        status, filename = line.split('\t', 1)
+        files.append({'status': status, 'filename': filename})
+    return files
+
+
+@pytest.mark.parametrize('rev', ['HEAD', 'HEAD^1', 'HEAD^2', 'HEAD~2'])
+def test_commit_files_match_git_show(git_repo, handler, rev):
+    info = handler.get_commit_info(git(git_repo, 'rev-parse', rev).strip())
+
+    assert info['files'] == _git_show_files(git_repo, rev)
+
+
+def test_commit_files_of_an_edited_rename_and_a_type_change(git_repo, handler):
+    info = handler.get_commit_info('HEAD^1')
+    files = {f['filename']: f['status'] for f in info['files']}
+
+    assert files['a.txt\tb.txt'].startswith('R') and files['a.txt\tb.txt'] != 'R100'
+    assert files['link'] == 'T'
+    assert files['d/x'] == 'D'
+    assert files['ü.txt'] == 'A'
+
+
+def test_merge_commit_lists_files_against_all_parents(handler):
+    files = handler.get_commit_info('HEAD')['files']
+
+    assert [f['filename'] for f in files] == ['d/x']
+    assert len(files[0]['status']) == 2
+
+
+def test_commit_metadata(handler):
+    info = handler.get_commit_info('HEAD~2')
+
+    assert info['message'] == 'root'
+    assert info['author'] == 'Dev <dev@example.com>'
+    assert info['date'] and info['commit_date']
+
+
+def test_unknown_commit_raises(handler):
+    with pytest.raises(ValueError):
+        handler.get_commit_info('0' * 40)
+
+
+@pytest.fixture
+def shallow_clone(git_repo, tmp_path):
+    clone = tmp_path / 'clone'
+    git(tmp_path, 'clone', '-q', '--depth=1', '--no-single-branch', git_repo.as_uri(), str(clone))
+    return clone
+
+
+def test_concurrent_fetches_of_a_shallow_clone_are_serialized(git_repo, shallow_clone, monkeypatch):
+    monkeypatch.setenv('YX_CC_GIT_FETCH_DEPTH', '1')
+    handler = GitHandler(str(shallow_clone))
+    merge_base = git(git_repo, 'merge-base', 'master', 'side').strip()
+
+    # Unserialized, the deepening fetches fail on shallow.lock or a ref lock
+    with ThreadPoolExecutor(8) as pool:
+        reports = list(pool.map(lambda _: handler.fetch_branches('master', 'side'), range(8)))
+
+    assert [r['merge_base'] for r in reports] == [merge_base] * 8
+    assert git(shallow_clone, 'rev-parse', 'origin/side').strip() == git(git_repo, 'rev-parse', 'side').strip()
+
+
+def test_partial_clone_check_is_cached_when_false(handler, monkeypatch):
+    calls = []
+    run = subprocess.run
+    monkeypatch.setattr(subprocess, 'run', lambda cmd, **kwargs: calls.append(cmd) or run(cmd, **kwargs))
+
+    assert handler.is_partial_clone() is False
+    assert handler.is_partial_clone() is False
+    assert len(calls) == 1
+
+
+def test_concurrent_blob_prefetches_fetch_each_blob_once(git_repo, tmp_path):
+    git(git_repo, 'config', 'uploadpack.allowFilter', 'true')
+    clone = tmp_path / 'partial'
+    git(tmp_path, 'clone', '-q', '--no-checkout', '--filter=blob:none', git_repo.as_uri(), str(clone))
+    handler = GitHandler(str(clone))
+    paths = ['b.txt', 'link', 'ü.txt', 'side.txt', 'd/x']
+
+    with ThreadPoolExecutor(4) as pool:
+        fetched = list(pool.map(lambda _: handler.prefetch_blobs('HEAD', paths), range(4)))
+
+    assert sorted(fetched) == [0, 0, 0, len(paths)]
+    assert handler.prefetch_blobs('HEAD', paths) == 0
+    assert handler.get_file_content_at_commit('HEAD', 'd/x') == 'resolved\n'
@@ -0,0 +1,80 @@
+"""Tests for the persistent cat-file reader."""
+
+import pytest
+
+from conftest import git
+from yx_cc.integrations.git_object_reader import GitObjectReader
+
+
+@pytest.fixture
+def reader(git_repo):
+    reader = GitObjectReader(str(git_repo))
+    yield reader
+    reader.close()
+
+
+def test_binary_content_is_framed_by_size(git_repo, reader):
+    root = git(git_repo, 'rev-list', '--max-parents=0', 'HEAD').strip()
+    blob = reader.read(f'{root}:data.bin')
+
+    assert blob.type == 'blob'
+    assert blob.data == b'\x00\x01\n\xff' * 10
+    # The next response on the same pipe is still aligned
+    assert reader.read(f'{root}:a.txt').text().startswith('1\n2\n')
+
+
+def test_batch_keeps_order_and_reports_missing(git_repo, reader):
+    head = git(git_repo, 'rev-parse', 'HEAD').strip()
+    revs = [f'{head}:b.txt', f'{head}:nope', 'HEAD^{tree}', 'bad\nrev', f'{head}:ü.txt']
+    objects = reader.read_many(revs)
+
+    assert [o.type if o else None for o in objects] == ['blob', None, 'tree', None, 'blob']
+    assert objects[4].text() == 'n\n'
+
+
+def test_large_batch_does_not_deadlock(git_repo, reader):
+    head = git(git_repo, 'rev-parse', 'HEAD').strip()
+    reader.max_cache_bytes = 0
+    revs = [f'{head}:b.txt', f'{head}:side.txt'] * 3000
+
+    objects = reader.read_many(revs)
+    assert len(objects) == len(revs) and all(o is not None for o in objects)
+
+
+def test_immutable_revisions_are_served_from_the_cache(git_repo, reader):
+    head = git(git_repo, 'rev-parse', 'HEAD').strip()
+    reader.read(f'{head}:b.txt')
+    reader.read(f'{head}:b.txt')
+    reader.read('HEAD:b.txt')  # Symbolic: resolved by git, but the object itself is cached
+
+    assert reader.stats()['hits'] == 1
+    assert reader.stats()['entries'] == 1
+
+
+def test_cache_is_bounded(git_repo):
+    head = git(git_repo, 'rev-parse', 'HEAD').strip()
+    with GitObjectReader(str(git_repo), max_cache_bytes=300) as reader:
+        reader.read_many([f'{head}:b.txt', f'{head}:side.txt', f'{head}:ü.txt'])
+        assert reader.stats()['bytes'] <= 300
+
+
+def test_info_does_not_read_content(git_repo, reader):
+    info = reader.info('HEAD:b.txt')
+
+    assert info.type == 'blob' and info.size > 0 and info.data is None
+    assert reader.info('HEAD:nope') is None
+
+
+def test_dead_process_is_restarted(git_repo, reader):
+    assert reader.read('HEAD:side.txt').text() == 'side\n'
+    reader._batch._proc.kill()
+    reader._batch._proc.wait()
+
+    assert reader.read('HEAD:d/x').text() == 'resolved\n'
+
+
+def test_reader_fails_after_the_restart_fails(tmp_path):
+    # Not a repository: cat-file exits at once, so the restarted process dies too
+    with GitObjectReader(str(tmp_path)) as reader:
+        with pytest.raises(RuntimeError):
+            reader.read('HEAD')
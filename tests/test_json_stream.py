@@ -0,0 +1,125 @@
+"""Tests for the incremental decoder of the compare API's diffs array."""
+
+import json
+import random
+
+import pytest
+
+from yx_cc.integrations import json_stream
+from yx_cc.integrations.json_stream import JsonArrayStream
+
+DOCUMENT = {
+    'commits': [{'id': 'a' * 40, 'message': 'fix: ünïcødé'}],
+    'diffs': [
+        {'newPath': 'src/app.py', 'diff': '@@ -1 +1 @@\n-old\n+new\n'},
+        {'newPath': 'src/中文.py', 'diff': '+print("字 😀 \\" \\\\ \\n")\n', 'binary': False},
+        {'newPath': 'big.txt', 'diff': 'x' * 5000, 'lines': 12345, 'ratio': -0.5e-3},
+        {'newPath': 'empty.py', 'diff': '', 'deleted': True, 'mode': None},
+    ],
+    'total': 4,
+    'truncated': False,
+}
+
+
+def _decode(body: bytes, cuts):
+    stream = JsonArrayStream('diffs')
+    items = []
+    start = 0
+    for cut in sorted(cuts) + [len(body)]:
+        items += stream.feed(body[start:cut])
+        start = cut
+    items += stream.close()
+    return stream, items
+
+
+def _expected_members():
+    return {key: value for key, value in DOCUMENT.items() if key != 'diffs'}
+
+
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+@pytest.mark.parametrize('seed', range(40))
+def test_random_chunk_boundaries(seed, ensure_ascii):
+    body = json.dumps(DOCUMENT, ensure_ascii=ensure_ascii, indent=seed % 3 or None).encode('utf-8')
+    rng = random.Random(seed)
+    cuts = rng.sample(range(1, len(body)), rng.randint(1, 60))
+
+    stream, items = _decode(body, cuts)
+
+    assert items == DOCUMENT['diffs']
+    assert stream.items == len(DOCUMENT['diffs'])
+    assert stream.members == _expected_members()
+
+
+def test_every_split_inside_unicode_escapes_and_multibyte_characters():
+    # \uXXXX escapes (a surrogate pair among them) and raw multi-byte UTF-8, split at every byte
+    doc = {'diffs': [{'diff': '字😀é'}, {'diff': '\\u4e2d'}], 'after': 'ü'}
+    for ensure_ascii in (True, False):
+        body = json.dumps(doc, ensure_ascii=ensure_ascii).encode('utf-8')
+        for cut in range(1, len(body)):
+            stream, items = _decode(body, [cut])
+            assert items == doc['diffs'], (ensure_ascii, cut)
+            assert stream.members == {'after': 'ü'}
+
+
+def test_byte_at_a_time():
+    body = json.dumps(DOCUMENT).encode('utf-8')
+    stream, items = _decode(body, range(1, len(body)))
+
+    assert items == DOCUMENT['diffs']
+    assert stream.members == _expected_members()
+
+
+def test_numbers_split_at_a_chunk_boundary():
+    stream, items = _decode(b'{"diffs": [12, 345], "total": 678}', [13, 30])
+
+    assert items == [12, 345]
+    assert stream.members == {'total': 678}
+
+
+def test_items_are_returned_as_they_complete():
+    stream = JsonArrayStream('diffs')
+
+    assert stream.feed(b'{"diffs": [{"diff": "a"}, ') == [{'diff': 'a'}]
+    assert stream.feed(b'{"diff": "b"}, {"diff": "c"}]') == [{'diff': 'b'}, {'diff': 'c'}]
+    assert stream.feed(b', "total": 2}') == []
+    assert stream.close() == []
+    assert stream.members == {'total': 2}
+
+
+def test_incomplete_value_is_retried_only_after_enough_new_text():
+    stream = JsonArrayStream('diffs')
+
+    assert stream.feed(b'{"diffs": [{"diff": "') == []
+    assert stream.feed(b'b"}') == []  # Far less than MIN_RETRY_CHARS arrived
+    assert stream.feed(b' ' * json_stream.MIN_RETRY_CHARS) == [{'diff': 'b'}]
+    assert stream.feed(b']}') + stream.close() == []
+
+
+@pytest.mark.parametrize('body', [b'{}', b'{"diffs": []}', b' {"other": [1, 2]} '])
+def test_documents_without_items(body):
+    stream, items = _decode(body, [1])
+
+    assert items == []
+    # The streamed array itself is not kept as a member
+    assert stream.members == {key: value for key, value in json.loads(body.decode()).items() if key != 'diffs'}
+
+
+@pytest.mark.parametrize('body', [
+    b'{"diffs": [{"diff": "a"}',
+    b'{"diffs": [1, 2',
+    b'{"total": 1',
+    b'',
+])
+def test_truncated_body_raises_on_close(body):
+    stream = JsonArrayStream('diffs')
+    stream.feed(body)
+    with pytest.raises(ValueError):
+        stream.close()
+
+
+@pytest.mark.parametrize('body', [b'[1, 2]', b'{"diffs": [1 2]}', b'{"a": 1} {"b": 2}', b'{"a" 1}'])
+def test_malformed_body_raises(body):
+    stream = JsonArrayStream('diffs')
+    with pytest.raises(ValueError):
+        stream.feed(body)
+        stream.close()
@@ -0,0 +1,92 @@
+"""Tests for the on-disk LLM response cache."""
+
+import os
+
+import pytest
+
+from yx_cc.core import llm_cache
+from yx_cc.core.llm_cache import LLMResponseCache
+
+
+def _key(prompt, **kwargs):
+    return LLMResponseCache.make_key('openai', 'model', 0.2, 'system', prompt, **kwargs)
+
+
+def _entry_size(cache, key):
+    return cache._path(key).stat().st_size
+
+
+def _age(cache, key, mtime):
+    os.utime(cache._path(key), (mtime, mtime))
+
+
+def test_keys_cover_every_input():
+    base = _key('prompt')
+    assert base == _key('prompt')
+    assert len({base, _key('prompt2'), _key('prompt', max_turns=2),
+                LLMResponseCache.make_key('openai', 'other', 0.2, 'system', 'prompt'),
+                LLMResponseCache.make_key('openai', 'model', 0.2, 'systemp', 'rompt')}) == 5
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = LLMResponseCache(tmp_path)
+    assert cache.get(_key('a')) is None
+    cache.put(_key('a'), 'réponse 字', {'model': 'model'})
+
+    assert cache.get(_key('a')) == 'réponse 字'
+    assert cache.contains(_key('a')) and not cache.contains(_key('b'))
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_expired_entries_are_misses_and_removed(tmp_path, monkeypatch):
+    cache = LLMResponseCache(tmp_path, ttl=60)
+    cache.put(_key('a'), 'old')
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now + 61)
+
+    assert not cache.contains(_key('a'))
+    assert cache.get(_key('a')) is None
+    assert not cache._path(_key('a')).exists() and cache._total_bytes == 0
+
+
+def test_eviction_trims_least_recently_used_entries_to_the_low_water_mark(tmp_path):
+    probe = LLMResponseCache(tmp_path / 'probe')
+    probe.put(_key('p'), 'x' * 100)
+    size = _entry_size(probe, _key('p'))
+
+    cache = LLMResponseCache(tmp_path / 'cache', max_bytes=size * 10 + 50, low_water=0.45)
+    keys = [_key(str(i)) for i in range(10)]
+    for i, key in enumerate(keys):
+        cache.put(key, 'x' * 100)
+        _age(cache, key, 1000 + i)
+    cache.get(keys[0])  # Recently used again
+
+    cache.put(_key('new'), 'x' * 100)
+
+    remaining = [key for key in keys if cache._path(key).exists()]
+    assert remaining == [keys[0]] + keys[8:]
+    kept = sum(_entry_size(cache, key) for key in remaining + [_key('new')])
+    assert cache._total_bytes == kept <= cache.low_water_bytes
+    assert cache.contains(_key('new'))
+
+
+def test_running_total_is_seeded_from_disk_and_tracks_overwrites(tmp_path):
+    cache = LLMResponseCache(tmp_path)
+    cache.put(_key('a'), 'x' * 100)
+    cache.put(_key('b'), 'x' * 10)
+    cache.put(_key('b'), 'x' * 50)
+    total = _entry_size(cache, _key('a')) + _entry_size(cache, _key('b'))
+
+    assert cache._total_bytes == total
+    assert LLMResponseCache(tmp_path)._total_bytes == total
+
+
+@pytest.mark.parametrize('enabled', ['true', 'false'])
+def test_shared_cache_follows_the_environment(tmp_path, monkeypatch, enabled):
+    monkeypatch.setenv('YX_CC_LLM_CACHE', enabled)
+    monkeypatch.setenv('YX_CC_LLM_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(llm_cache, '_shared_cache', None)
+
+    cache = llm_cache.get_llm_cache()
+    assert (cache is not None) == (enabled == 'true')
+    assert cache is llm_cache.get_llm_cache()
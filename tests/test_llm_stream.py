@@ -0,0 +1,52 @@
+"""Tests for stream metrics and throttled phase progress."""
+
+import asyncio
+
+from yx_cc.core.llm_stream import PhaseStreamHandler, StreamMetrics
+
+
+def test_combined_metrics_of_concurrent_calls():
+    combined = StreamMetrics.combine([
+        StreamMetrics(ttft=0.5, duration=4.0, output_tokens=100, tokens_per_second=28.6, prompt_tokens=1000),
+        StreamMetrics(ttft=None, duration=2.0, output_tokens=60, tokens_per_second=30.0, cached_tokens=200),
+    ])
+
+    assert combined == StreamMetrics(ttft=0.5, duration=4.0, output_tokens=160, tokens_per_second=40.0,
+                                     prompt_tokens=1000, cached_tokens=200)
+    assert StreamMetrics.combine([]) is None
+
+
+def test_progress_counts_the_suggestions_received_so_far():
+    messages = []
+
+    async def update(message):
+        messages.append(message)
+
+    async def stream(handler, *deltas):
+        for delta in deltas:
+            await handler.on_delta(delta)
+
+    # The second suggestion is still being generated
+    text = '{"code_suggestions": [{"relevant_file": "a.py", "line_number": 1}, {"relevant_file": "b.py", "line_n'
+    asyncio.run(stream(PhaseStreamHandler(update, interval=0, count_suggestions=True), '{"code_', text[7:]))
+    asyncio.run(stream(PhaseStreamHandler(update, interval=0), text))
+
+    assert messages[0].startswith('_Generating... ~') and 'suggestion' not in messages[0]
+    assert messages[1].endswith('tokens/s)_\n\n2 suggestions so far')
+    assert 'suggestion' not in messages[2]
+
+
+def test_updates_are_throttled_and_none_records_metrics_only():
+    messages = []
+
+    async def update(message):
+        messages.append(message)
+
+    async def run():
+        handler = PhaseStreamHandler(update, interval=3600)
+        await handler.on_delta('x')
+        silent = PhaseStreamHandler()
+        await silent.on_delta('y')
+
+    asyncio.run(run())
+    assert messages == []
@@ -0,0 +1,97 @@
+"""Tests for the review phase dependency DAG and its scheduler."""
+
+import asyncio
+
+import pytest
+
+from yx_cc.core.phase_scheduler import (DEFAULT_PHASE_DEPENDENCIES, PhaseScheduler, parse_phase_dependencies,
+                                        topological_order)
+from yx_cc.core.pr_reviewer import PRReviewer
+
+
+def test_spec_overrides_only_the_phases_it_names():
+    assert parse_phase_dependencies(None) == DEFAULT_PHASE_DEPENDENCIES
+    assert parse_phase_dependencies(' ') == DEFAULT_PHASE_DEPENDENCIES
+    assert parse_phase_dependencies('comments:;analysis:summary, comments;') == {
+        'summary': [], 'analysis': ['summary', 'comments'], 'comments': []}
+
+
+@pytest.mark.parametrize('spec, message', [
+    ('review:summary', "Unknown review phase 'review'"),
+    ('summary:lint', "Unknown review phase 'lint'"),
+    ('summary:comments', 'cycle: summary -> comments -> analysis -> summary'),
+])
+def test_invalid_specs_raise(spec, message):
+    with pytest.raises(ValueError, match=message):
+        parse_phase_dependencies(spec)
+
+
+def test_topological_order_puts_dependencies_first():
+    assert topological_order({'comments': ['analysis'], 'analysis': ['summary'], 'summary': []}) == [
+        'summary', 'analysis', 'comments']
+
+
+def _runner(log, phase, delay=0.05, fail=False):
+    async def run(dep_outputs):
+        log.append(('start', phase, dict(dep_outputs)))
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append(('cancelled', phase))
+            raise
+        if fail:
+            raise RuntimeError(f'{phase} failed')
+        log.append(('end', phase))
+        return phase.upper()
+    return run
+
+
+def test_phases_start_when_their_dependencies_finish():
+    log = []
+    scheduler = PhaseScheduler(parse_phase_dependencies('comments:;analysis:summary,comments'))
+
+    outputs = asyncio.run(scheduler.run({p: _runner(log, p) for p in ('summary', 'analysis', 'comments')}))
+
+    assert outputs == {'summary': 'SUMMARY', 'comments': 'COMMENTS', 'analysis': 'ANALYSIS'}
+    # Independent phases overlap; analysis gets both outputs
+    assert [entry[:2] for entry in log[:2]] == [('start', 'summary'), ('start', 'comments')]
+    assert log[-2] == ('start', 'analysis', {'summary': 'SUMMARY', 'comments': 'COMMENTS'})
+    assert scheduler.timings['analysis']['started_at'] >= scheduler.timings['summary']['duration']
+
+
+def test_dependencies_on_disabled_phases_are_ignored():
+    log = []
+    outputs = asyncio.run(PhaseScheduler().run({'comments': _runner(log, 'comments', 0)}))
+
+    assert outputs == {'comments': 'COMMENTS'}
+    assert log[0] == ('start', 'comments', {})
+    assert asyncio.run(PhaseScheduler().run({})) == {}
+
+
+def test_a_failing_phase_cancels_the_others():
+    log = []
+    scheduler = PhaseScheduler(parse_phase_dependencies('comments:'))
+    runners = {'summary': _runner(log, 'summary', 0.01, fail=True), 'analysis': _runner(log, 'analysis'),
+               'comments': _runner(log, 'comments', 10)}
+
+    with pytest.raises(RuntimeError, match='summary failed'):
+        asyncio.run(scheduler.run(runners))
+
+    assert ('cancelled', 'comments') in log
+    assert not any(entry[:2] == ('start', 'analysis') for entry in log)
+
+
+def _reviewer(dependencies):
+    reviewer = PRReviewer.__new__(PRReviewer)
+    reviewer.phase_dependencies = dependencies
+    return reviewer
+
+
+def test_dependency_context_of_one_several_or_no_dependencies():
+    reviewer = _reviewer(parse_phase_dependencies('comments:summary;analysis:summary,comments'))
+
+    assert reviewer._dependency_context('summary', {}) == ''
+    assert reviewer._dependency_context('analysis', {}) is None
+    assert reviewer._dependency_context('comments', {'summary': 'S'}) == 'S'
+    assert reviewer._dependency_context('analysis', {'summary': 'S', 'comments': ('C', [])}) == (
+        '### Summary\nS\n\n### Generated Comments\nC')
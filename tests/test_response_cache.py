@@ -0,0 +1,115 @@
+"""Tests for the YunXiao response cache and the client's ETag revalidation."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from yx_cc.integrations import ali_yunxiao, response_cache
+from yx_cc.integrations.response_cache import PERMANENT, ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock)
+    return clock
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ResponseCache()
+    cache.put('a', {'v': 1}, None, ttl=60)
+    cache.put('forever', {'v': 2}, None, ttl=PERMANENT)
+
+    clock.now += 59
+    assert cache.get('a').is_fresh()
+    clock.now += 1
+    # Stale entries are still returned, for revalidation
+    assert cache.get('a').value == {'v': 1} and not cache.get('a').is_fresh()
+    clock.now += 10 ** 9
+    assert cache.get('forever').is_fresh()
+
+    cache.refresh('a', cache.get('a'), ttl=60)
+    assert cache.get('a').is_fresh()
+
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = ResponseCache(max_entries=2, max_memory_bytes=100)
+    cache.put('a', 'x', None, 60, size=10)
+    cache.put('b', 'x', None, 60, size=10)
+    cache.get('a')
+    cache.put('c', 'x', None, 60, size=10)
+    assert cache.get('b') is None and cache.get('a') is not None
+
+    cache.put('big', 'x', None, 60, size=95)
+    assert cache.get('big') is not None and cache.get('a') is None and cache.get('c') is None
+    cache.put('huge', 'x', None, 60, size=101)  # Larger than the whole cache: not kept
+    assert cache.get('huge') is None
+    assert cache.stats()['memory_bytes'] == 95
+
+
+def test_disk_tier_survives_a_restart(tmp_path, clock):
+    ResponseCache(disk_dir=tmp_path).put('k', {'ü': [1, 2]}, '"e1"', ttl=PERMANENT)
+    ResponseCache(disk_dir=tmp_path).put('stale', [], '"e2"', ttl=10)
+    clock.now += 20
+
+    cache = ResponseCache(disk_dir=tmp_path)
+    entry = cache.get('k')
+    assert entry.value == {'ü': [1, 2]} and entry.etag == '"e1"' and entry.is_fresh()
+    assert not cache.get('stale').is_fresh()
+    assert cache.get('other') is None
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = ResponseCache(disk_dir=tmp_path, max_disk_bytes=250)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, 'x' * 50, None, ttl=60)
+
+    files = list(tmp_path.glob('*.json'))
+    assert 1 <= len(files) < 3
+    assert sum(f.stat().st_size for f in files) <= 250
+    assert ResponseCache(disk_dir=tmp_path).get('c') is not None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for name, value in (('ALI_YUNXIAO_TOKEN', 't'), ('ALI_ORGANIZATION_ID', 'o1'), ('ALI_REPOSITORY_ID', 'r1')):
+        monkeypatch.setenv(name, value)
+    client = ali_yunxiao.AliYunXiaoClient()
+    client.response_cache = ResponseCache()
+    return client
+
+
+def test_client_serves_fresh_responses_and_revalidates_stale_ones(client, monkeypatch, clock):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={'name': 'main'}, headers={'ETag': '"v1"'})
+
+    monkeypatch.setattr(ali_yunxiao, 'get_async_client',
+                        lambda config=None: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    def get():
+        return asyncio.run(client._make_request_async('GET', '/branches/main', cache_ttl=60))
+
+    assert get() == {'name': 'main'} and get() == {'name': 'main'}
+    assert len(requests) == 1 and 'If-None-Match' not in requests[0].headers
+
+    clock.now += 61
+    assert get() == {'name': 'main'}
+    assert len(requests) == 2 and requests[1].headers['If-None-Match'] == '"v1"'
+    # The 304 renewed the entry
+    assert get() == {'name': 'main'} and len(requests) == 2
+    stats = client.response_cache.stats()
+    assert (stats['hits'], stats['revalidations'], stats['misses']) == (2, 1, 1)
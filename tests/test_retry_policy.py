@@ -0,0 +1,165 @@
+"""Tests for the YunXiao retry policy, circuit breakers and the client's retry loop."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from yx_cc.integrations import ali_yunxiao, retry_policy
+from yx_cc.integrations.retry_policy import (CircuitBreaker, CircuitOpenError, RetryPolicy, endpoint_key,
+                                             parse_retry_after)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry_policy.time, 'monotonic', clock)
+    return clock
+
+
+def test_backoff_is_jittered_doubles_and_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    for attempt, cap in ((1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)):
+        delays = [policy.compute_delay(attempt) for _ in range(200)]
+        assert all(0 <= d <= cap for d in delays)
+        assert max(delays) > cap / 2
+
+
+def test_retry_after_overrides_backoff_within_the_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    assert policy.compute_delay(1, retry_after=3) == 3
+    assert policy.compute_delay(1, retry_after=60) == 5.0
+    assert policy.compute_delay(1, retry_after=-1) == 0.0
+
+
+def test_retry_after_as_seconds_or_http_date():
+    assert parse_retry_after(' 2.5 ') == 2.5
+    assert parse_retry_after(None) is None and parse_retry_after('soon') is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(later) <= 30
+    assert parse_retry_after('Mon, 01 Jan 2001 00:00:00 GMT') == 0.0
+
+
+def test_policy_from_env(monkeypatch):
+    monkeypatch.setenv('ALI_YUNXIAO_MAX_RETRIES', '0')
+    monkeypatch.setenv('ALI_YUNXIAO_RETRY_MAX_DELAY', '2')
+
+    assert RetryPolicy.from_env() == RetryPolicy(max_attempts=1, max_delay=2.0)
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('GET /x', failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()  # A success resets the count
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    assert not breaker.allow_request()
+
+
+def test_half_open_breaker_lets_one_probe_through(clock):
+    breaker = CircuitBreaker('GET /x', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    # A failed probe reopens for another full timeout
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request() and breaker.allow_request()
+
+
+def test_endpoint_key_collapses_identifiers():
+    base = '/oapi/v1/codeup/organizations/o1/repositories/r1/changeRequests'
+    assert endpoint_key('GET', f'{base}/7/comments/list') == (
+        'GET /oapi/v1/codeup/organizations/{id}/repositories/{id}/changeRequests/{id}/comments/list')
+    assert endpoint_key('PUT', f'{base}/7/comments/c9') == endpoint_key('PUT', f'{base}/8/comments/c1')
+    assert endpoint_key('GET', f'{base}/7') != endpoint_key('PUT', f'{base}/7')
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for name, value in (('ALI_YUNXIAO_TOKEN', 't'), ('ALI_ORGANIZATION_ID', 'o1'), ('ALI_REPOSITORY_ID', 'r1'),
+                        ('ALI_YUNXIAO_CACHE', 'false'), ('ALI_YUNXIAO_RETRY_BASE_DELAY', '0'),
+                        ('ALI_YUNXIAO_BREAKER_THRESHOLD', '4')):
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(retry_policy, '_breakers', {})
+    return ali_yunxiao.AliYunXiaoClient()
+
+
+def _serve(monkeypatch, statuses):
+    """Answer requests with the given statuses in turn, recording the requests."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status = statuses[min(len(requests), len(statuses)) - 1]
+        if status == 'drop':
+            raise httpx.ConnectError('connection reset', request=request)
+        return httpx.Response(status, json={'ok': status}, headers={'Retry-After': '0'})
+
+    monkeypatch.setattr(ali_yunxiao, 'get_async_client',
+                        lambda config=None: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return requests
+
+
+def test_client_retries_transient_failures(client, monkeypatch):
+    requests = _serve(monkeypatch, ['drop', 503, 429, 200])
+
+    assert asyncio.run(client._make_request_async('GET', '/repositories/r1/branches')) == {'ok': 200}
+    assert len(requests) == 4
+
+
+def test_client_gives_up_after_max_attempts(client, monkeypatch):
+    requests = _serve(monkeypatch, [502])
+
+    with pytest.raises(RuntimeError, match='502'):
+        asyncio.run(client._make_request_async('GET', '/repositories/r1/branches'))
+    assert len(requests) == client.retry_policy.max_attempts
+
+
+def test_client_does_not_resend_a_post_without_idempotency_key(client, monkeypatch):
+    requests = _serve(monkeypatch, [503, 200])
+
+    with pytest.raises(RuntimeError, match='503'):
+        asyncio.run(client._make_request_async('POST', '/repositories/r1/changeRequests/7/comments', data={}))
+    assert len(requests) == 1
+
+    assert asyncio.run(client._make_request_async('POST', '/repositories/r1/changeRequests/7/comments', data={},
+                                                  idempotency_key='k1')) == {'ok': 200}
+
+
+def test_open_circuit_fails_fast_without_a_request(client, monkeypatch):
+    requests = _serve(monkeypatch, [500])
+    with pytest.raises(RuntimeError):
+        asyncio.run(client._make_request_async('GET', '/repositories/r1/branches'))
+    sent = len(requests)
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client._make_request_async('GET', '/repositories/r2/branches'))
+    assert len(requests) == sent
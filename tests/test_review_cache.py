@@ -0,0 +1,105 @@
+"""Tests for the per-file review suggestion cache."""
+
+import pytest
+
+from yx_cc.core.diff_model import parse_diff
+from yx_cc.core.review_cache import FileReviewCache
+
+DIFF = """diff --git a/src/app.py b/src/app.py
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,2 +1,3 @@
+ import os
++import sys
+ def main():
+diff --git a/src/util.py b/src/util.py
+--- a/src/util.py
++++ b/src/util.py
+@@ -10,1 +10,1 @@
+-x = 1
++x = 2
+diff --git a/img/logo.png b/img/logo.png
+Binary files a/img/logo.png and b/img/logo.png differ
+"""
+
+SUGGESTIONS = [{'relevant_file': '/src/app.py', 'line_number': 2, 'suggestion_content': 'unused import'}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FileReviewCache(tmp_path / 'reviews')
+
+
+def _context(repository='repo-1', pr='7', system_prompt='system', prompt='prompt', model='model'):
+    return FileReviewCache.make_context('org', repository, pr, system_prompt, prompt, model)
+
+
+def test_reuses_suggestions_for_unchanged_files_of_the_same_pr(cache):
+    diff = parse_diff(DIFF)
+    context = _context()
+
+    reused, pending = cache.partition(diff, context)
+    assert reused == {} and [f.path for f in pending] == ['src/app.py', 'src/util.py', 'img/logo.png']
+
+    # Clean files are stored too; files without hunks (binary) never are
+    assert cache.store(pending, SUGGESTIONS, context) == 2
+
+    reused, pending = cache.partition(parse_diff(DIFF), context)
+    assert reused == {'src/app.py': SUGGESTIONS, 'src/util.py': []}
+    assert [f.path for f in pending] == ['img/logo.png']
+
+
+@pytest.mark.parametrize('other', [
+    {'pr': '8'}, {'repository': 'repo-2'}, {'system_prompt': 'other'}, {'prompt': 'other'}, {'model': 'other'},
+])
+def test_keys_are_scoped_to_repository_pr_prompts_and_model(cache, other):
+    diff = parse_diff(DIFF)
+    cache.store(diff, SUGGESTIONS, _context())
+
+    reused, pending = cache.partition(diff, _context(**other))
+    assert reused == {}
+    assert len(pending) == len(diff)
+
+
+def test_same_hunks_in_another_pr_get_another_key():
+    file_diff = parse_diff(DIFF).files[0]
+
+    assert FileReviewCache.file_key(file_diff, _context(pr='7')) != FileReviewCache.file_key(file_diff, _context(pr='8'))
+
+
+def test_changed_or_shifted_hunks_miss(cache):
+    context = _context()
+    cache.store(parse_diff(DIFF), SUGGESTIONS, context)
+
+    shifted = DIFF.replace('@@ -1,2 +1,3 @@', '@@ -5,2 +5,3 @@')
+    edited = DIFF.replace('+x = 2', '+x = 3')
+    assert list(cache.partition(parse_diff(shifted), context)[0]) == ['src/util.py']
+    assert list(cache.partition(parse_diff(edited), context)[0]) == ['src/app.py']
+
+
+def test_context_parts_are_length_prefixed():
+    assert FileReviewCache.make_context('ab', 'c') != FileReviewCache.make_context('a', 'bc')
+    assert FileReviewCache.make_context(None, 'x') == FileReviewCache.make_context('', 'x')
+
+
+def test_corrupt_entry_is_a_miss(cache):
+    diff = parse_diff(DIFF)
+    context = _context()
+    cache._store.put(FileReviewCache.file_key(diff.files[0], context), 'not json')
+
+    reused, pending = cache.partition(diff, context)
+    assert reused == {} and len(pending) == 3
+
+
+def test_has_entries_only_after_a_review_of_the_pr_stored_files(cache):
+    context = _context()
+    assert not cache.has_entries(context)
+
+    cache.store(parse_diff(DIFF).files[2:], SUGGESTIONS, context)  # Only the binary file: nothing stored
+    assert not cache.has_entries(context)
+
+    cache.store(parse_diff(DIFF), SUGGESTIONS, context)
+    assert cache.has_entries(context)
+    assert not cache.has_entries(_context(pr='8'))
+    # The check is not a lookup
+    assert cache.stats() == {'hits': 0, 'misses': 0}
@@ -0,0 +1,82 @@
+"""Tests for webhook parsing and the review server's queue."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from yx_cc.core.review_server import ReviewJob, ReviewServer, parse_merge_request_event
+
+
+def _event(action='update', **extra):
+    payload = {'object_kind': 'merge_request', 'object_attributes': {'local_id': 7, 'action': action}}
+    for key, value in extra.items():
+        if key == 'attrs':
+            payload['object_attributes'].update(value)
+        else:
+            payload[key] = value
+    return payload
+
+
+@pytest.fixture
+def server():
+    reviewer = SimpleNamespace(yunxiao_client=SimpleNamespace(repository_id='42'))
+    return ReviewServer(reviewer)
+
+
+def test_merge_request_event_becomes_a_job():
+    job, reason = parse_merge_request_event(_event(), '42')
+
+    assert job.pr_id == 7 and job.source == 'webhook' and reason == "action 'update'"
+    assert parse_merge_request_event(_event('merge'))[0] is None
+    assert parse_merge_request_event({'object_kind': 'push'})[0] is None
+
+
+@pytest.mark.parametrize('extra', [
+    {'attrs': {'target_project_id': 42}},
+    {'project': {'id': 42}},
+    {'project': {'id': 9, 'path_with_namespace': 'org/repo'}},
+    {},  # Names no repository
+])
+def test_events_for_the_configured_repository_are_accepted(extra):
+    repository_id = 'org%2Frepo' if 'path_with_namespace' in extra.get('project', {}) else '42'
+    assert parse_merge_request_event(_event(**extra), repository_id)[0] is not None
+
+
+@pytest.mark.parametrize('extra', [
+    {'attrs': {'target_project_id': 43}},
+    {'project': {'id': 43, 'path_with_namespace': 'org/other'}},
+    {'attrs': {'target': {'path_with_namespace': 'org/other'}}},
+])
+def test_events_for_another_repository_are_rejected(extra):
+    job, reason = parse_merge_request_event(_event(**extra), '42')
+
+    assert job is None and reason.startswith('event for another repository')
+    # Without a configured repository there is nothing to compare against
+    assert parse_merge_request_event(_event(**extra))[0] is not None
+
+
+def test_webhook_for_another_repository_is_not_queued(server):
+    body = json.dumps(_event(project={'id': 43})).encode()
+    status, response = asyncio.run(server.handle_request('POST', '/webhook', {}, body))
+
+    assert status == 200 and response['queued'] is False
+    assert server.queue.qsize() == 0 and server.stats['ignored'] == 1
+
+
+def test_coalesced_trigger_keeps_force_regenerate(server):
+    assert server.enqueue(ReviewJob(pr_id=7)) == 'queued'
+    assert server.enqueue(ReviewJob(pr_id=7, force_regenerate=True, source='trigger')) == 'coalesced'
+    assert server.enqueue(ReviewJob(pr_id=7)) == 'coalesced'
+
+    assert server.queue.qsize() == 1
+    assert server.queue.get_nowait().force_regenerate is True
+
+
+def test_deferred_events_keep_force_regenerate(server):
+    server._in_flight.add(7)
+
+    assert server.enqueue(ReviewJob(pr_id=7, force_regenerate=True)) == 'deferred'
+    assert server.enqueue(ReviewJob(pr_id=7)) == 'deferred'
+    assert server._rerun[7].force_regenerate is True and server.queue.qsize() == 0